@@ -0,0 +1,27 @@
+import logging
+import sys
+
+from utils.agent_server import AgentServer
+from utils.args_parser import AgentArgsParser
+from utils.logger import Logger
+
+
+def main():
+    """
+    Main function to run the load generator agent.
+    """
+    Logger.init_logger()
+    args = AgentArgsParser()
+
+    try:
+        agent = AgentServer(args.host, args.port, args.sudo_password, args.work_folder, args.token)
+        agent.serve_forever()
+    except KeyboardInterrupt:
+        logging.info('Agent stopped.')
+    except Exception as e:
+        logging.error(f"An error occurred: {e.with_traceback(None)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import logging
+import sys
+
+import pandas as pd
+
+from utils.args_parser import CompareArgsParser
+from utils.logger import Logger
+from utils.results_store import ResultsStore
+
+
+def main():
+    """
+    Main function to compare results of saved runs.
+    """
+    Logger.init_logger()
+    args = CompareArgsParser()
+
+    try:
+        store = ResultsStore(args.db)
+
+        if args.command == CompareArgsParser.COMMAND_RUNS:
+            df = store.get_runs(args.test_type, args.test_tag, args.limit)
+        elif args.command == CompareArgsParser.COMMAND_DIFF:
+            df = store.diff_runs(store.get_run_id(args.base_run), store.get_run_id(args.run), args.sheet,
+                                 args.metrics)
+        else:
+            df = store.get_trend(args.metric, args.sheet, args.file, args.step, args.test_type, args.test_tag,
+                                 args.limit)
+
+        if args.output is not None:
+            df.to_csv(args.output)
+            logging.info(f'Result is saved into {args.output}')
+        else:
+            with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', None):
+                print(df.to_string())
+    except Exception as e:
+        logging.error(f"An error occurred: {e.with_traceback(None)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,111 @@
 import logging
 import sys
 
-from models.config import Config
 from utils.args_parser import ArgsParser
 from utils.logger import Logger
-from utils.tcpreplay_runner import TcpreplayRunner
-from utils.report_generator import ReportGenerator
-from utils.visualizer import Visualizer
+from utils.phase_profiler import PhaseProfiler
+
+
+# Heavy modules are imported by the command using them, so the process running the test does not keep
+# pandas and plotly in memory and every command starts without importing modules of the others
+
+
+def run(args: ArgsParser):
+    """
+    Run test and save its report, results and graphs. Report is created without starting test,
+    if test folder is set.
+    """
+    config = get_config(args)
+
+    if args.test_folder is None:
+        from utils.tcpreplay_runner import TcpreplayRunner
+
+        runner = TcpreplayRunner(config)
+        runner.run()
+
+    report_generator = report(args, config)
+    visualize(args, config, report_generator)
+
+
+def report(args: ArgsParser, config=None):
+    """
+    Save report of test and its results into results store.
+
+    Returns:
+        ReportGenerator: Generator with dataframes of the report.
+    """
+    from utils.report_generator import ReportGenerator
+
+    config = config or get_config(args)
+
+    report_generator = ReportGenerator(config=config, workers=args.workers, is_cache_enabled=not args.no_cache)
+    report_generator.generate_report()
+
+    if config.run_config.results_store and report_generator.df_total_combined is not None:
+        from utils.results_store import ResultsStore
+
+        ResultsStore(config.run_config.results_store).save_run(config, report_generator.df_total_combined,
+                                                               report_generator.df_total_stability_combined)
+
+    return report_generator
+
+
+def visualize(args: ArgsParser, config=None, report_generator=None):
+    """
+    Save graphs of test. Dataframes of the report are taken from parse cache without saving report files,
+    if report generator is not set.
+    """
+    from utils.visualizer import Visualizer
+
+    if report_generator is None:
+        from utils.report_generator import ReportGenerator
+
+        config = config or get_config(args)
+
+        report_generator = ReportGenerator(config=config, workers=args.workers, is_cache_enabled=not args.no_cache)
+        report_generator.generate_report(is_write=False)
+
+    if report_generator.df_stage_combined is None:
+        return
+
+    Visualizer.visualize(report_generator.df_stage_combined, report_generator.df_stability_combined,
+                         report_generator.config.load_config.test_folder, report_generator.df_capacity, args.html,
+                         args.dashboard, args.workers, args.max_points)
+
+
+def profile(args: ArgsParser):
+    """
+    Measure cold start of run command, exit with error if it is over the budget.
+    """
+    from utils.startup_profiler import StartupProfiler
+
+    if not StartupProfiler.profile(args.max_startup_time, args.max_rss):
+        sys.exit(1)
+
+
+def get_config(args: ArgsParser):
+    from models.config import Config
+
+    config = Config(args.config, args.load, args.test_type, args.test_id, args.test_tag, args.sudo_password,
+                    args.test_folder)
+
+    if args.report_formats is not None:
+        config.run_config.set_report_formats(args.report_formats)
+
+    if args.results_store is not None:
+        config.run_config.results_store = args.results_store
+
+    PhaseProfiler.set_test_folder(config.load_config.test_folder)
+
+    return config
+
+
+COMMANDS = {
+    ArgsParser.COMMAND_RUN: run,
+    ArgsParser.COMMAND_REPORT: report,
+    ArgsParser.COMMAND_VISUALIZE: visualize,
+    ArgsParser.COMMAND_PROFILE: profile,
+}
 
 
 def main():
@@ -16,22 +115,16 @@ def main():
     Logger.init_logger()
     args = ArgsParser()
 
-    try:
-        config = Config(args.config, args.load, args.test_type, args.test_id, args.test_tag, args.sudo_password,
-                        args.test_folder)
-
-        if args.test_folder is None:
-            runner = TcpreplayRunner(config)
-            runner.run()
+    if args.profile:
+        PhaseProfiler.enable(args.profile_phase)
 
-        report_generator = ReportGenerator(config=config)
-        report_generator.generate_report()
-
-        Visualizer.visualize(report_generator.df_stage_combined, report_generator.df_stability_combined,
-                             config.load_config.test_folder)
+    try:
+        COMMANDS[args.command](args)
     except Exception as e:
         logging.error(f"An error occurred: {e.with_traceback(None)}")
         sys.exit(1)
+    finally:
+        PhaseProfiler.save()
 
 
 if __name__ == '__main__':
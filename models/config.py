@@ -1,15 +1,19 @@
 import datetime
+import hashlib
+import importlib.util
+import json
 import logging
 import os.path
 import socket
 from abc import ABC
 from typing import Optional, List, Dict
 
-import dpkt
 import yaml
 
+from models.report_formats import ReportFormats
 from models.test_types import TestTypes
 from utils.logger import Logger
+from utils.phase_profiler import PhaseProfiler
 
 
 class PcapStatistic:
@@ -54,6 +58,8 @@ class PcapStatistic:
 
     @classmethod
     def get_packets_sessions_per_loop_and_packets_size(cls, pcap_file):
+        import dpkt
+
         packets_per_loop = 0
         packets_size = 0
         sessions = set()
@@ -89,6 +95,9 @@ class PcapStatistic:
 
 
 class RunConfig:
+    # Path of results store, when it is enabled by --results_store without path
+    DEFAULT_RESULTS_STORE = os.path.join('load_tests', 'results.db')
+
     def __init__(self, general_config: Dict, sudo_password: Optional[str]):
         self.netmap_mode: bool = general_config.get('netmap_mode', False)
         self.speed_check: bool = general_config.get('speed_check', False)
@@ -97,10 +106,39 @@ class RunConfig:
         self.is_sudo: bool = general_config.get('is_sudo', False)
         self.sudo_password: Optional[str] = sudo_password
         self.is_unique_ip: bool = general_config.get('is_unique_ip', True)
+        self.start_barrier: bool = general_config.get('start_barrier', True)
+        self.start_barrier_timeout: int = general_config.get('start_barrier_timeout', 60)
+        self.start_max_skew: float = float(general_config.get('start_max_skew', 0.5))
+        self.hot_spare: bool = general_config.get('hot_spare', False)
+        self.control_socket: Optional[str] = general_config.get('control_socket', None)
+        self.incremental_report: bool = general_config.get('incremental_report', True)
+        self.report_formats: List[str] = []
+        self.set_report_formats(general_config.get('report_formats', [ReportFormats.XLSX]))
+        self.results_store: Optional[str] = general_config.get('results_store', None)
 
         if self.speed_check_interval < 1:
             self.speed_check = False
 
+    def set_report_formats(self, report_formats: List[str]):
+        for report_format in report_formats:
+            if report_format not in ReportFormats.REPORT_FORMATS:
+                raise ValueError(f'Unknown report format: {report_format}. '
+                                 f'Available formats: {", ".join(ReportFormats.REPORT_FORMATS)}')
+
+        if ReportFormats.XLSX in report_formats and ReportFormats.XLSX_STREAM in report_formats:
+            raise ValueError(f'Report formats {ReportFormats.XLSX} and {ReportFormats.XLSX_STREAM} '
+                             f'are saved into the same file, use one of them')
+
+        # Package is only found, not imported, so the test does not load it before the report
+        for report_format in report_formats:
+            package = ReportFormats.REQUIRED_PACKAGES.get(report_format)
+
+            if package is not None and importlib.util.find_spec(package) is None:
+                raise ValueError(f'Report format {report_format} requires {package} package, '
+                                 f'install it with: pip install -r requirements.txt')
+
+        self.report_formats = list(dict.fromkeys(report_formats))
+
 
 class PcapConfig:
     def __init__(self, pcap_id: int, pcap_config: Dict, default_interface: str):
@@ -155,6 +193,9 @@ class BashScriptConfig:
         self.script: str = bash_script['script']
         self.only_once: bool = bash_script.get('only_once', False)
         self.is_before_stage: bool = bash_script.get('is_before_stage', True)
+        self.is_parallel: bool = bash_script.get('is_parallel', False)
+        self.is_background: bool = bash_script.get('is_background', False)
+        self.timeout: Optional[int] = bash_script.get('timeout', None)
 
         self.run_count: int = 0
 
@@ -166,6 +207,59 @@ class BashScriptsConfig:
             self.bash_scripts_list.append(BashScriptConfig(bash_script))
 
 
+class MetricsConfig:
+    def __init__(self, metrics_config: Dict):
+        self.prometheus_host: str = metrics_config.get('prometheus_host', '127.0.0.1')
+        self.prometheus_port: Optional[int] = metrics_config.get('prometheus_port', None)
+        self.statsd_host: Optional[str] = metrics_config.get('statsd_host', None)
+        self.statsd_port: int = metrics_config.get('statsd_port', 8125)
+        self.statsd_prefix: str = metrics_config.get('statsd_prefix', 'pcapblaster')
+        self.statsd_interval: float = float(metrics_config.get('statsd_interval', 1))
+
+        self.is_enabled: bool = self.prometheus_port is not None or self.statsd_host is not None
+
+
+class ReportConfig:
+    def __init__(self, report_config: Dict):
+        self.percentiles: List[float] = [float(p) for p in report_config.get('percentiles', [1, 5, 50, 95, 99])]
+        self.below_target_percent: float = float(report_config.get('below_target_percent', 90.0))
+        self.steady_state: bool = report_config.get('steady_state', False)
+        self.steady_state_tolerance: float = float(report_config.get('steady_state_tolerance', 5.0))
+        self.steady_state_window: int = report_config.get('steady_state_window', 10)
+        self.acceptance_ratio: float = float(report_config.get('acceptance_ratio', 0.95))
+
+        for percentile in self.percentiles:
+            if not 0 <= percentile <= 100:
+                raise ValueError(f'Percentile must be in range [0, 100]: {percentile}')
+
+        if self.below_target_percent <= 0:
+            raise ValueError(f'below_target_percent must be positive: {self.below_target_percent}')
+
+        if self.steady_state_window < 1:
+            raise ValueError(f'steady_state_window must be at least 1 second: {self.steady_state_window}')
+
+
+class AgentConfig:
+    DEFAULT_HOST = '127.0.0.1'
+    DEFAULT_PORT = 8765
+    TOKEN_ENV = 'PCAP_BLASTER_AGENT_TOKEN'
+
+    def __init__(self, agent_config: Dict):
+        self.host: str = agent_config['host']
+        self.port: int = agent_config.get('port', AgentConfig.DEFAULT_PORT)
+        self.name: str = agent_config.get('name', f'{self.host}_{self.port}')
+        self.weight: float = float(agent_config.get('weight', 1.0))
+        self.interface: Optional[str] = agent_config.get('interface', None)
+        self.token: Optional[str] = agent_config.get('token', os.getenv(AgentConfig.TOKEN_ENV))
+
+        if self.weight <= 0:
+            raise ValueError(f'Weight of agent "{self.name}" must be positive: {self.weight}')
+
+        if not self.token:
+            raise ValueError(f'Token of agent "{self.name}" is not set, set token of the agent '
+                             f'or {AgentConfig.TOKEN_ENV}')
+
+
 class LoadConfig(ABC):
     def __init__(self, test_type: str, test_id: int, test_tag: str, load_config: Dict, test_folder: Optional[str]):
         self.steps: int = load_config.get('steps', 1)
@@ -259,11 +353,17 @@ class Config:
             f'and load config "{load_yaml_file}" for test type "{test_type}"'
         )
 
-        with open(config_yaml_file, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        with PhaseProfiler.phase('Load YAML configs'):
+            with open(config_yaml_file, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f)
+
+            with open(load_yaml_file, 'r', encoding='utf-8') as f:
+                load_config = yaml.safe_load(f)
 
-        with open(load_yaml_file, 'r', encoding='utf-8') as f:
-            load_config = yaml.safe_load(f)
+        # Runs of the same yaml configs have the same hash, so results of firmware builds are compared by it
+        self.config_hash: str = hashlib.sha256(json.dumps(
+            {'config': config, 'load': load_config.get(test_type)}, sort_keys=True, default=str
+        ).encode()).hexdigest()[:16]
 
         self.run_config: RunConfig = RunConfig(config.get('run_config', {}), sudo_password)
         self.bash_scripts_config: BashScriptsConfig = BashScriptsConfig(config.get('bash_scripts_config', []))
@@ -271,6 +371,9 @@ class Config:
                                                                                 self.run_config.netmap_mode)
 
         self.tcpreplay_args: TcpReplayArgsConfig = TcpReplayArgsConfig(config.get('tcpreplay_args', {}))
+        self.metrics_config: MetricsConfig = MetricsConfig(config.get('metrics', {}))
+        self.report_config: ReportConfig = ReportConfig(config.get('report_config', {}))
+        self.agent_configs: List[AgentConfig] = [AgentConfig(agent_config) for agent_config in config.get('agents', [])]
         self.load_config: LoadConfig
 
         if test_type == TestTypes.MAX_PERF:
@@ -286,7 +389,8 @@ class Config:
         else:
             raise ValueError(f"Unknown test type: {test_type}")
 
-        self.__calculate_loops()
+        with PhaseProfiler.phase('Calculate loops'):
+            self.__calculate_loops()
 
         logging.info(
             f'Parsing yaml finished! Configuration:\n'
@@ -296,13 +400,14 @@ class Config:
     def __calculate_loops(self):
         for pcap_config in self.pcap_configs:
             if pcap_config.loop_count is None and self.load_config.total_sessions_per_min is not None:
-                pcap_config.pcap_statistic = PcapStatistic(
-                    pcap_file=pcap_config.file,
-                    base_speed=self.load_config.base_speed,
-                    total_sessions_per_min=self.load_config.total_sessions_per_min,
-                    percentage=pcap_config.percentage,
-                    is_pps=self.load_config.is_pps
-                )
+                with PhaseProfiler.phase(f'Pcap statistic {os.path.basename(pcap_config.file)}'):
+                    pcap_config.pcap_statistic = PcapStatistic(
+                        pcap_file=pcap_config.file,
+                        base_speed=self.load_config.base_speed,
+                        total_sessions_per_min=self.load_config.total_sessions_per_min,
+                        percentage=pcap_config.percentage,
+                        is_pps=self.load_config.is_pps
+                    )
 
                 pcap_config.loop_count = pcap_config.pcap_statistic.loop_count
             elif pcap_config.loop_count is None and self.load_config.total_sessions_per_min is None:
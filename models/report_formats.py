@@ -0,0 +1,21 @@
+class ReportFormats:
+    XLSX = 'xlsx'
+    XLSX_STREAM = 'xlsx_stream'
+    CSV = 'csv'
+    PARQUET = 'parquet'
+    HTML = 'html'
+
+    REPORT_FORMATS = [
+        XLSX,
+        XLSX_STREAM,
+        CSV,
+        PARQUET,
+        HTML,
+    ]
+
+    # Packages imported by writers of formats, besides pandas
+    REQUIRED_PACKAGES = {
+        XLSX: 'openpyxl',
+        XLSX_STREAM: 'xlsxwriter',
+        PARQUET: 'pyarrow',
+    }
@@ -0,0 +1,184 @@
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from models.config import AgentConfig, PcapConfig, RunConfig, TcpReplayArgsConfig
+from utils.agent_controller import AgentsController
+from utils.agent_folders import AgentFolders
+from utils.agent_protocol import AgentCommands, AgentConnection, AgentStatuses
+from utils.agent_server import AgentServer
+from utils.tcpreplay_runner import StepThread
+
+TOKEN = 'test-token'
+
+# Prints stats lines of tcpreplay every 0.1 sec instead of every second to keep the test short
+STUB_TCPREPLAY = '''#!/usr/bin/env python3
+import datetime
+import sys
+import time
+
+pps = float(next(arg for arg in sys.argv if arg.startswith('--pps=')).split('=')[1])
+print(f'Test start: {datetime.datetime.now():%Y-%m-%d %H:%M:%S.%f} ...', flush=True)
+
+for second in range(1, 11):
+    time.sleep(0.1)
+    packets = int(pps * second)
+    print(f'Actual: {packets} packets ({packets * 100} bytes) sent in {second}.00 seconds', flush=True)
+    print(f'Rated: {pps * 100:.1f} Bps, {pps * 800 / 1e6:.2f} Mbps, {pps:.2f} pps', flush=True)
+
+print(f'Test complete: {datetime.datetime.now():%Y-%m-%d %H:%M:%S.%f}', flush=True)
+'''
+
+
+class AgentsTest(unittest.TestCase):
+    """
+    Step of the controller run on two agents on localhost with stub tcpreplay.
+    """
+
+    def setUp(self):
+        self.temp_folder = tempfile.TemporaryDirectory()
+        self.folder = self.temp_folder.name
+
+        bin_folder = os.path.join(self.folder, 'bin')
+        os.makedirs(bin_folder)
+        tcpreplay_path = os.path.join(bin_folder, 'tcpreplay')
+        with open(tcpreplay_path, 'w') as f:
+            f.write(STUB_TCPREPLAY)
+        os.chmod(tcpreplay_path, os.stat(tcpreplay_path).st_mode | stat.S_IEXEC)
+
+        path_patcher = mock.patch.dict(os.environ, {'PATH': f'{bin_folder}{os.pathsep}{os.environ["PATH"]}'})
+        path_patcher.start()
+        self.addCleanup(path_patcher.stop)
+
+        # Small chunks make the agents send every file by several messages
+        chunk_patcher = mock.patch.object(AgentServer, 'FILE_CHUNK_SIZE', 64)
+        chunk_patcher.start()
+        self.addCleanup(chunk_patcher.stop)
+
+        self.pcap_file = os.path.join(self.folder, 'a.pcap')
+        with open(self.pcap_file, 'wb') as f:
+            f.write(b'\0' * 1024)
+
+        self.agents = []
+        self.agent_configs = []
+        for agent_number in (1, 2):
+            port = self.__get_free_port()
+            agent = AgentServer('127.0.0.1', port, None, os.path.join(self.folder, f'agent_{agent_number}'),
+                                TOKEN)
+            threading.Thread(target=agent.serve_forever, daemon=True).start()
+            self.addCleanup(agent.shutdown)
+
+            self.__wait_listening(port)
+            self.agents.append(agent)
+            self.agent_configs.append(AgentConfig({'host': '127.0.0.1', 'port': port, 'name': f'agent_{agent_number}',
+                                                   'weight': agent_number, 'token': TOKEN}))
+
+        self.addCleanup(self.temp_folder.cleanup)
+
+    def test_run_step(self):
+        test_folder = os.path.join(self.folder, 'controller', '1__test')
+        run_config = RunConfig({'start_barrier_timeout': 10}, None)
+        tcpreplay_args = TcpReplayArgsConfig({})
+        step_thread = self.__get_step_thread(run_config, tcpreplay_args, test_folder)
+
+        AgentsController(self.agent_configs, run_config, tcpreplay_args, test_folder).run_step(step_thread)
+
+        stats_name = 'stats__step_1__file_num_0__a.pcap.log'
+        for agent, agent_config, target_rate in zip(self.agents, self.agent_configs, ('500.00', '1000.00')):
+            agent_folder = AgentFolders.get_agent_folder(test_folder, agent_config)
+            agent_test_folder = os.path.join(agent.work_folder, '1__test')
+
+            self.assertEqual(sorted(os.listdir(agent_folder)), sorted(os.listdir(agent_test_folder)))
+
+            for file_name in os.listdir(agent_folder):
+                with open(os.path.join(agent_folder, file_name)) as saved, \
+                        open(os.path.join(agent_test_folder, file_name)) as original:
+                    self.assertEqual(saved.read(), original.read(), file_name)
+
+            with open(os.path.join(agent_folder, stats_name)) as f:
+                stats = f.read()
+
+            self.assertIn(f'Target rate: {target_rate} pps', stats)
+            self.assertEqual(stats.count('Actual:'), 10)
+
+            with open(os.path.join(agent_folder, 'start__step_1.json')) as f:
+                self.assertIsNotNone(json.load(f)['processes'][0]['first_packet_time'])
+
+    def test_invalid_token(self):
+        agent_config = AgentConfig({'host': '127.0.0.1', 'port': self.agent_configs[0].port, 'token': 'wrong-token'})
+        run_config = RunConfig({'start_barrier_timeout': 10}, None)
+        tcpreplay_args = TcpReplayArgsConfig({})
+        test_folder = os.path.join(self.folder, 'controller', '2__test')
+
+        with self.assertRaises(PermissionError):
+            AgentsController([agent_config], run_config, tcpreplay_args, test_folder).run_step(
+                self.__get_step_thread(run_config, tcpreplay_args, test_folder))
+
+        self.assertFalse(os.path.exists(os.path.join(self.agents[0].work_folder, '2__test')))
+
+    def test_not_allowed_tcpreplay_arg(self):
+        run_config = RunConfig({'start_barrier_timeout': 10}, None)
+        tcpreplay_args = TcpReplayArgsConfig({'write': '/etc/passwd'})
+        test_folder = os.path.join(self.folder, 'controller', '3__test')
+
+        with self.assertRaises(ValueError):
+            AgentsController(self.agent_configs, run_config, tcpreplay_args, test_folder)
+
+        # Agent checks args before the step is prepared
+        message = {'command': AgentCommands.RUN_STEP, 'tcpreplay_args': tcpreplay_args.args_dict}
+
+        connection = AgentConnection.connect('127.0.0.1', self.agent_configs[0].port, TOKEN)
+        try:
+            connection.send(message)
+            response = connection.receive(10)
+        finally:
+            connection.close()
+
+        self.assertEqual(response['status'], AgentStatuses.ERROR)
+        self.assertIn('not allowed', response['message'])
+
+    def __get_step_thread(self, run_config: RunConfig, tcpreplay_args: TcpReplayArgsConfig,
+                          test_folder: str) -> StepThread:
+        return StepThread(
+            step_number=1,
+            pcap_configs=[PcapConfig(0, {'file': self.pcap_file, 'percentage': 100}, 'lo')],
+            run_config=run_config,
+            tcpreplay_args=tcpreplay_args,
+            current_load_percent=50,
+            base_speed=3000,
+            is_pps=True,
+            step_duration=1,
+            impact=0,
+            test_folder=test_folder
+        )
+
+    @staticmethod
+    def __get_free_port() -> int:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+
+            return sock.getsockname()[1]
+
+    @staticmethod
+    def __wait_listening(port: int):
+        deadline = time.time() + 5
+
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except ConnectionRefusedError:
+                if time.time() > deadline:
+                    raise
+
+                time.sleep(0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from utils.downsampler import Downsampler
+
+
+class DownsamplerTest(unittest.TestCase):
+    """
+    LTTB downsampling keeps the shape of a trace with the limited number of points.
+    """
+
+    def test_keeps_spikes_and_dips(self):
+        x = np.arange(10000, dtype=np.float64)
+        y = np.sin(x / 500) * 10 + 100
+        y[3000] = 1000
+        y[7000] = -1000
+
+        x_sampled, y_sampled = Downsampler.downsample(x, y, 200)
+
+        self.assertEqual(len(x_sampled), 200)
+        self.assertIn(3000, x_sampled)
+        self.assertIn(7000, x_sampled)
+        self.assertEqual(y_sampled.max(), 1000)
+        self.assertEqual(y_sampled.min(), -1000)
+        # The first and the last points are always kept, x stays increasing
+        self.assertEqual((x_sampled[0], x_sampled[-1]), (0, 9999))
+        self.assertTrue((np.diff(x_sampled) > 0).all())
+
+    def test_not_more_points_than_max(self):
+        x = np.arange(50, dtype=np.float64)
+        y = np.random.default_rng(1).random(50)
+
+        for max_points in (50, 51, 1000):
+            with self.subTest(max_points=max_points):
+                x_sampled, y_sampled = Downsampler.downsample(x, y, max_points)
+
+                np.testing.assert_array_equal(x_sampled, x)
+                np.testing.assert_array_equal(y_sampled, y)
+
+    def test_without_max_points(self):
+        x = np.arange(10, dtype=np.float64)
+        y = x * 2
+
+        x_sampled, y_sampled = Downsampler.downsample(x, y, None)
+
+        self.assertIs(x_sampled, x)
+        self.assertIs(y_sampled, y)
+
+    def test_too_small_max_points(self):
+        x = np.arange(10, dtype=np.float64)
+
+        np.testing.assert_array_equal(Downsampler.get_lttb_indices(x, x, 2), np.arange(10))
+
+    def test_nan_values(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.ones(1000)
+        y[100:300] = np.nan
+        y[500] = 50
+
+        indices = Downsampler.get_lttb_indices(x, y, 100)
+
+        self.assertLessEqual(len(indices), 100)
+        self.assertIn(500, indices)
+        self.assertTrue((np.diff(indices) > 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import stat
+import tempfile
+import time
+import unittest
+
+from models.config import BashScriptConfig
+from utils.hook_executor import HookExecutor
+
+
+class HookExecutorTest(unittest.TestCase):
+    """
+    Hooks with timeout, failure and background stop, scripts are run from a temporary folder.
+    """
+
+    def setUp(self):
+        self.temp_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_folder.cleanup)
+        self.folder = self.temp_folder.name
+
+    def test_timeout(self):
+        pid_file = os.path.join(self.folder, 'child.pid')
+        script = self.__write_script('slow.sh', f'sleep 30 &\necho $! > {pid_file}\necho started\nwait\n')
+        executor = HookExecutor([BashScriptConfig({'script': script, 'timeout': 1})], self.folder)
+
+        start_time = time.monotonic()
+        with self.assertLogs(level='WARNING') as logs:
+            executor.run_hooks(True, 1)
+
+        self.assertLess(time.monotonic() - start_time, 10)
+        self.assertTrue(any('timed out after 1 sec' in message for message in logs.output))
+        self.assertEqual(self.__read_hook_log('step_1__before__0__slow.sh.out.log'), 'started\n')
+
+        # Process started by the hook is killed with the hook
+        with open(pid_file) as f:
+            self.assertFalse(self.__is_running(int(f.read())))
+
+    def test_failure(self):
+        script = self.__write_script('failed.sh', 'echo broken >&2\nexit 3\n')
+        executor = HookExecutor([BashScriptConfig({'script': script, 'is_before_stage': False})], self.folder)
+
+        with self.assertLogs(level='WARNING') as logs:
+            executor.run_hooks(False, 2)
+
+        self.assertTrue(any('finished with code 3' in message for message in logs.output))
+        self.assertEqual(self.__read_hook_log('step_2__after__0__failed.sh.err.log'), 'broken\n')
+
+    def test_not_existing_script(self):
+        script = os.path.join(self.folder, 'missing.sh')
+        executor = HookExecutor([BashScriptConfig({'script': script})], self.folder)
+
+        with self.assertLogs(level='ERROR') as logs:
+            executor.run_hooks(True, 1)
+
+        self.assertTrue(any(f'Failed to run script {script}' in message for message in logs.output))
+
+    def test_only_once(self):
+        script = self.__write_script('once.sh', 'echo run\n')
+        executor = HookExecutor([BashScriptConfig({'script': script, 'only_once': True})], self.folder)
+
+        executor.run_hooks(True, 1)
+        executor.run_hooks(True, 2)
+
+        self.assertEqual(sorted(os.listdir(executor.hooks_folder)),
+                         ['step_1__before__0__once.sh.err.log', 'step_1__before__0__once.sh.out.log'])
+
+    def test_stop_background(self):
+        script = self.__write_script('background.sh', 'echo started\nexec sleep 30\n')
+        executor = HookExecutor([BashScriptConfig({'script': script, 'is_background': True})], self.folder)
+
+        start_time = time.monotonic()
+        executor.start_background_hooks(1)
+
+        with self.assertLogs(level='INFO') as logs:
+            executor.stop_background_hooks()
+
+        self.assertLess(time.monotonic() - start_time, 10)
+        self.assertTrue(any('stopped' in message for message in logs.output))
+
+    def __write_script(self, name: str, body: str) -> str:
+        path = os.path.join(self.folder, name)
+
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh\n' + body)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+        return path
+
+    def __read_hook_log(self, name: str) -> str:
+        with open(os.path.join(self.folder, 'hooks', name)) as f:
+            return f.read()
+
+    @staticmethod
+    def __is_running(pid: int) -> bool:
+        """
+        Check the process, killed process not reaped by its parent is a zombie.
+        """
+        for _ in range(50):
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    state = f.read().rsplit(')', 1)[1].split()[0]
+            except FileNotFoundError:
+                return False
+
+            if state == 'Z':
+                return False
+
+            time.sleep(0.1)
+
+        return True
+
+
+if __name__ == '__main__':
+    unittest.main()
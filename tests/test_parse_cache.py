@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from utils.parse_cache import ParseCache
+
+
+class ParseCacheTest(unittest.TestCase):
+    """
+    Cache entry of a stats file is valid only while size and modification time of the file are the same.
+    """
+
+    MTIME_NS = 1700000000 * 10 ** 9
+
+    def setUp(self):
+        self.temp_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_folder.cleanup)
+
+        self.stats_file = os.path.join(self.temp_folder.name, 'stats__step_1__file_num_0__a.pcap.log')
+        self.__write('Actual: 100 packets\n', self.MTIME_NS)
+
+        self.cache = ParseCache(self.temp_folder.name)
+        self.cache.put_stats(self.stats_file, {'size': 2, 'packets': np.array([1, 2], dtype=np.int64)})
+
+    def test_valid(self):
+        stats = self.cache.get_stats(self.stats_file)
+
+        self.assertEqual(stats['size'], 2)
+        np.testing.assert_array_equal(stats['packets'], [1, 2])
+        self.assertEqual(stats['packets'].dtype, np.int64)
+
+    def test_size_changed(self):
+        # Modification time is kept, so only the size differs
+        self.__write('Actual: 100 packets\nActual: 200 packets\n', self.MTIME_NS)
+
+        self.assertIsNone(self.cache.get_stats(self.stats_file))
+
+    def test_mtime_changed(self):
+        # File of the same size is rewritten
+        self.__write('Actual: 900 packets\n', self.MTIME_NS + 1)
+
+        self.assertIsNone(self.cache.get_stats(self.stats_file))
+
+    def test_version_changed(self):
+        with mock.patch.object(ParseCache, 'VERSION', ParseCache.VERSION + 1):
+            self.assertIsNone(self.cache.get_stats(self.stats_file))
+
+    def test_broken_entry(self):
+        for file_name in os.listdir(self.cache.cache_folder):
+            with open(os.path.join(self.cache.cache_folder, file_name), 'wb') as f:
+                f.write(b'broken')
+
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(self.cache.get_stats(self.stats_file))
+
+    def __write(self, text: str, mtime_ns: int):
+        with open(self.stats_file, 'w') as f:
+            f.write(text)
+
+        os.utime(self.stats_file, ns=(mtime_ns, mtime_ns))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from typing import List, Optional
+from unittest import mock
+
+import numpy as np
+
+from utils.report_generator import ParsedStats, StatsParser
+
+START_TIMESTAMP = 1700000000
+SECONDS = 40
+# Process is restarted with the new target after this second
+RESTART_SECOND = 25
+
+
+class StatsParserTest(unittest.TestCase):
+    """
+    Fast split of lines into typed arrays compared with the regex parser and with expected values,
+    the file is read by different chunk sizes.
+    """
+
+    def setUp(self):
+        self.temp_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_folder.cleanup)
+
+    def test_values(self):
+        stats = self.__read(self.__write('clean.log', self.__get_lines()))
+        seconds = np.arange(1, SECONDS + 1)
+        second_of_process = np.where(seconds <= RESTART_SECOND, seconds, seconds - RESTART_SECOND)
+
+        self.assertEqual(stats.size, SECONDS)
+        self.assertEqual(stats.stage_start_timestamp, START_TIMESTAMP)
+        self.assertEqual(stats.stage_end_timestamp, START_TIMESTAMP + SECONDS + 1)
+        self.assertEqual(stats.test_start_count, 2)
+        self.assertEqual(stats.restart_gaps, [0.25])
+        self.assertEqual(stats.restart_gap_entries, [RESTART_SECOND])
+
+        np.testing.assert_array_equal(stats.packets, second_of_process * 100)
+        np.testing.assert_array_equal(stats.bytes, second_of_process * 10000)
+        np.testing.assert_array_equal(stats.time, second_of_process)
+        np.testing.assert_array_equal(stats.pps, np.full(SECONDS, 100.0))
+        np.testing.assert_array_equal(stats.wall_time, START_TIMESTAMP + seconds + 0.5)
+        np.testing.assert_array_equal(stats.get_target(), np.where(seconds <= RESTART_SECOND, 100.0, 200.0))
+
+    def test_regex_fallback(self):
+        """
+        A broken line of every type makes the parser match lines by regex, other lines give the same values.
+        """
+        clean = self.__read(self.__write('clean.log', self.__get_lines()))
+        broken = self.__read(self.__write('broken.log', self.__get_lines(broken_second=10)))
+
+        self.__assert_equal_stats(clean, broken)
+
+    def test_chunk_boundaries(self):
+        path = self.__write('clean.log', self.__get_lines())
+        broken_path = self.__write('broken.log', self.__get_lines(broken_second=10))
+        expected = self.__read(path)
+
+        # Small chunks split lines and put "Wall time:" and its "Actual:" line into different chunks
+        for chunk_size in (7, 64, 101, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                self.__assert_equal_stats(expected, self.__read(path, chunk_size))
+                self.__assert_equal_stats(expected, self.__read(broken_path, chunk_size))
+
+    def __assert_equal_stats(self, expected: ParsedStats, stats: ParsedStats):
+        self.assertEqual(stats.size, expected.size)
+        self.assertEqual(stats.restart_gaps, expected.restart_gaps)
+        self.assertEqual(stats.restart_gap_entries, expected.restart_gap_entries)
+        self.assertEqual(stats.target_entries, expected.target_entries)
+        self.assertEqual(stats.rates_count, expected.rates_count)
+        self.assertAlmostEqual(stats.pps_sum, expected.pps_sum)
+
+        for column, values in expected.get_columns().items():
+            np.testing.assert_array_equal(stats.get_columns()[column], values, err_msg=column)
+
+    def __read(self, path: str, chunk_size: Optional[int] = None) -> ParsedStats:
+        with mock.patch.object(StatsParser, 'READ_CHUNK_SIZE', chunk_size or StatsParser.READ_CHUNK_SIZE):
+            return StatsParser(path).read()
+
+    def __write(self, name: str, lines: List[str]) -> str:
+        path = os.path.join(self.temp_folder.name, name)
+
+        # Last line of stats file is written without new line
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+
+        return path
+
+    @staticmethod
+    def __get_lines(broken_second: Optional[int] = None) -> List[str]:
+        """
+        Lines of tcpreplay restarted once with a new target. Broken lines of every type are added after
+        broken_second, they are not counted.
+        """
+        lines = [str(START_TIMESTAMP), 'Target rate: 100.00 pps', 'Test start: 2023-11-14 22:13:20.000000 ...']
+
+        for second in range(1, SECONDS + 1):
+            second_of_process = second if second <= RESTART_SECOND else second - RESTART_SECOND
+
+            lines.append(f'Wall time: {START_TIMESTAMP + second + 0.5:.3f} seconds')
+            lines.append(f'Actual: {second_of_process * 100} packets ({second_of_process * 10000} bytes) '
+                         f'sent in {second_of_process}.00 seconds')
+            lines.append('Rated: 10000.0 Bps, 0.08 Mbps, 100.00 pps')
+
+            if second == broken_second:
+                lines.extend(['Actual: packets are not counted', 'Rated: nan', 'Wall time: unknown seconds'])
+
+            if second == RESTART_SECOND:
+                lines.extend([str(START_TIMESTAMP + second), 'Target rate: 200.00 pps', 'Restart gap: 0.250 seconds',
+                               'Test start: 2023-11-14 22:13:45.000000 ...'])
+
+        lines.append(str(START_TIMESTAMP + SECONDS + 1))
+
+        return lines
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from utils.report_generator import ReportGenerator
+
+STEP = 'Step 1'
+
+
+class SummaryTest(unittest.TestCase):
+    """
+    Summary columns of a step summed from files by wall clock, as-of entry of every file on the grid of seconds.
+    """
+
+    def test_sum_by_wall_time(self):
+        # The second file starts later and has no entry at 104.7 sec after a restart
+        df_list = [
+            self.__get_file_df('File 1', [100.2, 101.2, 102.2, 103.2, 104.2], [10, 20, 30, 40, 50], 100.0),
+            self.__get_file_df('File 2', [102.7, 103.7, 105.7, 106.7], [1, 2, 3, 4], 7.0),
+        ]
+
+        df_summary = ReportGenerator._create_summary_dataframe(df_list, STEP)
+
+        np.testing.assert_array_equal(self.__get(df_summary, 'Wall Time'), np.arange(101, 108))
+        np.testing.assert_array_equal(self.__get(df_summary, 'Time'), np.arange(1, 8))
+        # Counters keep the last value of a file after its end
+        np.testing.assert_array_equal(self.__get(df_summary, 'Packets'), [10, 20, 31, 42, 52, 53, 54])
+        np.testing.assert_array_equal(self.__get(df_summary, 'Bytes'), [1000, 2000, 3100, 4200, 5200, 5300, 5400])
+        # Rate of a file is counted while its last entry is recent, the first file ends at 104.2 sec
+        np.testing.assert_array_equal(self.__get(df_summary, 'PPS'), [100, 100, 107, 107, 107, 7, 7])
+
+    def test_sum_by_time_without_wall_time(self):
+        df_list = [
+            self.__get_file_df('File 1', [100.2, 101.2, 102.2], [10, 20, 30], 100.0).drop(
+                columns=(STEP, 'File 1', 'Wall Time')),
+            self.__get_file_df('File 2', [102.7, 103.7], [1, 2], 7.0),
+        ]
+
+        df_summary = ReportGenerator._create_summary_dataframe(df_list, STEP)
+
+        np.testing.assert_array_equal(self.__get(df_summary, 'Time'), [1, 2, 3])
+        np.testing.assert_array_equal(self.__get(df_summary, 'Packets'), [11, 22, 30])
+        np.testing.assert_array_equal(self.__get(df_summary, 'PPS'), [107, 107, 100])
+
+    @staticmethod
+    def __get(df_summary: pd.DataFrame, metric: str) -> np.ndarray:
+        return df_summary[(STEP, 'Summary', metric)].to_numpy()
+
+    @staticmethod
+    def __get_file_df(file: str, wall_times: List[float], packets: List[int], pps: float) -> pd.DataFrame:
+        columns = {
+            'Packets': packets,
+            'Bytes': [value * 100 for value in packets],
+            'Time': list(range(1, len(packets) + 1)),
+            'Mbps': [pps * 0.0008] * len(packets),
+            'PPS': [pps] * len(packets),
+            'Wall Time': wall_times,
+        }
+
+        df = pd.DataFrame(columns)
+        df.columns = pd.MultiIndex.from_tuples([(STEP, file, column) for column in df.columns])
+
+        return df
+
+
+if __name__ == '__main__':
+    unittest.main()
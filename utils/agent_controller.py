@@ -0,0 +1,143 @@
+import logging
+import os
+from typing import List, Dict, Tuple
+
+from models.config import AgentConfig, RunConfig, TcpReplayArgsConfig
+from utils.agent_folders import AgentFolders
+from utils.agent_protocol import AgentConnection, AgentCommands, AgentStatuses, AgentTcpreplayArgs
+
+
+class AgentsController:
+    """
+    Class responsible for running test steps on remote agents.
+    """
+
+    __CONNECT_TIMEOUT = 10
+    __READY_TIMEOUT_MARGIN = 30
+
+    def __init__(self, agent_configs: List[AgentConfig], run_config: RunConfig, tcpreplay_args: TcpReplayArgsConfig,
+                 test_folder: str):
+        """
+        Initialize the controller.
+
+        Args:
+            agent_configs (List[AgentConfig]): Configs of agents.
+            run_config (RunConfig): Run config, sent to agents without sudo password.
+            tcpreplay_args (TcpReplayArgsConfig): Additional tcpreplay args, sent to agents.
+            test_folder (str): Folder of test, stats files of agents are saved into "agents/<agent name>" subfolders.
+        """
+        # Agents reject not allowed args, the test is not started with them
+        AgentTcpreplayArgs.validate(tcpreplay_args.args_dict)
+
+        self.agent_configs = agent_configs
+        self.run_config = run_config
+        self.tcpreplay_args = tcpreplay_args
+        self.test_folder = test_folder
+
+        self.total_weight = sum(agent_config.weight for agent_config in agent_configs)
+
+    def run_step(self, step_thread):
+        """
+        Run the test step on all agents. Base speed of the step is split between agents by their weights.
+        All agents prepare tcpreplay processes first and are started together, when every agent is ready.
+
+        Args:
+            step_thread (StepThread): Not started step thread with params of the step.
+        """
+        connections: Dict[str, AgentConnection] = {}
+
+        try:
+            for agent_config in self.agent_configs:
+                logging.info(f'Connecting to agent "{agent_config.name}" ({agent_config.host}:{agent_config.port})')
+                connection = AgentConnection.connect(agent_config.host, agent_config.port, agent_config.token,
+                                                     self.__CONNECT_TIMEOUT)
+                connections[agent_config.name] = connection
+
+                connection.send(self.__get_step_message(step_thread, agent_config))
+
+            ready_timeout = self.run_config.start_barrier_timeout + self.__READY_TIMEOUT_MARGIN
+            for agent_config in self.agent_configs:
+                self.__receive(connections[agent_config.name], agent_config, (AgentStatuses.READY,), ready_timeout)
+
+            logging.info(f'All agents are ready, starting step {step_thread.step_number}')
+            for agent_config in self.agent_configs:
+                connections[agent_config.name].send({'command': AgentCommands.START})
+
+            for agent_config in self.agent_configs:
+                self.__receive_files(connections[agent_config.name], agent_config)
+        finally:
+            for connection in connections.values():
+                connection.close()
+
+    def __get_step_message(self, step_thread, agent_config: AgentConfig) -> Dict:
+        run_config = {key: value for key, value in self.run_config.__dict__.items() if key != 'sudo_password'}
+        pcap_configs = []
+
+        for pcap_config in step_thread.pcap_configs:
+            pcap_configs.append({
+                'pcap_id': pcap_config.pcap_id,
+                'file': pcap_config.file,
+                'percentage': pcap_config.percentage,
+                'interface': agent_config.interface or pcap_config.interface,
+                'loop_count': pcap_config.loop_count,
+                'is_percent_loop_calculate': pcap_config.is_percent_loop_calculate,
+                'preload_in_ram': pcap_config.preload_in_ram,
+                'netmap_privilege': pcap_config.netmap_privilege,
+                'is_pcap_with_netmap': pcap_config.is_pcap_with_netmap,
+            })
+
+        return {
+            'command': AgentCommands.RUN_STEP,
+            'test_name': os.path.basename(os.path.normpath(self.test_folder)),
+            'step_number': step_thread.step_number,
+            'run_config': run_config,
+            'tcpreplay_args': self.tcpreplay_args.args_dict,
+            'pcap_configs': pcap_configs,
+            'current_load_percent': step_thread.current_load_percent,
+            'spike_load_percent': step_thread.spike_load_percent,
+            'pcap_for_spike': [pcap_config.file for pcap_config in step_thread.pcap_for_spike or []],
+            'base_speed': step_thread.base_speed * agent_config.weight / self.total_weight,
+            'is_pps': step_thread.is_pps,
+            'step_duration': step_thread.step_duration,
+            'impact': step_thread.impact,
+        }
+
+    @staticmethod
+    def __receive(connection: AgentConnection, agent_config: AgentConfig, statuses: Tuple[str, ...],
+                  timeout=None) -> Dict:
+        message = connection.receive(timeout)
+
+        if message is None:
+            raise ConnectionError(f'Agent "{agent_config.name}" closed connection')
+
+        if message['status'] == AgentStatuses.ERROR:
+            raise RuntimeError(f'Agent "{agent_config.name}" failed: {message["message"]}')
+
+        if message['status'] not in statuses:
+            raise RuntimeError(f'Agent "{agent_config.name}" sent status "{message["status"]}" instead of '
+                               f'"{", ".join(statuses)}"')
+
+        return message
+
+    def __receive_files(self, connection: AgentConnection, agent_config: AgentConfig):
+        """
+        Save files of the step sent by the agent chunk by chunk, until the agent reports the finished step.
+        """
+        agent_folder = AgentFolders.get_agent_folder(self.test_folder, agent_config)
+        os.makedirs(agent_folder, exist_ok=True)
+
+        file_names = set()
+
+        while True:
+            message = self.__receive(connection, agent_config, (AgentStatuses.FILE, AgentStatuses.FINISHED))
+            if message['status'] == AgentStatuses.FINISHED:
+                break
+
+            file_name = os.path.basename(message['name'])
+            with open(os.path.join(agent_folder, file_name), 'a' if file_name in file_names else 'w',
+                      encoding='utf-8') as f:
+                f.write(message['data'])
+
+            file_names.add(file_name)
+
+        logging.info(f'Saved {len(file_names)} files of agent "{agent_config.name}" into {agent_folder}')
@@ -0,0 +1,15 @@
+import os
+
+from models.config import AgentConfig
+
+
+class AgentFolders:
+    """
+    Paths of files of agents in the test folder of the controller, shared by the controller and the report.
+    """
+
+    AGENTS_FOLDER = 'agents'
+
+    @staticmethod
+    def get_agent_folder(test_folder: str, agent_config: AgentConfig) -> str:
+        return os.path.join(test_folder, AgentFolders.AGENTS_FOLDER, agent_config.name)
@@ -0,0 +1,101 @@
+import hmac
+import json
+import socket
+from typing import Dict, Optional
+
+
+class AgentCommands:
+    RUN_STEP = 'run_step'
+    START = 'start'
+
+
+class AgentStatuses:
+    READY = 'ready'
+    # Chunk of a file of the step, files are sent after the step one by one before the finished status
+    FILE = 'file'
+    FINISHED = 'finished'
+    ERROR = 'error'
+
+
+class AgentTcpreplayArgs:
+    """
+    Additional tcpreplay args accepted by agents. Other args, e.g. writing files or replaying other pcap files,
+    are rejected, so the controller can not run arbitrary tcpreplay with sudo of the agent.
+    """
+
+    ALLOWED_ARGS = ['timer', 'maxsleep', 'limit', 'mtu', 'mtu-trunc', 'pktlen', 'loopdelay-ms', 'loopdelay-ns',
+                    'enable-file-cache', 'no-flow-stats', 'flow-expiry']
+
+    @staticmethod
+    def validate(tcpreplay_args: Dict):
+        """
+        Check additional tcpreplay args sent to agents.
+
+        Raises:
+            ValueError: If an arg is not allowed or its value is not a single scalar.
+        """
+        for arg, value in tcpreplay_args.items():
+            if arg not in AgentTcpreplayArgs.ALLOWED_ARGS:
+                raise ValueError(f'tcpreplay arg "{arg}" is not allowed on agents. '
+                                 f'Allowed args: {", ".join(AgentTcpreplayArgs.ALLOWED_ARGS)}')
+
+            if value is not None and (not isinstance(value, (int, float, str)) or str(value).startswith('-')):
+                raise ValueError(f'Value of tcpreplay arg "{arg}" is not allowed on agents: {value}')
+
+
+class AgentConnection:
+    """
+    Connection between controller and agent. Every message is a JSON object on a single line.
+    Every message carries the shared token, message with other token is rejected.
+    """
+
+    def __init__(self, sock: socket.socket, token: str):
+        self.sock = sock
+        self.__token = token
+        self.__reader = sock.makefile('r', encoding='utf-8', newline='\n')
+        self.__writer = sock.makefile('w', encoding='utf-8', newline='\n')
+
+    @classmethod
+    def connect(cls, host: str, port: int, token: str, timeout: Optional[float] = None) -> 'AgentConnection':
+        sock = socket.create_connection((host, port), timeout=timeout)
+        sock.settimeout(None)
+
+        return cls(sock, token)
+
+    def send(self, message: Dict):
+        self.__writer.write(json.dumps({**message, 'token': self.__token}) + '\n')
+        self.__writer.flush()
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Receive next message. Returns None, if connection is closed by other side.
+
+        Raises:
+            PermissionError: If token of the message is not the shared token.
+        """
+        self.sock.settimeout(timeout)
+
+        try:
+            line = self.__reader.readline()
+        finally:
+            self.sock.settimeout(None)
+
+        if not line:
+            return None
+
+        message = json.loads(line)
+        token = message.pop('token', None)
+
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode(), self.__token.encode()):
+            raise PermissionError('Message with invalid token is rejected')
+
+        return message
+
+    def close(self):
+        for stream in (self.__reader, self.__writer):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+        self.sock.close()
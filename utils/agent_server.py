@@ -0,0 +1,189 @@
+import logging
+import os
+import socketserver
+import threading
+import time
+from typing import Dict, Optional
+
+from models.config import PcapConfig, RunConfig, TcpReplayArgsConfig
+from utils.agent_protocol import AgentConnection, AgentCommands, AgentStatuses, AgentTcpreplayArgs
+from utils.tcpreplay_runner import StepThread
+
+
+class AgentServer:
+    """
+    Class responsible for running test steps on this host by commands of the controller.
+    """
+
+    # Max number of characters of a file sent in one message
+    FILE_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, host: str, port: int, sudo_password: Optional[str], work_folder: str, token: Optional[str]):
+        """
+        Initialize the agent.
+
+        Args:
+            host (str): Host to listen on.
+            port (int): Port to listen on.
+            sudo_password (Optional[str]): Password for sudo on this host.
+            work_folder (str): Folder, where tests folders of agent are created.
+            token (Optional[str]): Token shared with the controller, required.
+        """
+        if not token:
+            raise ValueError('Token of agent is not set, set --token or PCAP_BLASTER_AGENT_TOKEN')
+
+        self.host = host
+        self.port = port
+        self.sudo_password = sudo_password
+        self.work_folder = work_folder
+        self.token = token
+
+        self.__step_lock = threading.Lock()
+        self.__server: Optional[socketserver.ThreadingTCPServer] = None
+
+    def serve_forever(self):
+        agent = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                agent.handle_connection(AgentConnection(self.request, agent.token))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        with socketserver.ThreadingTCPServer((self.host, self.port), Handler) as server:
+            self.__server = server
+            logging.info(f'Agent is listening on {self.host}:{self.port}')
+            server.serve_forever()
+
+    def shutdown(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+
+    def handle_connection(self, connection: AgentConnection):
+        try:
+            message = connection.receive()
+
+            if message is None:
+                return
+
+            if message['command'] != AgentCommands.RUN_STEP:
+                raise ValueError(f'Unknown command: {message["command"]}')
+
+            AgentTcpreplayArgs.validate(message['tcpreplay_args'])
+
+            if not self.__step_lock.acquire(blocking=False):
+                raise RuntimeError('Agent is already running a step')
+
+            try:
+                files_count = self.run_step(connection, message)
+            finally:
+                self.__step_lock.release()
+
+            connection.send({'status': AgentStatuses.FINISHED, 'files': files_count})
+        except Exception as e:
+            logging.error(f'Agent failed: {e}')
+
+            try:
+                connection.send({'status': AgentStatuses.ERROR, 'message': str(e)})
+            except OSError:
+                pass
+        finally:
+            connection.close()
+
+    def run_step(self, connection: AgentConnection, message: Dict) -> int:
+        """
+        Prepare tcpreplay processes of the step, report readiness, wait for start command, run the step
+        and send its files to the controller.
+
+        Returns:
+            int: Number of sent files of the step.
+        """
+        test_folder = os.path.join(self.work_folder, os.path.basename(message['test_name']))
+        os.makedirs(test_folder, exist_ok=True)
+
+        run_config = RunConfig(message['run_config'], self.sudo_password)
+        pcap_configs = []
+        for pcap_config_dict in message['pcap_configs']:
+            pcap_config = PcapConfig(pcap_config_dict['pcap_id'], pcap_config_dict, pcap_config_dict['interface'])
+            pcap_config.is_pcap_with_netmap = pcap_config_dict['is_pcap_with_netmap']
+            pcap_configs.append(pcap_config)
+
+        pcap_for_spike = [pcap_config for pcap_config in pcap_configs if pcap_config.file in message['pcap_for_spike']]
+
+        # Extra party of the barrier is this thread, it releases processes by start command of controller
+        start_barrier = threading.Barrier(len(pcap_configs) + 1)
+        step_thread = StepThread(
+            step_number=message['step_number'],
+            pcap_configs=pcap_configs,
+            run_config=run_config,
+            tcpreplay_args=TcpReplayArgsConfig(message['tcpreplay_args']),
+            current_load_percent=message['current_load_percent'],
+            base_speed=message['base_speed'],
+            is_pps=message['is_pps'],
+            step_duration=message['step_duration'],
+            impact=message['impact'],
+            test_folder=test_folder,
+            spike_load_percent=message['spike_load_percent'],
+            pcap_for_spike=pcap_for_spike or None,
+            start_barrier=start_barrier
+        )
+
+        logging.info(f'Preparing step {step_thread.step_number} of test "{message["test_name"]}"')
+        step_thread.start()
+
+        try:
+            self.__wait_prepared(start_barrier, run_config.start_barrier_timeout)
+            connection.send({'status': AgentStatuses.READY})
+
+            start_message = connection.receive()
+            if start_message is None or start_message['command'] != AgentCommands.START:
+                raise RuntimeError('Controller did not send start command')
+
+            start_barrier.wait(run_config.start_barrier_timeout)
+        except Exception:
+            start_barrier.abort()
+            step_thread.join()
+            raise
+
+        logging.info(f'Step {step_thread.step_number} started')
+        step_thread.join()
+        logging.info(f'Step {step_thread.step_number} finished')
+
+        return self.__send_step_files(connection, test_folder, step_thread.step_number)
+
+    @staticmethod
+    def __wait_prepared(start_barrier: threading.Barrier, timeout: int):
+        deadline = time.time() + timeout
+
+        while start_barrier.n_waiting < start_barrier.parties - 1:
+            if start_barrier.broken:
+                raise RuntimeError('Failed to prepare tcpreplay processes')
+
+            if time.time() > deadline:
+                raise TimeoutError(f'tcpreplay processes are not prepared in {timeout} sec')
+
+            time.sleep(0.01)
+
+    @staticmethod
+    def __send_step_files(connection: AgentConnection, test_folder: str, step_number: int) -> int:
+        """
+        Send stats files, event journals and start report of the step. Every file is read and sent by chunks,
+        so memory of the agent and the controller does not depend on duration of the step.
+        """
+        files_count = 0
+
+        for file_name in sorted(os.listdir(test_folder)):
+            if f'__step_{step_number}__' not in file_name and file_name != f'start__step_{step_number}.json':
+                continue
+
+            with open(os.path.join(test_folder, file_name), 'r', encoding='utf-8', errors='replace') as f:
+                while True:
+                    data = f.read(AgentServer.FILE_CHUNK_SIZE)
+                    # The first chunk is sent for empty file too, so the controller creates it
+                    connection.send({'status': AgentStatuses.FILE, 'name': file_name, 'data': data})
+
+                    if len(data) < AgentServer.FILE_CHUNK_SIZE:
+                        break
+
+            files_count += 1
+
+        return files_count
@@ -1,43 +1,231 @@
 import argparse
 import os.path
-from typing import Optional
+import sys
+from typing import List, Optional
 
+from models.config import AgentConfig, RunConfig
+from models.report_formats import ReportFormats
 from models.test_types import TestTypes
+from utils.phase_profiler import PhaseProfiler
 
 
 class ArgsParser:
+    COMMAND_RUN = 'run'
+    COMMAND_REPORT = 'report'
+    COMMAND_VISUALIZE = 'visualize'
+    COMMAND_PROFILE = 'profile'
+    COMMANDS = [COMMAND_RUN, COMMAND_REPORT, COMMAND_VISUALIZE, COMMAND_PROFILE]
+
     def __init__(self):
         args = self.__parse_args()
 
-        self.config: str = args.config
-        self.load: str = args.load
-        self.sudo_password: str = args.sudo_password
-        self.test_folder: Optional[str] = args.test_folder
-        self.test_id: int = args.test_id
-        self.test_tag: str = args.test_tag
-        self.test_type: str = args.test_type
+        self.command: str = args.command
+        self.config: str = getattr(args, 'config', None)
+        self.load: str = getattr(args, 'load', None)
+        self.sudo_password: Optional[str] = getattr(args, 'sudo_password', None)
+        self.test_folder: Optional[str] = getattr(args, 'test_folder', None)
+        self.test_id: int = getattr(args, 'test_id', -1)
+        self.test_tag: str = getattr(args, 'test_tag', 'DEBUG')
+        self.test_type: Optional[str] = getattr(args, 'test_type', None)
+        self.workers: Optional[int] = getattr(args, 'workers', None)
+        self.no_cache: bool = getattr(args, 'no_cache', False)
+        self.profile_phase: Optional[str] = getattr(args, 'profile_phase', None)
+        self.profile: bool = getattr(args, 'profile', False) or self.profile_phase is not None
+        self.report_formats: Optional[List[str]] = getattr(args, 'report_formats', None)
+        self.results_store: Optional[str] = getattr(args, 'results_store', None)
+        self.html: bool = getattr(args, 'html', False)
+        self.dashboard: bool = getattr(args, 'dashboard', False)
+        self.max_points: Optional[int] = getattr(args, 'max_points', None)
+        self.max_startup_time: float = getattr(args, 'max_startup_time', 0.0)
+        self.max_rss: float = getattr(args, 'max_rss', 0.0)
 
     @staticmethod
     def __parse_args():
         """
-        Parse command line arguments.
+        Parse command line arguments. Arguments without command are arguments of run command.
 
         Returns:
             argparse.Namespace: Parsed arguments.
         """
+        argv = sys.argv[1:]
+        if not argv or argv[0] not in ArgsParser.COMMANDS + ['-h', '--help']:
+            argv = [ArgsParser.COMMAND_RUN] + argv
+
+        config_parser = argparse.ArgumentParser(add_help=False)
+        config_parser.add_argument('-c', '--config', type=str, default=os.path.join('config', 'config.yaml'),
+                                   help='Path to the config file. (default=config/config.yaml)')
+        config_parser.add_argument('-l', '--load', type=str, default=os.path.join('config', 'load.yaml'),
+                                   help='Path to the load config file. (default=config/load.yaml)')
+
+        test_parser = argparse.ArgumentParser(add_help=False)
+        test_parser.add_argument('-i', '--test_id', type=int, default=-1, help='ID of test')
+        test_parser.add_argument('-t', '--test_tag', type=str, default='DEBUG', help='Tag of test')
+        test_parser.add_argument('-T', '--test_type', type=str, required=True, choices=TestTypes.TEST_TYPES,
+                                 help=f'Type of test to run ({", ".join(TestTypes.TEST_TYPES)})')
+        test_parser.add_argument('-w', '--workers', type=int, default=None,
+                                 help='Number of processes to parse stats files for report and render graphs. '
+                                      '(default=number of CPUs)')
+        test_parser.add_argument('-N', '--no_cache', action='store_true',
+                                 help='Do not use parse cache of test folder for report')
+        test_parser.add_argument('-P', '--profile', action='store_true',
+                                 help=f'Save wall time, CPU time and peak RSS of every phase of test into '
+                                      f'{PhaseProfiler.PROFILE_FILE_NAME} of test folder')
+        test_parser.add_argument('--profile_phase', type=str, default=None,
+                                 help='Shell pattern of phases to dump by cProfile and tracemalloc into test folder, '
+                                      'e.g. "Step 1" or "Parse *". Implies --profile')
+
+        report_parser = argparse.ArgumentParser(add_help=False)
+        report_parser.add_argument('-r', '--report_formats', type=str, nargs='+', choices=ReportFormats.REPORT_FORMATS,
+                                   help=f'Formats of report ({", ".join(ReportFormats.REPORT_FORMATS)}). '
+                                        f'(default=report_formats of config)')
+        report_parser.add_argument('-S', '--results_store', type=str, nargs='?', const=RunConfig.DEFAULT_RESULTS_STORE,
+                                   default=None,
+                                   help=f'Save results into SQLite store, path is optional. '
+                                        f'(default=results_store of config, {RunConfig.DEFAULT_RESULTS_STORE} '
+                                        f'without path)')
+
+        graphs_parser = argparse.ArgumentParser(add_help=False)
+        graphs_parser.add_argument('-H', '--html', action='store_true',
+                                   help='Save interactive HTML graphs besides PNG graphs')
+        graphs_parser.add_argument('-D', '--dashboard', action='store_true',
+                                   help='Save single-file interactive dashboard of all graphs')
+        graphs_parser.add_argument('-M', '--max_points', type=int, default=None,
+                                   help='Max number of points of every graph trace, longer traces are downsampled '
+                                        'keeping spikes and dips. (default=all points)')
+
         parser = argparse.ArgumentParser(description='PcapBlaster TCPReplay Test Runner')
-        parser.add_argument('-c', '--config', type=str, default=os.path.join('config', 'config.yaml'),
-                            help='Path to the config file. (default=config/config.yaml)')
-        parser.add_argument('-l', '--load', type=str, default=os.path.join('config', 'load.yaml'),
-                            help='Path to the load config file. (default=config/load.yaml)')
+        commands = parser.add_subparsers(dest='command', required=True)
+
+        run_parser = commands.add_parser(ArgsParser.COMMAND_RUN, help='Run test, save its report and graphs',
+                                         parents=[config_parser, test_parser, report_parser, graphs_parser])
+        run_parser.add_argument('-p', '--sudo_password', type=str, default=os.getenv('SUDO_PASS', None),
+                                help='Password for SUDO')
+        run_parser.add_argument('-f', '--test_folder', type=str,
+                                help='Folder of test to create report without starting test')
+
+        for command, help_text, parents in [
+            (ArgsParser.COMMAND_REPORT, 'Save report of finished test', [report_parser]),
+            (ArgsParser.COMMAND_VISUALIZE, 'Save graphs of finished test', [graphs_parser]),
+        ]:
+            command_parser = commands.add_parser(command, help=help_text,
+                                                 parents=[config_parser, test_parser] + parents)
+            command_parser.add_argument('-f', '--test_folder', type=str, required=True, help='Folder of test')
+
+        profile_parser = commands.add_parser(ArgsParser.COMMAND_PROFILE,
+                                             help='Measure cold start time and memory of run command')
+        profile_parser.add_argument('--max_startup_time', type=float, default=0.5,
+                                    help='Budget of cold start time in seconds. (default=0.5)')
+        profile_parser.add_argument('--max_rss', type=float, default=48.0,
+                                    help='Budget of peak RSS after start in MB. (default=48)')
+
+        args = parser.parse_args(argv)
+
+        return args
+
+
+class AgentArgsParser:
+    def __init__(self):
+        args = self.__parse_args()
+
+        self.host: str = args.host
+        self.port: int = args.port
+        self.sudo_password: str = args.sudo_password
+        self.work_folder: str = args.work_folder
+        self.token: Optional[str] = args.token
+
+    @staticmethod
+    def __parse_args():
+        """
+        Parse command line arguments of agent.
+
+        Returns:
+            argparse.Namespace: Parsed arguments.
+        """
+        parser = argparse.ArgumentParser(description='PcapBlaster load generator agent')
+        parser.add_argument('-H', '--host', type=str, default=AgentConfig.DEFAULT_HOST,
+                            help=f'Host to listen on. (default={AgentConfig.DEFAULT_HOST})')
+        parser.add_argument('-P', '--port', type=int, default=AgentConfig.DEFAULT_PORT,
+                            help=f'Port to listen on. (default={AgentConfig.DEFAULT_PORT})')
         parser.add_argument('-p', '--sudo_password', type=str, default=os.getenv('SUDO_PASS', None),
                             help='Password for SUDO')
-        parser.add_argument('-f', '--test_folder', type=str,
-                            help='Folder of test to create report without starting test')
-        parser.add_argument('-i', '--test_id', type=int, default=-1, help='ID of test')
-        parser.add_argument('-t', '--test_tag', type=str, default='DEBUG', help='Tag of test')
-        parser.add_argument('-T', '--test_type', type=str, required=True, choices=TestTypes.TEST_TYPES,
-                            help=f'Type of test to run ({", ".join(TestTypes.TEST_TYPES)})')
+        parser.add_argument('-w', '--work_folder', type=str, default='agent_tests',
+                            help='Folder to save stats files of agent. (default=agent_tests)')
+        parser.add_argument('-k', '--token', type=str, default=os.getenv(AgentConfig.TOKEN_ENV, None),
+                            help=f'Token shared with the controller, required. (default={AgentConfig.TOKEN_ENV})')
+        args = parser.parse_args()
+
+        return args
+
+
+class CompareArgsParser:
+    COMMAND_RUNS = 'runs'
+    COMMAND_DIFF = 'diff'
+    COMMAND_TREND = 'trend'
+
+    def __init__(self):
+        args = self.__parse_args()
+
+        self.command: str = args.command
+        self.db: str = args.db
+        self.sheet: str = getattr(args, 'sheet', None)
+        self.output: Optional[str] = args.output
+        self.test_type: Optional[str] = getattr(args, 'test_type', None)
+        self.test_tag: Optional[str] = getattr(args, 'test_tag', None)
+        self.limit: Optional[int] = getattr(args, 'limit', None)
+        self.base_run: Optional[str] = getattr(args, 'base_run', None)
+        self.run: Optional[str] = getattr(args, 'run', None)
+        self.metrics: Optional[List[str]] = getattr(args, 'metrics', None)
+        self.metric: Optional[str] = getattr(args, 'metric', None)
+        self.file: str = getattr(args, 'file', 'Summary')
+        self.step: Optional[str] = getattr(args, 'step', None)
+
+    @staticmethod
+    def __parse_args():
+        """
+        Parse command line arguments of results store queries.
+
+        Returns:
+            argparse.Namespace: Parsed arguments.
+        """
+        # Common options are accepted after the command
+        common_parser = argparse.ArgumentParser(add_help=False)
+        common_parser.add_argument('-d', '--db', type=str, default=RunConfig.DEFAULT_RESULTS_STORE,
+                                   help='Path to the results store. (default=load_tests/results.db)')
+        common_parser.add_argument('-o', '--output', type=str, help='Path of CSV file to save the result')
+
+        sheet_parser = argparse.ArgumentParser(add_help=False)
+        sheet_parser.add_argument('-s', '--sheet', type=str, default='Total Stability',
+                                  choices=['Total', 'Total Stability'],
+                                  help='Sheet of report to compare. (default=Total Stability)')
+
+        parser = argparse.ArgumentParser(description='PcapBlaster comparison of saved test results')
+        commands = parser.add_subparsers(dest='command', required=True)
+
+        runs_parser = commands.add_parser(CompareArgsParser.COMMAND_RUNS, parents=[common_parser],
+                                          help='List saved runs')
+        CompareArgsParser.__add_runs_filter(runs_parser)
+
+        diff_parser = commands.add_parser(CompareArgsParser.COMMAND_DIFF, parents=[common_parser, sheet_parser],
+                                          help='Compare metrics of two runs')
+        diff_parser.add_argument('base_run', type=str, help='ID or test folder of the base run')
+        diff_parser.add_argument('run', type=str, help='ID or test folder of the compared run')
+        diff_parser.add_argument('-m', '--metrics', type=str, nargs='+', help='Metrics to compare. (default=all)')
+
+        trend_parser = commands.add_parser(CompareArgsParser.COMMAND_TREND, parents=[common_parser, sheet_parser],
+                                           help='Show a metric across runs')
+        trend_parser.add_argument('-m', '--metric', type=str, default='Average PPS',
+                                  help='Metric to show. (default=Average PPS)')
+        trend_parser.add_argument('-F', '--file', type=str, default='Summary',
+                                  help='File of the metric. (default=Summary)')
+        trend_parser.add_argument('-S', '--step', type=str, help='Step of the metric, e.g. "Step 1". (default=all)')
+        CompareArgsParser.__add_runs_filter(trend_parser)
+
         args = parser.parse_args()
 
         return args
+
+    @staticmethod
+    def __add_runs_filter(parser: argparse.ArgumentParser):
+        parser.add_argument('-T', '--test_type', type=str, choices=TestTypes.TEST_TYPES, help='Type of runs')
+        parser.add_argument('-t', '--test_tag', type=str, help='Tag of runs')
+        parser.add_argument('-n', '--limit', type=int, help='Number of the latest runs. (default=all)')
@@ -0,0 +1,151 @@
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.config import Config, MaxPerfLoadConfig
+
+
+class CapacityAnalyzer:
+    """
+    Class responsible for capacity summary of max_perf test: delivered rate of every step is compared with its target,
+    the saturation knee is found by piecewise linear fit of delivered rate by target rate.
+    """
+
+    # Slope of delivered rate after the knee is less than this part of the slope before it
+    __KNEE_SLOPE_RATIO = 0.5
+    # Every segment of piecewise fit has at least this number of steps
+    __MIN_SEGMENT_STEPS = 2
+
+    @staticmethod
+    def analyze(config: Config, df_total: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Create capacity summary of max_perf test.
+
+        Args:
+            config (Config): Config of max_perf test.
+            df_total (pd.DataFrame): Total sheet of report, Total Stability is preferred.
+
+        Returns:
+            Optional[pd.DataFrame]: Capacity sheet indexed by step or None, if there are no steps.
+        """
+        load_config: MaxPerfLoadConfig = config.load_config
+        rate_column = 'Average PPS' if load_config.is_pps else 'Average Mbps'
+
+        df_steps = CapacityAnalyzer.__get_step_totals(df_total)
+        if df_steps.empty:
+            return None
+
+        steps = df_steps.index.tolist()
+        load_percents = np.array([load_config.start_speed_percent + load_config.increment_percent *
+                                  (int(step.split()[-1]) - 1) for step in steps], dtype=np.float64)
+
+        # Old stats files have no target rate, it is calculated as runner does
+        target = load_config.base_speed * load_percents / 100
+        if 'Target Rate' in df_steps.columns:
+            target = np.where(df_steps['Target Rate'].isna(), target, df_steps['Target Rate'].to_numpy())
+
+        delivered = df_steps[rate_column].to_numpy(dtype=np.float64)
+        ratio = np.divide(delivered, target, out=np.full(len(target), np.nan), where=target > 0)
+
+        is_accepted = ratio >= config.report_config.acceptance_ratio
+        fitted, knee = CapacityAnalyzer.__fit_knee(target, delivered)
+
+        is_max_accepted = np.zeros(len(steps), dtype=bool)
+        if is_accepted.any():
+            is_max_accepted[np.flatnonzero(is_accepted)[-1]] = True
+
+        is_knee = np.zeros(len(steps), dtype=bool)
+        if knee is not None:
+            is_knee[knee] = True
+            logging.info(f'Saturation knee of delivered rate is at {steps[knee]} '
+                         f'({delivered[knee]:.2f} of target {target[knee]:.2f})')
+        else:
+            logging.info('Saturation knee of delivered rate is not found')
+
+        return pd.DataFrame({
+            'Load Percent': load_percents,
+            'Target Rate': target,
+            'Delivered Rate': delivered,
+            'Achieved/Target': ratio,
+            'Fitted Rate': fitted,
+            'Is Accepted': is_accepted,
+            'Is Max Accepted': is_max_accepted,
+            'Is Knee': is_knee,
+        }, index=pd.Index(steps, name='Step'))
+
+    @staticmethod
+    def __get_step_totals(df_total: pd.DataFrame) -> pd.DataFrame:
+        """
+        Get Summary row of every step, or the only file row of step with one file.
+        """
+        rows = {}
+
+        for step, df_step in df_total.groupby(level='Step', sort=False):
+            files = df_step.index.get_level_values('File')
+
+            if 'Summary' in files:
+                rows[step] = df_step.xs('Summary', level='File').iloc[0]
+            elif len(df_step) == 1:
+                rows[step] = df_step.iloc[0]
+
+        df_steps = pd.DataFrame.from_dict(rows, orient='index')
+
+        if df_steps.empty:
+            return df_steps
+
+        return df_steps.sort_index(key=lambda index: index.str.split().str[-1].astype(int))
+
+    @staticmethod
+    def __fit_knee(target: np.ndarray, delivered: np.ndarray) -> Tuple[np.ndarray, Optional[int]]:
+        """
+        Fit delivered rate by two linear segments with every split of steps, the split with the least squared error
+        is the knee, if delivered rate grows slower after it.
+
+        Returns:
+            Tuple[np.ndarray, Optional[int]]: Fitted delivered rate and index of the last step before saturation.
+        """
+        min_steps = CapacityAnalyzer.__MIN_SEGMENT_STEPS
+
+        if np.isnan(target).any() or np.isnan(delivered).any():
+            return np.full(len(target), np.nan), None
+
+        fitted = CapacityAnalyzer.__fit_line(target, delivered)[0]
+
+        if len(target) < min_steps * 2:
+            return fitted, None
+
+        best_error = np.inf
+        best_fit = None
+
+        for split in range(min_steps, len(target) - min_steps + 1):
+            fitted_before, slope_before = CapacityAnalyzer.__fit_line(target[:split], delivered[:split])
+            fitted_after, slope_after = CapacityAnalyzer.__fit_line(target[split:], delivered[split:])
+            error = np.sum((fitted_before - delivered[:split]) ** 2) + np.sum((fitted_after - delivered[split:]) ** 2)
+
+            if error < best_error:
+                best_error = error
+                best_fit = (split, np.concatenate([fitted_before, fitted_after]), slope_before, slope_after)
+
+        split, split_fitted, slope_before, slope_after = best_fit
+
+        if slope_before <= 0 or slope_after >= slope_before * CapacityAnalyzer.__KNEE_SLOPE_RATIO:
+            return fitted, None
+
+        return split_fitted, split - 1
+
+    @staticmethod
+    def __fit_line(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Least squares line fit.
+
+        Returns:
+            Tuple[np.ndarray, float]: Fitted values and slope.
+        """
+        if len(x) < 2 or np.ptp(x) == 0:
+            return np.full(len(y), np.mean(y) if len(y) else np.nan), 0.0
+
+        slope, intercept = np.polyfit(x, y, 1)
+
+        return slope * x + intercept, float(slope)
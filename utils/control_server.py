@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from typing import Dict, Optional
+
+
+class StepControl:
+    """
+    Class for runtime changes of a running step, shared between process runners of the step.
+    """
+
+    def __init__(self, step_number: int):
+        self.step_number = step_number
+        self.start_time = time.time()
+
+        self.__lock = threading.Lock()
+        self.__duration_shift: float = 0.0
+        self.__stop_time: Optional[float] = None
+        self.__rate_requests: Dict[int, float] = {}
+        self.__speeds: Dict[int, float] = {}
+
+    def get_deadline(self, planned_end_time: float) -> float:
+        """
+        Get end time of the step for process, which planned to finish at planned_end_time.
+        """
+        with self.__lock:
+            if self.__stop_time is not None:
+                return self.__stop_time
+
+            return planned_end_time + self.__duration_shift
+
+    def extend(self, seconds: float):
+        with self.__lock:
+            self.__duration_shift += seconds
+
+    def stop(self):
+        with self.__lock:
+            if self.__stop_time is None:
+                self.__stop_time = time.time()
+
+    def set_speed(self, pcap_id: int, speed: float):
+        with self.__lock:
+            self.__speeds[pcap_id] = speed
+
+    def request_rate(self, pcap_id: int, speed: float):
+        with self.__lock:
+            if pcap_id not in self.__speeds:
+                raise ValueError(f'There is no running file with number {pcap_id}')
+
+            self.__rate_requests[pcap_id] = speed
+
+    def pop_rate_request(self, pcap_id: int) -> Optional[float]:
+        with self.__lock:
+            return self.__rate_requests.pop(pcap_id, None)
+
+    def get_status(self) -> Dict:
+        with self.__lock:
+            return {
+                'step': self.step_number,
+                'step_time': round(time.time() - self.start_time, 3),
+                'duration_shift': self.__duration_shift,
+                'is_stopped': self.__stop_time is not None,
+                'speeds': {str(pcap_id): speed for pcap_id, speed in sorted(self.__speeds.items())},
+            }
+
+
+class ControlServer:
+    """
+    Class responsible for local Unix socket API to change the running test.
+
+    Every request is a JSON object on a single line, e.g. {"command": "set_rate", "file_num": 0, "speed": 500}.
+    Every change is appended to control_events.jsonl of the test folder. Steps run on agents can not be changed,
+    only status is available in agents mode.
+    """
+
+    EVENTS_FILE_NAME = 'control_events.jsonl'
+
+    def __init__(self, socket_path: str, test_folder: str, is_agents_mode: bool = False):
+        """
+        Initialize the control server.
+
+        Args:
+            socket_path (str): Path of Unix socket.
+            test_folder (str): Folder of test to save control events.
+            is_agents_mode (bool): Steps are run on agents, commands changing the test are rejected.
+        """
+        self.socket_path = socket_path
+        self.events_file = os.path.join(test_folder, self.EVENTS_FILE_NAME)
+        self.is_agents_mode = is_agents_mode
+        self.is_aborted = False
+
+        self.__step_control: Optional[StepControl] = None
+        # Skip received between steps is applied to the next step
+        self.__is_skip_pending = False
+        self.__lock = threading.Lock()
+        self.__server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self.__thread: Optional[threading.Thread] = None
+
+    def start(self):
+        control_server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+
+                    response = control_server.handle_request(line.decode('utf-8'))
+                    self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+                    self.wfile.flush()
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        self.__server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+        logging.info(f'Control socket is listening on {self.socket_path}')
+
+    def stop(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__thread.join()
+
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def set_step_control(self, step_control: Optional[StepControl]):
+        """
+        Set control of the running step. Abort or skip received before the step started stops it at once.
+        """
+        with self.__lock:
+            self.__step_control = step_control
+
+            if step_control is not None and (self.is_aborted or self.__is_skip_pending):
+                self.__is_skip_pending = False
+                step_control.stop()
+
+    def handle_request(self, request_line: str) -> Dict:
+        try:
+            request = json.loads(request_line)
+            command = request['command']
+
+            if command == 'status':
+                with self.__lock:
+                    step_control = self.__step_control
+
+                return {'status': 'ok', 'is_aborted': self.is_aborted,
+                        'step': step_control.get_status() if step_control else None}
+
+            if self.is_agents_mode:
+                raise RuntimeError(f'Command {command} is not supported, steps are run on agents')
+
+            with self.__lock:
+                step_control = self.__step_control
+
+                # Abort and skip are kept until the next step, when they come between steps, during hooks
+                # or before processes of the step are started
+                if command == 'abort':
+                    self.is_aborted = True
+                elif command == 'skip' and step_control is None:
+                    self.__is_skip_pending = True
+
+            if command in ('abort', 'skip'):
+                if step_control is not None:
+                    step_control.stop()
+            elif step_control is None:
+                raise RuntimeError('There is no running step')
+            elif command == 'set_rate':
+                step_control.request_rate(int(request['file_num']), float(request['speed']))
+            elif command == 'extend':
+                step_control.extend(float(request['seconds']))
+            elif command == 'shorten':
+                step_control.extend(-float(request['seconds']))
+            else:
+                raise ValueError(f'Unknown command: {command}')
+        except Exception as e:
+            logging.warning(f'Failed control request {request_line.strip()}: {e}')
+            return {'status': 'error', 'message': str(e)}
+
+        self.__save_event(step_control, request)
+        step_str = f'step {step_control.step_number}' if step_control is not None else 'next step'
+        logging.warning(f'Control request applied to {step_str}: {request_line.strip()}')
+
+        return {'status': 'ok'}
+
+    def __save_event(self, step_control: Optional[StepControl], request: Dict):
+        event_time = time.time()
+        event = {
+            'time': event_time,
+            'step': step_control.step_number if step_control is not None else None,
+            'step_time': round(event_time - step_control.start_time, 3) if step_control is not None else None,
+        }
+        event.update(request)
+
+        with self.__lock:
+            with open(self.events_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(event) + '\n')
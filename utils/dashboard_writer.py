@@ -0,0 +1,288 @@
+import base64
+import html
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.downsampler import Downsampler
+from utils.prepared_series import PreparedSeries
+from utils.rate_analytics import RateAnalytics
+
+
+class DashboardWriter:
+    """
+    Class responsible for single-file interactive dashboard of test. plotly.js is included once and per second columns
+    are stored as base64 encoded Float64Array, so the file is several times smaller than an HTML file per graph.
+    Sheet, step, metric and files are selected on the client side.
+
+    Series are prepared and downsampled the same way as traces of PNG graphs. Time of a file at a step is stored once
+    for all metrics with the same points, downsampled metrics keep their own time. Target rates are stored as series
+    of blocks and drawn as dashed lines of their metrics.
+    """
+
+    DASHBOARD_NAME = 'dashboard.html'
+    ALL_STEPS = 'All Steps'
+
+    __TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<style>
+    body { background: #111111; color: #f2f5fa; font-family: sans-serif; margin: 0; }
+    #controls { display: flex; flex-wrap: wrap; gap: 16px; align-items: center; padding: 10px 16px; }
+    #controls label { font-size: 14px; }
+    select { background: #283442; color: #f2f5fa; border: none; padding: 4px; }
+    #files { display: flex; flex-wrap: wrap; gap: 10px; }
+    #graph { height: calc(100vh - 60px); }
+</style>
+<script>%(plotly_js)s</script>
+</head>
+<body>
+<div id="controls">
+    <label>Sheet <select id="sheet"></select></label>
+    <label>Step <select id="step"></select></label>
+    <label>Metric <select id="metric"></select></label>
+    <div id="files"></div>
+</div>
+<div id="graph"></div>
+<script>
+const DATA = %(data)s;
+const ALL_STEPS = %(all_steps)s;
+const decoded = {};
+
+function decode(key, value) {
+    if (!(key in decoded)) {
+        const bytes = Uint8Array.from(atob(value), c => c.charCodeAt(0));
+        decoded[key] = new Float64Array(bytes.buffer);
+    }
+    return decoded[key];
+}
+
+function getSeries(sheet, step, file, metric) {
+    const block = (DATA.sheets[sheet].blocks[step] || {})[file];
+    if (!block || !(metric in block.metrics)) {
+        return null;
+    }
+    const [timeNumber, values] = block.metrics[metric];
+    const key = [sheet, step, file].join('\u0000');
+    return {
+        x: decode(key + '\u0001' + timeNumber, block.times[timeNumber]),
+        y: decode(key + '\u0000' + metric, values)
+    };
+}
+
+function setOptions(select, values) {
+    const selected = select.value;
+    select.innerHTML = '';
+    for (const value of values) {
+        select.add(new Option(value, value));
+    }
+    if (values.includes(selected)) {
+        select.value = selected;
+    }
+}
+
+function getTrace(sheet, step, file, metric) {
+    // Downsampled series of all steps are saved as a separate step
+    if (step !== ALL_STEPS || ALL_STEPS in DATA.sheets[sheet].blocks) {
+        return getSeries(sheet, step, file, metric);
+    }
+
+    // Steps are placed one after another, every step is shifted by duration of the previous ones
+    const xs = [], ys = [];
+    let offset = 0, length = 0;
+    for (const stepName of DATA.sheets[sheet].steps) {
+        const series = getSeries(sheet, stepName, file, metric);
+        if (!series) {
+            continue;
+        }
+        const x = series.x;
+        xs.push(x.map(value => value + offset));
+        ys.push(series.y);
+        offset += x[x.length - 1] - x[0] + 1;
+        length += x.length;
+    }
+    if (!length) {
+        return null;
+    }
+
+    const x = new Float64Array(length), y = new Float64Array(length);
+    let position = 0;
+    for (let i = 0; i < xs.length; i++) {
+        x.set(xs[i], position);
+        y.set(ys[i], position);
+        position += xs[i].length;
+    }
+    return {x: x, y: y};
+}
+
+function render() {
+    const sheet = document.getElementById('sheet').value;
+    const step = document.getElementById('step').value;
+    const metric = document.getElementById('metric').value;
+    const traces = [];
+
+    for (const checkbox of document.querySelectorAll('#files input:checked')) {
+        const trace = getTrace(sheet, step, checkbox.value, metric);
+        if (trace) {
+            traces.push({x: trace.x, y: trace.y, mode: 'lines', name: checkbox.value, line: {width: 2}});
+        }
+        const target = metric in DATA.sheets[sheet].targets
+            ? getTrace(sheet, step, checkbox.value, DATA.sheets[sheet].targets[metric]) : null;
+        if (target) {
+            traces.push({x: target.x, y: target.y, mode: 'lines', name: checkbox.value + ' target',
+                         line: {width: 1, dash: 'dash'}});
+        }
+    }
+
+    const title = step === ALL_STEPS ? `${metric} over all steps (${sheet})` : `${metric} at ${step} (${sheet})`;
+    Plotly.react('graph', traces, {
+        title: title, xaxis: {title: 'Time'}, yaxis: {title: metric}, legend: {title: {text: 'Files'}},
+        template: DATA.template, hovermode: 'x unified'
+    }, {responsive: true});
+}
+
+function updateSheet() {
+    const sheet = DATA.sheets[document.getElementById('sheet').value];
+    setOptions(document.getElementById('step'), sheet.steps.concat([ALL_STEPS]));
+    setOptions(document.getElementById('metric'), sheet.metrics);
+
+    const checked = new Set(Array.from(document.querySelectorAll('#files input:checked'), input => input.value));
+    const isFirst = !document.querySelector('#files input');
+    const files = document.getElementById('files');
+    files.innerHTML = '';
+    for (const file of sheet.files) {
+        const label = document.createElement('label');
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.value = file;
+        checkbox.checked = isFirst || checked.has(file);
+        checkbox.addEventListener('change', render);
+        label.append(checkbox, ' ' + file);
+        files.append(label);
+    }
+    render();
+}
+
+setOptions(document.getElementById('sheet'), Object.keys(DATA.sheets));
+document.getElementById('sheet').addEventListener('change', updateSheet);
+document.getElementById('step').addEventListener('change', render);
+document.getElementById('metric').addEventListener('change', render);
+updateSheet();
+</script>
+</body>
+</html>
+'''
+
+    @staticmethod
+    def write(sheets: Dict[str, pd.DataFrame], folder_name: str, title: str, time_columns: List[str],
+              max_points: Optional[int] = None) -> str:
+        """
+        Save dashboard of per second sheets.
+
+        Args:
+            sheets (Dict[str, pd.DataFrame]): Wide sheets with (Step, File, metric) columns by name.
+            folder_name (str): Folder to save dashboard.
+            title (str): Title of the page.
+            time_columns (List[str]): Columns of x axis, not selectable as metrics.
+            max_points (Optional[int]): Max number of points of every trace, series of all steps are downsampled
+                separately, if it is set.
+
+        Returns:
+            str: Path of the dashboard.
+        """
+        import plotly.io as pio
+        from plotly.offline import get_plotlyjs
+
+        start_time = time.perf_counter()
+        os.makedirs(folder_name, exist_ok=True)
+        path = os.path.join(folder_name, DashboardWriter.DASHBOARD_NAME)
+
+        data = {
+            'sheets': {sheet_name: DashboardWriter.__get_sheet_data(df, time_columns, max_points)
+                       for sheet_name, df in sheets.items() if not df.empty},
+            'template': pio.templates['plotly_dark'].to_plotly_json(),
+        }
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(DashboardWriter.__TEMPLATE % {
+                'title': html.escape(title),
+                'plotly_js': get_plotlyjs(),
+                'all_steps': json.dumps(DashboardWriter.ALL_STEPS),
+                # Closing script tag in names of files would end the data script
+                'data': json.dumps(data).replace('</', '<\\/'),
+            })
+
+        logging.info(f'Dashboard is saved into {path} in {time.perf_counter() - start_time:.3f} sec.')
+
+        return path
+
+    @staticmethod
+    def __get_sheet_data(df: pd.DataFrame, time_columns: List[str], max_points: Optional[int]) -> Dict:
+        series = PreparedSeries(df, time_columns, RateAnalytics.TARGET_COLUMNS)
+        series_names = series.metrics + list(series.targets.values())
+        blocks = {step: {} for step in series.steps}
+
+        for step in series.steps:
+            for file in series.files:
+                block = DashboardWriter.__get_block(
+                    {metric: series.get(step, file, metric) for metric in series_names}, max_points)
+
+                if block is not None:
+                    blocks[step][file] = block
+
+        # Steps concatenated on the client side would have max_points per step
+        if max_points is not None:
+            blocks[DashboardWriter.ALL_STEPS] = {}
+
+            for file in series.files:
+                block = DashboardWriter.__get_block(
+                    {metric: series.get_all_steps(file, metric) for metric in series_names}, max_points)
+
+                if block is not None:
+                    blocks[DashboardWriter.ALL_STEPS][file] = block
+
+        return {'steps': series.steps, 'files': series.files, 'metrics': series.metrics, 'targets': series.targets,
+                'blocks': blocks}
+
+    @staticmethod
+    def __get_block(metric_series: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]],
+                    max_points: Optional[int]) -> Optional[Dict]:
+        """
+        Encode series of metrics of a file, equal time arrays are stored once.
+
+        Returns:
+            Optional[Dict]: Encoded time arrays and (number of time array, encoded values) of every metric,
+                None if no metric has data.
+        """
+        times = []
+        time_numbers = {}
+        metrics = {}
+
+        for metric, time_values in metric_series.items():
+            if time_values is None or not len(time_values[0]):
+                continue
+
+            time_values, values = Downsampler.downsample(*time_values, max_points)
+
+            encoded_time = DashboardWriter.__encode(time_values)
+            if encoded_time not in time_numbers:
+                time_numbers[encoded_time] = len(times)
+                times.append(encoded_time)
+
+            metrics[metric] = [time_numbers[encoded_time], DashboardWriter.__encode(values)]
+
+        if not metrics:
+            return None
+
+        return {'times': times, 'metrics': metrics}
+
+    @staticmethod
+    def __encode(values: np.ndarray) -> str:
+        return base64.b64encode(np.ascontiguousarray(values, dtype='<f8').tobytes()).decode('ascii')
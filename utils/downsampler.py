@@ -0,0 +1,101 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class Downsampler:
+    """
+    Class responsible for shape-preserving downsampling of graph traces by Largest-Triangle-Three-Buckets.
+
+    Points between the first and the last one are split into buckets, from every bucket the point forming
+    the largest triangle with neighbour buckets is kept, so spikes and dips stay in the graph. Classic LTTB takes
+    the point selected in the previous bucket as the first vertex, which makes buckets depend on each other.
+    Here the mean of the previous bucket is used instead, so all buckets are computed at once with numpy.
+    """
+
+    # Less points can not be split into buckets between the first and the last point
+    MIN_POINTS = 3
+
+    @staticmethod
+    def downsample(x: np.ndarray, y: np.ndarray, max_points: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get points of the trace kept by LTTB, the trace is not changed if max_points is not set.
+        """
+        if max_points is None:
+            return x, y
+
+        indices = Downsampler.get_lttb_indices(x, y, max_points)
+
+        return x[indices], y[indices]
+
+    @staticmethod
+    def get_lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+        """
+        Get indices of points to keep.
+
+        Args:
+            x (np.ndarray): Increasing x values.
+            y (np.ndarray): y values, NaN points are kept only if the whole bucket is NaN.
+            max_points (int): Max number of points to keep.
+
+        Returns:
+            np.ndarray: Sorted indices of kept points, all points if there are not more than max_points.
+        """
+        point_count = len(x)
+
+        if max_points < Downsampler.MIN_POINTS or point_count <= max_points:
+            return np.arange(point_count)
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+
+        bucket_count = max_points - 2
+        # Buckets of points 1..n-2, each bucket has at least one point
+        edges = np.linspace(1, point_count - 1, bucket_count + 1).astype(np.int64)
+        starts = edges[:-1]
+        sizes = np.diff(edges)
+
+        is_valid = ~np.isnan(y)
+        mean_x = Downsampler.__get_bucket_means(x, is_valid, edges)
+        mean_y = Downsampler.__get_bucket_means(np.where(is_valid, y, 0), is_valid, edges)
+
+        # The first and the last point are vertices of the first and the last bucket
+        first_x = np.concatenate([[x[0]], mean_x[:-1]])
+        first_y = np.concatenate([[y[0]], mean_y[:-1]])
+        third_x = np.concatenate([mean_x[1:], [x[-1]]])
+        third_y = np.concatenate([mean_y[1:], [y[-1]]])
+
+        bucket_numbers = np.repeat(np.arange(bucket_count), sizes)
+        point_x = x[1:point_count - 1]
+        point_y = y[1:point_count - 1]
+
+        first_x = first_x[bucket_numbers]
+        first_y = first_y[bucket_numbers]
+
+        with np.errstate(invalid='ignore'):
+            # Doubled area of triangle, the factor does not change the largest one
+            areas = np.abs((first_x - third_x[bucket_numbers]) * (point_y - first_y) -
+                           (first_x - point_x) * (third_y[bucket_numbers] - first_y))
+
+        areas = np.where(np.isnan(areas), -1, areas)
+        max_areas = np.maximum.reduceat(areas, starts - 1)
+
+        # The first point with the largest area of every bucket
+        is_largest = np.flatnonzero(areas == max_areas[bucket_numbers])
+        is_first = np.concatenate([[True], bucket_numbers[is_largest[1:]] != bucket_numbers[is_largest[:-1]]])
+
+        return np.concatenate([[0], is_largest[is_first] + 1, [point_count - 1]])
+
+    @staticmethod
+    def __get_bucket_means(values: np.ndarray, is_valid: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """
+        Mean of valid values of every bucket, NaN for bucket without valid values.
+        """
+        sums = np.concatenate([[0], np.cumsum(np.where(is_valid, values, 0))])
+        counts = np.concatenate([[0], np.cumsum(is_valid)])
+
+        bucket_sums = sums[edges[1:]] - sums[edges[:-1]]
+        bucket_counts = counts[edges[1:]] - counts[edges[:-1]]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return bucket_sums / bucket_counts
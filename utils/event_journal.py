@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class EventJournal:
+    """
+    Class responsible for append-only journal of lifecycle events of tcpreplay processes of a pcap file at a step.
+
+    Every event is a JSON object on a single line with "event", "mono" (time.monotonic, comparable between events
+    of the step), "time" (epoch) and "pid" of the process. Journal is saved next to the stats file as
+    events__step_N__file_num_M__<pcap>.jsonl.
+    """
+
+    # Process is started, held process waits for the start barrier before exec of tcpreplay
+    SPAWN = 'spawn'
+    # tcpreplay is executed
+    EXEC = 'exec'
+    # tcpreplay printed "Test start:", it is printed after the pcap is preloaded, before the first packet
+    PRELOAD_DONE = 'preload_done'
+    # The first "Actual:" line of the process
+    FIRST_STATS = 'first_stats'
+    # Measured rate is out of the threshold of the target rate
+    RATE_ANOMALY = 'rate_anomaly'
+    KILL = 'kill'
+    EXIT = 'exit'
+    # Time from kill of the process to the first line of the restarted one
+    RESTART_GAP = 'restart_gap'
+
+    KILL_RATE_ANOMALY = 'rate_anomaly'
+    KILL_RATE_CHANGE = 'rate_change'
+    KILL_TIME_OVER = 'time_over'
+
+    __STATS_PREFIX = 'stats__'
+    __EVENTS_PREFIX = 'events__'
+
+    def __init__(self, path: str):
+        """
+        Initialize the journal.
+
+        Args:
+            path (str): Path of the journal, see get_path.
+        """
+        self.path = path
+
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def get_path(stats_file: str) -> str:
+        """
+        Get path of the journal of the stats file.
+        """
+        folder, name = os.path.split(stats_file)
+        if name.startswith(EventJournal.__STATS_PREFIX):
+            name = name[len(EventJournal.__STATS_PREFIX):]
+
+        return os.path.join(folder, f'{EventJournal.__EVENTS_PREFIX}{os.path.splitext(name)[0]}.jsonl')
+
+    def add(self, event: str, pid: Optional[int], **values):
+        """
+        Append the event. File is opened for every event, there are several events per process only.
+        Failed write is logged and does not stop tcpreplay.
+
+        Args:
+            event (str): Type of the event, e.g. EventJournal.SPAWN.
+            pid (Optional[int]): Process ID of the process of the event.
+            values: JSON serializable values of the event.
+        """
+        record = {'event': event, 'mono': round(time.monotonic(), 6), 'time': round(time.time(), 6), 'pid': pid,
+                  **values}
+
+        with self.__lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                logging.warning(f'Failed to write event {event} into {self.path}: {e}')
+
+    @staticmethod
+    def read(path: str) -> List[Dict]:
+        """
+        Read events of the journal, broken line of interrupted write is skipped.
+        """
+        events = []
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+
+        return events
+
+    @staticmethod
+    def summarize(events: List[Dict]) -> Dict:
+        """
+        Summarize time lost to startup and restarts of processes.
+
+        Returns:
+            Dict: Counts of processes, restarts and anomalies, startup time from exec to "Test start:" of all
+                processes and of the first one, restart gaps and lost time, which is startup of the first process
+                and all restart gaps.
+        """
+        exec_times = {}
+        startup_times = []
+        first_stats_times = []
+        seen = set()
+
+        for event in events:
+            pid = event.get('pid')
+
+            if event['event'] == EventJournal.EXEC:
+                exec_times[pid] = event['mono']
+            elif event['event'] in (EventJournal.PRELOAD_DONE, EventJournal.FIRST_STATS) and pid in exec_times \
+                    and (event['event'], pid) not in seen:
+                seen.add((event['event'], pid))
+                times = startup_times if event['event'] == EventJournal.PRELOAD_DONE else first_stats_times
+                times.append(event['mono'] - exec_times[pid])
+
+        restart_gaps = [event['gap'] for event in events if event['event'] == EventJournal.RESTART_GAP]
+        kills = [event for event in events if event['event'] == EventJournal.KILL]
+        first_startup_time = startup_times[0] if startup_times else 0.0
+
+        return {
+            'Processes': len(exec_times),
+            'Restarts': sum(1 for event in kills if event.get('reason') != EventJournal.KILL_TIME_OVER),
+            'Rate Anomalies': sum(1 for event in events if event['event'] == EventJournal.RATE_ANOMALY),
+            'First Startup Time': round(first_startup_time, 3),
+            'Total Startup Time': round(sum(startup_times), 3),
+            'Max Startup Time': round(max(startup_times, default=0.0), 3),
+            'Max Time To First Stats': round(max(first_stats_times, default=0.0), 3),
+            'Total Restart Gap': round(sum(restart_gaps), 3),
+            'Max Restart Gap': round(max(restart_gaps, default=0.0), 3),
+            'Lost Time': round(first_startup_time + sum(restart_gaps), 3),
+            'Exit Codes': ', '.join(str(event.get('code')) for event in events if event['event'] == EventJournal.EXIT),
+        }
@@ -0,0 +1,177 @@
+import logging
+import os
+import signal
+import subprocess
+import threading
+from typing import List, Optional
+
+from models.config import BashScriptConfig
+
+
+class HookExecutor:
+    """
+    Class responsible for running bash scripts (hooks) around test steps.
+    """
+
+    def __init__(self, bash_scripts: List[BashScriptConfig], test_folder: str):
+        """
+        Initialize the executor.
+
+        Args:
+            bash_scripts (List[BashScriptConfig]): Configs of hooks.
+            test_folder (str): Folder of test, hook logs are saved into its "hooks" subfolder.
+        """
+        self.bash_scripts = bash_scripts
+        self.hooks_folder = os.path.join(test_folder, 'hooks')
+
+        self.__background_threads: List[HookThread] = []
+
+    def run_hooks(self, is_before: bool, step_number: int):
+        """
+        Run foreground hooks of before or after stage. Sequential hooks are run one by one in config order,
+        parallel hooks are run concurrently with them. Returns when all hooks are finished.
+        """
+        stage_name = 'before' if is_before else 'after'
+        hooks = [
+            bash_script
+            for bash_script in self.bash_scripts
+            if not bash_script.is_background and bash_script.is_before_stage == is_before
+        ]
+
+        parallel_threads = []
+        for hook_id, bash_script in enumerate(hooks):
+            if bash_script.is_parallel:
+                thread = self.__start_hook(bash_script, hook_id, stage_name, step_number)
+                if thread is not None:
+                    parallel_threads.append(thread)
+
+        for hook_id, bash_script in enumerate(hooks):
+            if not bash_script.is_parallel:
+                thread = self.__start_hook(bash_script, hook_id, stage_name, step_number)
+                if thread is not None:
+                    thread.join()
+
+        for thread in parallel_threads:
+            thread.join()
+
+    def start_background_hooks(self, step_number: int):
+        """
+        Start background hooks, which run in parallel with the step.
+        """
+        hooks = [bash_script for bash_script in self.bash_scripts if bash_script.is_background]
+
+        for hook_id, bash_script in enumerate(hooks):
+            thread = self.__start_hook(bash_script, hook_id, 'background', step_number)
+            if thread is not None:
+                self.__background_threads.append(thread)
+
+    def stop_background_hooks(self):
+        """
+        Stop background hooks, which are still running after the step.
+        """
+        for thread in self.__background_threads:
+            thread.stop()
+
+        for thread in self.__background_threads:
+            thread.join()
+
+        self.__background_threads = []
+
+    def __start_hook(self, bash_script: BashScriptConfig, hook_id: int, stage_name: str,
+                     step_number: int) -> Optional['HookThread']:
+        if bash_script.only_once and bash_script.run_count > 0:
+            return None
+
+        bash_script.run_count += 1
+        os.makedirs(self.hooks_folder, exist_ok=True)
+
+        log_name = f'step_{step_number}__{stage_name}__{hook_id}__{os.path.basename(bash_script.script)}'
+        thread = HookThread(
+            bash_script=bash_script,
+            stdout_file=os.path.join(self.hooks_folder, f'{log_name}.out.log'),
+            stderr_file=os.path.join(self.hooks_folder, f'{log_name}.err.log')
+        )
+        thread.start()
+
+        return thread
+
+
+class HookThread(threading.Thread):
+    """
+    Thread class for running a single hook. Output of the hook is streamed directly into log files.
+    Hook is started in its own session, so stop and timeout kill the hook with all processes started by it.
+    """
+
+    __STOP_TIMEOUT = 5
+
+    def __init__(self, bash_script: BashScriptConfig, stdout_file: str, stderr_file: str):
+        super().__init__(daemon=True)
+        self.bash_script = bash_script
+        self.stdout_file = stdout_file
+        self.stderr_file = stderr_file
+
+        self.__process: Optional[subprocess.Popen] = None
+        self.__started = threading.Event()
+        self.__is_stopped = False
+
+    def run(self):
+        """
+        Run the hook and wait for it with timeout.
+        """
+        logging.info(f'Run script: {self.bash_script.script}')
+
+        try:
+            with open(self.stdout_file, 'a') as stdout_file, open(self.stderr_file, 'a') as stderr_file:
+                self.__process = subprocess.Popen(self.bash_script.script, stdin=subprocess.DEVNULL,
+                                                  stdout=stdout_file, stderr=stderr_file, start_new_session=True)
+                self.__started.set()
+
+                try:
+                    return_code = self.__process.wait(self.bash_script.timeout)
+                except subprocess.TimeoutExpired:
+                    logging.warning(f'Script {self.bash_script.script} timed out after '
+                                    f'{self.bash_script.timeout} sec, killing it')
+                    self.__terminate()
+                    return_code = self.__process.returncode
+        except OSError as e:
+            logging.error(f'Failed to run script {self.bash_script.script}: {e}')
+            return
+        finally:
+            self.__started.set()
+
+        if self.__is_stopped:
+            logging.info(f'Background script {self.bash_script.script} stopped, output: {self.stdout_file}')
+        elif return_code != 0:
+            logging.warning(f'Script {self.bash_script.script} finished with code {return_code}, '
+                            f'output: {self.stdout_file}, errors: {self.stderr_file}')
+        else:
+            logging.info(f'Script {self.bash_script.script} finished, output: {self.stdout_file}')
+
+    def stop(self):
+        """
+        Stop the hook, if it is still running.
+        """
+        self.__started.wait()
+
+        if self.__process is not None and self.__process.poll() is None:
+            logging.info(f'Stopping background script: {self.bash_script.script}')
+            self.__is_stopped = True
+            self.__terminate()
+
+    def __terminate(self):
+        self.__kill_group(signal.SIGTERM)
+
+        try:
+            self.__process.wait(self.__STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.__kill_group(signal.SIGKILL)
+            self.__process.wait()
+
+    def __kill_group(self, sig: int):
+        """
+        Send the signal to process group of the hook, its ID is ID of the hook process started in new session.
+        """
+        try:
+            os.killpg(self.__process.pid, sig)
+        except ProcessLookupError:
+            pass
@@ -1,48 +1,136 @@
-import datetime
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import os.path
+import queue
+from typing import Optional
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler of records of this process. Only the message is merged with its args in the calling thread,
+    the record is formatted by handlers of the listener thread. Default prepare formats and copies the record
+    to send it to other processes.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+
+        return record
 
 
 class Logger:
-    __CURRENT_DATE = datetime.datetime.now().strftime('%Y-%m-%d')
+    """
+    Logging of the process through a queue. Root logger has only a QueueHandler, so a log call of runner threads only
+    puts the record into the queue. Records are formatted and written into console and files by one background thread
+    of QueueListener.
+
+    Global logs of log/ are rotated by size, logs of test folder are kept whole. Only the process which initialized
+    the logger owns the handlers. Pool processes send their records through a multiprocessing queue
+    to the second listener of the parent, so rotation of log files is done by one process.
+    """
+
     __FORMAT_STR = '[%(asctime)s] %(levelname)s | module: %(module)s | funcName: %(funcName)s | %(message)s'
     __DATEFORMAT = '%Y-%m-%d %H:%M:%S'
     __ENCODING = 'utf-8'
     __FORMATTER = logging.Formatter(__FORMAT_STR, __DATEFORMAT)
 
+    LOG_FOLDER = 'log'
+    # Max size of a global log file and number of rotated files kept, e.g. pcap_blaster_full.log.1
+    MAX_LOG_BYTES = 50 * 1024 * 1024
+    BACKUP_COUNT = 10
+
+    __queue_handler: Optional[RecordQueueHandler] = None
+    __listener: Optional[logging.handlers.QueueListener] = None
+    # Queue and listener of records sent by child processes
+    __process_queue: Optional[multiprocessing.Queue] = None
+    __process_listener: Optional[logging.handlers.QueueListener] = None
+    __pid: Optional[int] = None
+    __is_fork_hook_registered = False
+
     @staticmethod
     def init_logger():
         """
         Set up logging configuration.
         """
+        if Logger.__listener is not None and Logger.__pid == os.getpid():
+            return
+
+        os.makedirs(Logger.LOG_FOLDER, exist_ok=True)
+        error_log_path = os.path.join(Logger.LOG_FOLDER, 'pcap_blaster_errors.log')
+        log_path = os.path.join(Logger.LOG_FOLDER, 'pcap_blaster_full.log')
+
+        console_handler = logging.StreamHandler()
+        error_file_handler = logging.handlers.RotatingFileHandler(error_log_path, maxBytes=Logger.MAX_LOG_BYTES,
+                                                                  backupCount=Logger.BACKUP_COUNT,
+                                                                  encoding=Logger.__ENCODING)
+        full_file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=Logger.MAX_LOG_BYTES,
+                                                                 backupCount=Logger.BACKUP_COUNT,
+                                                                 encoding=Logger.__ENCODING)
+
+        error_file_handler.setLevel(logging.WARNING)
+        full_file_handler.setLevel(logging.INFO)
 
-        logging.basicConfig(
-            level=logging.INFO,
-            format=Logger.__FORMAT_STR,
-            datefmt=Logger.__DATEFORMAT,
-        )
+        for handler in (console_handler, error_file_handler, full_file_handler):
+            handler.setFormatter(Logger.__FORMATTER)
 
         logger = logging.getLogger()
+        Logger.__remove_queue_handlers(logger)
 
-        os.makedirs('log', exist_ok=True)
-        error_log_path = os.path.join('log', f'pcap_blaster_errors_{Logger.__CURRENT_DATE}.log')
-        log_path = os.path.join('log', f'pcap_blaster_full_{Logger.__CURRENT_DATE}.log')
+        handlers = (console_handler, error_file_handler, full_file_handler)
+        Logger.__queue_handler = RecordQueueHandler(queue.SimpleQueue())
+        Logger.__listener = logging.handlers.QueueListener(Logger.__queue_handler.queue, *handlers,
+                                                           respect_handler_level=True)
+        # Queue of spawn context can be passed to spawned processes and is inherited by forked ones
+        Logger.__process_queue = multiprocessing.get_context('spawn').Queue()
+        Logger.__process_listener = logging.handlers.QueueListener(Logger.__process_queue, *handlers,
+                                                                   respect_handler_level=True)
+        Logger.__pid = os.getpid()
 
-        error_file_handler = logging.FileHandler(error_log_path, encoding=Logger.__ENCODING)
-        full_file_handler = logging.FileHandler(log_path, encoding=Logger.__ENCODING)
+        logger.setLevel(logging.INFO)
+        logger.addHandler(Logger.__queue_handler)
 
-        error_file_handler.setLevel(logging.WARNING)
-        full_file_handler.setLevel(logging.INFO)
+        Logger.__listener.start()
+        Logger.__process_listener.start()
+        atexit.register(Logger.stop)
 
-        error_file_handler.setFormatter(Logger.__FORMATTER)
-        full_file_handler.setFormatter(Logger.__FORMATTER)
+        if not Logger.__is_fork_hook_registered:
+            os.register_at_fork(after_in_child=Logger.__on_fork)
+            Logger.__is_fork_hook_registered = True
+
+    @staticmethod
+    def init_child_logger(process_queue: multiprocessing.Queue):
+        """
+        Set up logging of a spawned child process, its records are written by the parent process.
 
-        logger.addHandler(error_file_handler)
-        logger.addHandler(full_file_handler)
+        Args:
+            process_queue (multiprocessing.Queue): Queue returned by get_process_queue of the parent process.
+        """
+        logger = logging.getLogger()
+        Logger.__remove_queue_handlers(logger)
+
+        logger.setLevel(logging.INFO)
+        logger.addHandler(logging.handlers.QueueHandler(process_queue))
+
+    @staticmethod
+    def get_process_queue() -> multiprocessing.Queue:
+        """
+        Get queue of records of child processes, it is passed to init_child_logger of a spawned process.
+        """
+        if Logger.__process_queue is None:
+            Logger.init_logger()
+
+        return Logger.__process_queue
 
     @staticmethod
     def append_logger(test_folder: str):
-        logger = logging.getLogger()
+        """
+        Add logs of the test folder to the listener.
+        """
+        if Logger.__listener is None:
+            Logger.init_logger()
 
         error_log_path = os.path.join(test_folder, f'pcap_blaster_errors.log')
         log_path = os.path.join(test_folder, f'pcap_blaster_full.log')
@@ -56,5 +144,43 @@ class Logger:
         error_file_handler.setFormatter(Logger.__FORMATTER)
         full_file_handler.setFormatter(Logger.__FORMATTER)
 
-        logger.addHandler(error_file_handler)
-        logger.addHandler(full_file_handler)
+        # Listener thread reads the tuple of handlers for every record, replaced tuple is taken by the next record
+        handlers = Logger.__listener.handlers + (error_file_handler, full_file_handler)
+        Logger.__listener.handlers = handlers
+        Logger.__process_listener.handlers = handlers
+
+    @staticmethod
+    def stop():
+        """
+        Write queued records and stop the listener threads, called at exit of the process.
+        """
+        if Logger.__listener is None or Logger.__pid != os.getpid():
+            return
+
+        Logger.__listener.stop()
+        Logger.__process_listener.stop()
+        Logger.__listener = None
+        Logger.__process_listener = None
+
+    @staticmethod
+    def __remove_queue_handlers(logger: logging.Logger):
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                logger.removeHandler(handler)
+
+    @staticmethod
+    def __on_fork():
+        """
+        Send records of forked pool process to the listener of the parent process,
+        the listener threads and handlers stay owned by the parent.
+        """
+        if Logger.__listener is None:
+            return
+
+        logger = logging.getLogger()
+        Logger.__remove_queue_handlers(logger)
+        logger.addHandler(logging.handlers.QueueHandler(Logger.__process_queue))
+
+        Logger.__queue_handler = None
+        Logger.__listener = None
+        Logger.__process_listener = None
@@ -0,0 +1,217 @@
+import logging
+import re
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional, Tuple, List
+
+from models.config import MetricsConfig
+
+
+class PcapMetrics:
+    def __init__(self, pcap_id: int, file: str):
+        self.pcap_id = pcap_id
+        self.file = file
+        self.target_rate: float = 0.0
+        self.pps: float = 0.0
+        self.mbps: float = 0.0
+        self.restarts: int = 0
+
+
+class MetricsExporter:
+    """
+    Class responsible for exposing live metrics of the test as Prometheus text endpoint and StatsD gauges.
+    """
+
+    __PREFIX = 'pcapblaster'
+    __STATSD_NAME_PATTERN = re.compile(r'[^A-Za-z0-9_-]')
+
+    def __init__(self, metrics_config: MetricsConfig, is_pps: bool):
+        """
+        Initialize the exporter.
+
+        Args:
+            metrics_config (MetricsConfig): Config of metrics exporters.
+            is_pps (bool): Is target rate of the test in PPS or MBPS.
+        """
+        self.metrics_config = metrics_config
+        self.target_unit = 'pps' if is_pps else 'mbps'
+
+        self.__lock = threading.Lock()
+        self.__pcaps: Dict[int, PcapMetrics] = {}
+        self.__step_number: int = 0
+        self.__step_end_time: Optional[float] = None
+
+        self.__http_server: Optional[ThreadingHTTPServer] = None
+        self.__stop_event = threading.Event()
+        self.__threads: List[threading.Thread] = []
+
+    def start(self):
+        if self.metrics_config.prometheus_port is not None:
+            exporter = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+
+                    body = exporter.render_prometheus().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self.__http_server = ThreadingHTTPServer(
+                (self.metrics_config.prometheus_host, self.metrics_config.prometheus_port), Handler)
+            self.__start_thread(self.__http_server.serve_forever)
+            logging.info(f'Prometheus metrics are exposed on '
+                         f'http://{self.metrics_config.prometheus_host}:{self.metrics_config.prometheus_port}/metrics')
+
+        if self.metrics_config.statsd_host is not None:
+            self.__start_thread(self.__push_statsd)
+            logging.info(f'StatsD metrics are pushed to '
+                         f'{self.metrics_config.statsd_host}:{self.metrics_config.statsd_port}')
+
+    def stop(self):
+        self.__stop_event.set()
+
+        if self.__http_server is not None:
+            self.__http_server.shutdown()
+            self.__http_server.server_close()
+
+        for thread in self.__threads:
+            thread.join()
+
+    def set_step(self, step_number: int, duration: int):
+        """
+        Set current step and its planned duration. Delivered rates of the previous step are reset.
+        """
+        with self.__lock:
+            self.__step_number = step_number
+            self.__step_end_time = time.time() + duration
+
+            for pcap_metrics in self.__pcaps.values():
+                pcap_metrics.pps = 0.0
+                pcap_metrics.mbps = 0.0
+
+    def set_target(self, pcap_id: int, file: str, target_rate: float):
+        with self.__lock:
+            self.__get_pcap(pcap_id, file).target_rate = target_rate
+
+    def update_rate(self, pcap_id: int, file: str, mbps: float, pps: float):
+        with self.__lock:
+            pcap_metrics = self.__get_pcap(pcap_id, file)
+            pcap_metrics.mbps = mbps
+            pcap_metrics.pps = pps
+
+    def add_restart(self, pcap_id: int, file: str):
+        with self.__lock:
+            self.__get_pcap(pcap_id, file).restarts += 1
+
+    def render_prometheus(self) -> str:
+        """
+        Render metrics in Prometheus text exposition format.
+        """
+        lines = []
+        prefix = self.__PREFIX
+
+        for name, metric_type, help_str, samples in self.__collect():
+            lines.append(f'# HELP {prefix}_{name} {help_str}')
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+
+            for labels, value in samples:
+                labels_str = ','.join(f'{key}="{self.__escape_label(str(label))}"' for key, label in labels)
+                labels_str = '{' + labels_str + '}' if labels_str else ''
+                lines.append(f'{prefix}_{name}{labels_str} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def __collect(self) -> List[Tuple[str, str, str, List[Tuple[Tuple, float]]]]:
+        with self.__lock:
+            pcaps = sorted(self.__pcaps.values(), key=lambda pcap_metrics: pcap_metrics.pcap_id)
+            step_number = self.__step_number
+            step_end_time = self.__step_end_time
+
+        remaining_time = max(0.0, step_end_time - time.time()) if step_end_time is not None else 0.0
+        unit = (('unit', self.target_unit),)
+
+        def pcap_labels(pcap_metrics: PcapMetrics) -> Tuple:
+            return ('file_num', pcap_metrics.pcap_id), ('file', pcap_metrics.file)
+
+        def delivered(pcap_metrics: PcapMetrics) -> float:
+            return pcap_metrics.pps if self.target_unit == 'pps' else pcap_metrics.mbps
+
+        total_target = sum(pcap_metrics.target_rate for pcap_metrics in pcaps)
+        total_delivered = sum(delivered(pcap_metrics) for pcap_metrics in pcaps)
+
+        return [
+            ('target_rate', 'gauge', 'Target rate of tcpreplay process.',
+             [(pcap_labels(p) + unit, p.target_rate) for p in pcaps]),
+            ('delivered_pps', 'gauge', 'Delivered packets per second.',
+             [(pcap_labels(p), p.pps) for p in pcaps]),
+            ('delivered_mbps', 'gauge', 'Delivered megabits per second.',
+             [(pcap_labels(p), p.mbps) for p in pcaps]),
+            ('delivered_ratio', 'gauge', 'Delivered to target rate ratio.',
+             [(pcap_labels(p), delivered(p) / p.target_rate if p.target_rate else 0.0) for p in pcaps]),
+            ('restarts_total', 'counter', 'Restarts of tcpreplay process by speed check.',
+             [(pcap_labels(p), p.restarts) for p in pcaps]),
+            ('target_rate_sum', 'gauge', 'Target rate of all tcpreplay processes.', [(unit, total_target)]),
+            ('delivered_pps_sum', 'gauge', 'Delivered packets per second of all tcpreplay processes.',
+             [((), sum(p.pps for p in pcaps))]),
+            ('delivered_mbps_sum', 'gauge', 'Delivered megabits per second of all tcpreplay processes.',
+             [((), sum(p.mbps for p in pcaps))]),
+            ('delivered_ratio_sum', 'gauge', 'Delivered to target rate ratio of all tcpreplay processes.',
+             [((), total_delivered / total_target if total_target else 0.0)]),
+            ('current_step', 'gauge', 'Number of current step.', [((), step_number)]),
+            ('step_remaining_seconds', 'gauge', 'Remaining time of current step.', [((), remaining_time)]),
+        ]
+
+    def __push_statsd(self):
+        address = (self.metrics_config.statsd_host, self.metrics_config.statsd_port)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            while not self.__stop_event.wait(self.metrics_config.statsd_interval):
+                packet = '\n'.join(self.__render_statsd()).encode('utf-8')
+
+                try:
+                    sock.sendto(packet, address)
+                except OSError as e:
+                    logging.warning(f'Failed to push StatsD metrics: {e}')
+
+    def __render_statsd(self) -> List[str]:
+        lines = []
+
+        for name, _, _, samples in self.__collect():
+            for labels, value in samples:
+                label_values = dict(labels)
+                path = [self.metrics_config.statsd_prefix]
+
+                if 'file_num' in label_values:
+                    file_name = self.__STATSD_NAME_PATTERN.sub('_', str(label_values['file']))
+                    path.append(f'file_{label_values["file_num"]}_{file_name}')
+
+                path.append(name)
+                lines.append(f'{".".join(path)}:{value}|g')
+
+        return lines
+
+    def __get_pcap(self, pcap_id: int, file: str) -> PcapMetrics:
+        if pcap_id not in self.__pcaps:
+            self.__pcaps[pcap_id] = PcapMetrics(pcap_id, file)
+
+        return self.__pcaps[pcap_id]
+
+    def __start_thread(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self.__threads.append(thread)
+
+    @staticmethod
+    def __escape_label(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
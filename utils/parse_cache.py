@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class ParseCache:
+    """
+    Class responsible for columnar cache of parsed stats files and combined report sheets inside the test folder.
+
+    Every entry is a .npz file with typed arrays and JSON metadata. Entry of a stats file is valid while size and
+    modification time of the file are the same, entry of sheets is valid while all stats files of the sheets
+    and report params are the same.
+    """
+
+    CACHE_FOLDER = '.cache'
+    # Increased, when format of cached data is changed
+    VERSION = 4
+
+    __FRAMES_PREFIX = 'sheets__'
+
+    def __init__(self, test_folder: str):
+        """
+        Initialize the cache.
+
+        Args:
+            test_folder (str): Folder of test, cache is saved into its ".cache" subfolder.
+        """
+        self.test_folder = test_folder
+        self.cache_folder = os.path.join(test_folder, self.CACHE_FOLDER)
+
+    @staticmethod
+    def get_file_signature(file: str) -> Dict:
+        stat = os.stat(file)
+
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def get_stats(self, stats_file: str) -> Optional[Dict]:
+        """
+        Get cached stats of the stats file.
+
+        Returns:
+            Optional[Dict]: Arrays and values of stats or None, if there is no valid cache of the file.
+        """
+        entry = self.__load(self.__get_stats_path(stats_file), self.get_file_signature(stats_file))
+        if entry is None:
+            return None
+
+        arrays, meta = entry
+
+        return {**meta['values'], **arrays}
+
+    def put_stats(self, stats_file: str, stats: Dict):
+        """
+        Save stats of the stats file.
+
+        Args:
+            stats_file (str): Path to the stats file.
+            stats (Dict): Arrays and JSON serializable values of stats.
+        """
+        arrays = {name: value for name, value in stats.items() if isinstance(value, np.ndarray)}
+        values = {name: value for name, value in stats.items() if not isinstance(value, np.ndarray)}
+
+        self.__save(self.__get_stats_path(stats_file), arrays,
+                    {'signature': self.get_file_signature(stats_file), 'values': values})
+
+    def get_frames(self, name: str, signature: Dict) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Get cached sheets of report.
+
+        Args:
+            name (str): Name of cache entry, e.g. "combined" for sheets of all steps.
+            signature (Dict): Stats files and params of the sheets.
+        """
+        entry = self.__load(self.__get_frames_path(name), signature)
+        if entry is None:
+            return None
+
+        arrays, meta = entry
+
+        return {frame_name: self.__create_dataframe(frame_name, arrays, frame_meta)
+                for frame_name, frame_meta in meta['frames'].items()}
+
+    def put_frames(self, name: str, signature: Dict, frames: Dict[str, pd.DataFrame]):
+        arrays = {}
+        frames_meta = {}
+
+        for frame_name, df in frames.items():
+            frame_arrays, frames_meta[frame_name] = self.__split_dataframe(frame_name, df)
+            arrays.update(frame_arrays)
+
+        self.__save(self.__get_frames_path(name), arrays, {'signature': signature, 'frames': frames_meta})
+
+    def __get_stats_path(self, stats_file: str) -> str:
+        # Stats files of agents are in subfolders of the test folder
+        relative_path = os.path.relpath(os.path.abspath(stats_file), os.path.abspath(self.test_folder))
+
+        return os.path.join(self.cache_folder, relative_path.replace(os.sep, '__') + '.npz')
+
+    def __get_frames_path(self, name: str) -> str:
+        return os.path.join(self.cache_folder, f'{self.__FRAMES_PREFIX}{name}.npz')
+
+    def __load(self, path: str, signature: Dict) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = json.loads(str(npz['__meta__']))
+
+                if meta['version'] != self.VERSION or meta['signature'] != signature:
+                    return None
+
+                arrays = {name: npz[name] for name in npz.files if name != '__meta__'}
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f'Failed to read cache {path}: {e}')
+            return None
+
+        return arrays, meta
+
+    def __save(self, path: str, arrays: Dict[str, np.ndarray], meta: Dict):
+        meta['version'] = self.VERSION
+        temp_path = f'{path}.tmp'
+
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+
+            with open(temp_path, 'wb') as f:
+                np.savez(f, __meta__=np.array(json.dumps(meta)), **arrays)
+
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f'Failed to save cache {path}: {e}')
+
+    @staticmethod
+    def __split_dataframe(name: str, df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], Dict]:
+        arrays = {f'{name}__column_{i}': df.iloc[:, i].to_numpy() for i in range(len(df.columns))}
+
+        for level in range(df.index.nlevels):
+            arrays[f'{name}__index_{level}'] = ParseCache.__to_array(df.index.get_level_values(level))
+
+        meta = {
+            'columns': [list(column) if isinstance(column, tuple) else column for column in df.columns],
+            'column_names': list(df.columns.names),
+            'index_names': list(df.index.names),
+            'is_range_index': isinstance(df.index, pd.RangeIndex),
+        }
+
+        return arrays, meta
+
+    @staticmethod
+    def __create_dataframe(name: str, arrays: Dict[str, np.ndarray], meta: Dict) -> pd.DataFrame:
+        columns: List = meta['columns']
+
+        if meta['is_range_index']:
+            index = pd.RangeIndex(len(arrays[f'{name}__index_0']))
+        elif len(meta['index_names']) > 1:
+            index = pd.MultiIndex.from_arrays(
+                [arrays[f'{name}__index_{level}'] for level in range(len(meta['index_names']))],
+                names=meta['index_names'])
+        else:
+            index = pd.Index(arrays[f'{name}__index_0'], name=meta['index_names'][0])
+
+        if len(meta['column_names']) > 1:
+            column_index = pd.MultiIndex.from_tuples([tuple(column) for column in columns],
+                                                     names=meta['column_names'])
+        else:
+            column_index = pd.Index(columns, name=meta['column_names'][0])
+
+        df = pd.DataFrame({i: arrays[f'{name}__column_{i}'] for i in range(len(columns))}, index=index)
+        df.columns = column_index
+
+        return df
+
+    @staticmethod
+    def __to_array(values: pd.Index) -> np.ndarray:
+        # Cache is read without pickle, so strings are saved as unicode arrays
+        if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            return np.asarray(values, dtype=str)
+
+        return values.to_numpy()
@@ -0,0 +1,269 @@
+import datetime
+import json
+import logging
+import os
+import re
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from typing import Dict, List, Optional
+
+
+class PhaseProfiler:
+    """
+    Class responsible for wall time, CPU time and peak RSS of phases of test, saved into profile.json
+    of the test folder. Phases matching the dump pattern are also profiled by cProfile and tracemalloc.
+
+    CPU time is time of all threads of the process, children CPU time is time of finished child processes,
+    e.g. tcpreplay of step or pool processes of report. Peak RSS is the high-water mark of the process at the end
+    of the phase, its growth during the phase shows memory taken by the phase.
+    Phases of pool processes are measured there and returned to the profiler of the main process.
+
+    cProfile of a dumped phase profiles the thread of the phase and threads started during the phase, e.g. the main
+    thread only joins step thread of "Step N" phase, its tcpreplay threads are profiled by their own profilers.
+    """
+
+    PROFILE_FILE_NAME = 'profile.json'
+    # Lines of the largest allocations saved from tracemalloc snapshot
+    TRACEMALLOC_TOP = 30
+
+    __is_enabled = False
+    __dump_pattern: Optional[str] = None
+    __test_folder: Optional[str] = None
+    __start_time = 0.0
+    __started_at: Optional[str] = None
+    __phases: List[Dict] = []
+    # Dumps of phases finished before the test folder is known
+    __pending_dumps: List[Dict] = []
+    __dump_count = 0
+    __is_dumping = False
+    __lock = threading.Lock()
+
+    @staticmethod
+    def enable(dump_pattern: Optional[str] = None, test_folder: Optional[str] = None,
+               start_time: Optional[float] = None):
+        """
+        Start profiling of phases.
+
+        Args:
+            dump_pattern (Optional[str]): Shell pattern of names of phases to dump by cProfile and tracemalloc.
+            test_folder (Optional[str]): Folder to save profile and dumps, see set_test_folder.
+            start_time (Optional[float]): perf_counter of start of the profile, now by default. perf_counter is
+                monotonic clock of the system, so pool processes count phases from start of the main process.
+        """
+        PhaseProfiler.__is_enabled = True
+        PhaseProfiler.__dump_pattern = dump_pattern
+        PhaseProfiler.__test_folder = test_folder
+        PhaseProfiler.__start_time = time.perf_counter() if start_time is None else start_time
+        PhaseProfiler.__started_at = datetime.datetime.now().isoformat(timespec='seconds')
+        # Forked pool process inherits phases of the main process, they are not phases of its tasks
+        PhaseProfiler.__phases = []
+        PhaseProfiler.__pending_dumps = []
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return PhaseProfiler.__is_enabled
+
+    @staticmethod
+    def get_settings() -> Dict:
+        """
+        Get settings to enable the profiler in a pool process.
+        """
+        return {'dump_pattern': PhaseProfiler.__dump_pattern, 'test_folder': PhaseProfiler.__test_folder,
+                'start_time': PhaseProfiler.__start_time}
+
+    @staticmethod
+    def set_test_folder(test_folder: str):
+        """
+        Set folder to save profile and dumps, it is known only after the config is parsed.
+        """
+        with PhaseProfiler.__lock:
+            PhaseProfiler.__test_folder = test_folder
+            pending_dumps = PhaseProfiler.__pending_dumps
+            PhaseProfiler.__pending_dumps = []
+
+        for dump in pending_dumps:
+            PhaseProfiler.__save_dump(dump)
+
+    @staticmethod
+    @contextmanager
+    def phase(name: str):
+        """
+        Measure the phase of code inside of the context, nothing is measured if the profiler is not enabled.
+
+        Args:
+            name (str): Name of the phase, e.g. "Step 1".
+        """
+        if not PhaseProfiler.__is_enabled:
+            yield
+            return
+
+        with PhaseProfiler.__lock:
+            # cProfile and tracemalloc of nested or parallel phases would measure each other
+            is_dumped = PhaseProfiler.__dump_pattern is not None and not PhaseProfiler.__is_dumping \
+                and fnmatch(name, PhaseProfiler.__dump_pattern)
+            if is_dumped:
+                PhaseProfiler.__is_dumping = True
+
+        profiler = None
+        thread_profilers = []
+        if is_dumped:
+            import cProfile
+            import tracemalloc
+
+            tracemalloc.start()
+            profiler = cProfile.Profile()
+            threading.setprofile(PhaseProfiler.__get_thread_profile_hook(thread_profilers))
+            profiler.enable()
+
+        start_usage = resource.getrusage(resource.RUSAGE_SELF)
+        start_children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start_time = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter()
+            end_usage = resource.getrusage(resource.RUSAGE_SELF)
+            end_children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+            phase = {
+                'name': name,
+                'pid': os.getpid(),
+                'start': round(start_time - PhaseProfiler.__start_time, 6),
+                'wall_time': round(end_time - start_time, 6),
+                'cpu_time': round(PhaseProfiler.__get_cpu_time(end_usage) -
+                                  PhaseProfiler.__get_cpu_time(start_usage), 6),
+                'children_cpu_time': round(PhaseProfiler.__get_cpu_time(end_children_usage) -
+                                           PhaseProfiler.__get_cpu_time(start_children_usage), 6),
+                # ru_maxrss is in KB on Linux
+                'max_rss_mb': round(end_usage.ru_maxrss / 1024, 1),
+                'max_rss_growth_mb': round((end_usage.ru_maxrss - start_usage.ru_maxrss) / 1024, 1),
+                'children_max_rss_mb': round(end_children_usage.ru_maxrss / 1024, 1),
+            }
+
+            if profiler is not None:
+                import pstats
+
+                profiler.disable()
+                threading.setprofile(None)
+
+                stats = pstats.Stats(profiler)
+                for thread_profiler in list(thread_profilers):
+                    stats.add(thread_profiler)
+
+                snapshot = tracemalloc.take_snapshot()
+                phase['tracemalloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+                tracemalloc.stop()
+
+                PhaseProfiler.__add_dump({'name': name, 'stats': stats, 'snapshot': snapshot})
+
+            with PhaseProfiler.__lock:
+                PhaseProfiler.__phases.append(phase)
+
+                if is_dumped:
+                    PhaseProfiler.__is_dumping = False
+
+    @staticmethod
+    def pop_phases() -> List[Dict]:
+        """
+        Get measured phases and forget them, used by pool processes to return phases of the task.
+        """
+        with PhaseProfiler.__lock:
+            phases = PhaseProfiler.__phases
+            PhaseProfiler.__phases = []
+
+        return phases
+
+    @staticmethod
+    def add_phases(phases: List[Dict]):
+        """
+        Add phases measured by a pool process.
+        """
+        with PhaseProfiler.__lock:
+            PhaseProfiler.__phases.extend(phases)
+
+    @staticmethod
+    def save():
+        """
+        Save measured phases into profile.json of the test folder.
+        """
+        if not PhaseProfiler.__is_enabled or PhaseProfiler.__test_folder is None:
+            return
+
+        path = os.path.join(PhaseProfiler.__test_folder, PhaseProfiler.PROFILE_FILE_NAME)
+
+        with PhaseProfiler.__lock:
+            profile = {
+                'started_at': PhaseProfiler.__started_at,
+                'pid': os.getpid(),
+                'wall_time': round(time.perf_counter() - PhaseProfiler.__start_time, 6),
+                'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                'dump_pattern': PhaseProfiler.__dump_pattern,
+                'phases': sorted(PhaseProfiler.__phases, key=lambda phase: phase['start']),
+            }
+
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, indent=2)
+        except OSError as e:
+            logging.error(f'Failed to save profile into {path}: {e}')
+            return
+
+        logging.info(f'Profile of {len(profile["phases"])} phases is saved into {path}')
+
+    @staticmethod
+    def __get_cpu_time(usage) -> float:
+        return usage.ru_utime + usage.ru_stime
+
+    @staticmethod
+    def __get_thread_profile_hook(thread_profilers: List):
+        """
+        Get hook of threading.setprofile, which starts own cProfile profiler of every new thread.
+        """
+        import cProfile
+
+        def hook(frame, event, arg):
+            # Called by the first event of the thread only, enabled profiler replaces the hook in this thread
+            thread_profiler = cProfile.Profile()
+            thread_profilers.append(thread_profiler)
+            thread_profiler.enable()
+
+        return hook
+
+    @staticmethod
+    def __add_dump(dump: Dict):
+        with PhaseProfiler.__lock:
+            PhaseProfiler.__dump_count += 1
+            dump['number'] = PhaseProfiler.__dump_count
+
+            if PhaseProfiler.__test_folder is None:
+                PhaseProfiler.__pending_dumps.append(dump)
+                return
+
+        PhaseProfiler.__save_dump(dump)
+
+    @staticmethod
+    def __save_dump(dump: Dict):
+        """
+        Save cProfile stats of all profiled threads, readable by pstats or snakeviz, and the largest allocations
+        of tracemalloc.
+        """
+        # Process ID keeps names of dumps of pool processes unique
+        name = f'profile__{re.sub(r"[^A-Za-z0-9_.-]+", "_", dump["name"])}__{os.getpid()}_{dump["number"]}'
+        stats_path = os.path.join(PhaseProfiler.__test_folder, f'{name}.prof')
+        memory_path = os.path.join(PhaseProfiler.__test_folder, f'{name}.memory.txt')
+
+        try:
+            dump['stats'].dump_stats(stats_path)
+
+            with open(memory_path, 'w', encoding='utf-8') as f:
+                for statistic in dump['snapshot'].statistics('lineno')[:PhaseProfiler.TRACEMALLOC_TOP]:
+                    f.write(f'{statistic}\n')
+        except OSError as e:
+            logging.error(f'Failed to save dumps of phase {dump["name"]}: {e}')
+            return
+
+        logging.info(f'Dumps of phase {dump["name"]} are saved into {stats_path} and {memory_path}')
@@ -0,0 +1,178 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class PngTrace:
+    def __init__(self, name: str, x: np.ndarray, y: np.ndarray, mode: str = 'lines', width: float = 2,
+                 dash: Optional[str] = None, symbol: Optional[str] = None, size: float = 6):
+        """
+        Trace of PNG figure with the same options as plotly Scatter.
+
+        Args:
+            mode (str): 'lines', 'markers' or 'lines+markers'.
+            dash (Optional[str]): 'dash' or 'dot' line.
+            symbol (Optional[str]): 'x' or 'star' marker, circle by default.
+        """
+        self.name = name
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self.mode = mode
+        self.width = width
+        self.dash = dash
+        self.symbol = symbol
+        self.size = size
+
+
+class PngFigure:
+    def __init__(self, path: str, title: str, x_title: str, y_title: str, traces: List[PngTrace],
+                 legend_title: Optional[str] = None):
+        self.path = path
+        self.title = title
+        self.x_title = x_title
+        self.y_title = y_title
+        self.traces = traces
+        self.legend_title = legend_title
+
+
+def render_png_batch(figures: List[PngFigure]):
+    """
+    Render batch of figures in one process, the same matplotlib figure is reused for all of them.
+    """
+    PngRenderer.render_batch(figures)
+
+
+class PngRenderer:
+    """
+    Class responsible for PNG export of graphs with matplotlib Agg backend. Figures are rendered in batches
+    by several processes instead of a kaleido browser call per figure.
+    """
+
+    WIDTH = 1920
+    HEIGHT = 1080
+    DPI = 100
+
+    # Colors of plotly_dark template
+    __BACKGROUND_COLOR = '#111111'
+    __GRID_COLOR = '#283442'
+    __TEXT_COLOR = '#f2f5fa'
+    __COLORS = ['#636efa', '#EF553B', '#00cc96', '#ab63fa', '#FFA15A', '#19d3f3', '#FF6692', '#B6E880', '#FF97FF',
+                '#FECB52']
+    __DASHES = {None: '-', 'dash': '--', 'dot': ':'}
+    __SYMBOLS = {None: 'o', 'x': 'x', 'star': '*'}
+
+    # Every process gets several batches, so a batch of large figures does not hold the others
+    __BATCHES_PER_WORKER = 4
+    # Start of a process with import of matplotlib takes as long as rendering of one or two figures,
+    # so every process must render at least this number of figures, fewer figures are rendered in this process
+    MIN_FIGURES_PER_WORKER = 4
+
+    @staticmethod
+    def render(figures: List[PngFigure], workers: Optional[int] = None):
+        """
+        Render figures into their PNG files.
+
+        Args:
+            figures (List[PngFigure]): Figures to render.
+            workers (Optional[int]): Max number of processes, number of CPUs by default.
+        """
+        if not figures:
+            return
+
+        start_time = time.perf_counter()
+        workers = max(1, min(workers or os.cpu_count() or 1, len(figures) // PngRenderer.MIN_FIGURES_PER_WORKER))
+
+        if workers > 1:
+            batch_count = min(workers * PngRenderer.__BATCHES_PER_WORKER, len(figures))
+            batches = [figures[i::batch_count] for i in range(batch_count)]
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(render_png_batch, batches))
+        else:
+            PngRenderer.render_batch(figures)
+
+        logging.info(f'{len(figures)} PNG graphs rendered by {workers} processes '
+                     f'in {time.perf_counter() - start_time:.3f} sec.')
+
+    @staticmethod
+    def render_batch(figures: List[PngFigure]):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from PIL import Image
+
+        fig = Figure(figsize=(PngRenderer.WIDTH / PngRenderer.DPI, PngRenderer.HEIGHT / PngRenderer.DPI),
+                     dpi=PngRenderer.DPI, facecolor=PngRenderer.__BACKGROUND_COLOR)
+        canvas = FigureCanvasAgg(fig)
+        # Axes with ticks are created once and only lines are replaced, creation of axes is slower than drawing
+        ax = PngRenderer.__create_axes(fig)
+
+        for png_figure in figures:
+            PngRenderer.__draw(ax, png_figure)
+            canvas.draw()
+
+            # Opaque RGB with fast zlib level, savefig draws the figure again and encodes alpha channel
+            image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+            image.convert('RGB').save(png_figure.path, compress_level=1)
+
+    @staticmethod
+    def __create_axes(fig):
+        text_color = PngRenderer.__TEXT_COLOR
+        ax = fig.add_subplot()
+
+        ax.set_facecolor(PngRenderer.__BACKGROUND_COLOR)
+        ax.grid(True, color=PngRenderer.__GRID_COLOR)
+        ax.set_axisbelow(True)
+
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+
+        ax.tick_params(colors=text_color, labelsize=12)
+        # Fixed margins with place for legend, tight layout measures every text of figure
+        fig.subplots_adjust(left=0.06, right=0.84, top=0.93, bottom=0.07)
+
+        return ax
+
+    @staticmethod
+    def __draw(ax, png_figure: PngFigure):
+        text_color = PngRenderer.__TEXT_COLOR
+
+        for line in list(ax.lines):
+            line.remove()
+
+        if ax.get_legend() is not None:
+            ax.get_legend().remove()
+
+        ax.relim()
+        ax.set_title(png_figure.title, color=text_color, fontsize=18, loc='left')
+        ax.set_xlabel(png_figure.x_title, color=text_color, fontsize=14)
+        ax.set_ylabel(png_figure.y_title, color=text_color, fontsize=14)
+
+        for i, trace in enumerate(png_figure.traces):
+            ax.plot(trace.x, trace.y, **PngRenderer.__get_style(trace, i))
+
+        ax.autoscale_view()
+
+        if png_figure.traces:
+            legend = ax.legend(title=png_figure.legend_title, loc='upper left', bbox_to_anchor=(1.01, 1),
+                               frameon=False, labelcolor=text_color, fontsize=12)
+            if legend.get_title() is not None:
+                legend.get_title().set_color(text_color)
+
+    @staticmethod
+    def __get_style(trace: PngTrace, number: int) -> Dict:
+        style = {
+            'label': trace.name,
+            'color': PngRenderer.__COLORS[number % len(PngRenderer.__COLORS)],
+            'linewidth': trace.width,
+            'linestyle': PngRenderer.__DASHES.get(trace.dash, '-') if 'lines' in trace.mode else 'none',
+        }
+
+        if 'markers' in trace.mode:
+            style['marker'] = PngRenderer.__SYMBOLS.get(trace.symbol, 'o')
+            style['markersize'] = trace.size
+
+        return style
@@ -0,0 +1,113 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class PreparedSeries:
+    """
+    Clean (Time, metric) arrays of every step and file of a wide sheet with (Step, File, metric) columns.
+
+    Every column is taken from the sheet once. Rows without time or value are dropped and only the first row
+    of every second is kept. Series of all steps are placed one after another by precomputed cumulative offsets.
+
+    Target columns are prepared as series of their metrics, e.g. target line of PPS graph, and are not metrics.
+    """
+
+    def __init__(self, df: pd.DataFrame, time_columns: List[str], target_columns: Optional[Dict[str, str]] = None):
+        """
+        Initialize the series.
+
+        Args:
+            df (pd.DataFrame): Wide sheet with (Step, File, metric) columns.
+            time_columns (List[str]): Columns of x axis, not prepared as metrics.
+            target_columns (Optional[Dict[str, str]]): Target column of metric by metric name.
+        """
+        target_columns = target_columns or {}
+        sheet_metrics = df.columns.get_level_values(2).unique()
+
+        self.steps: List[str] = df.columns.get_level_values(0).unique().tolist()
+        self.files: List[str] = df.columns.get_level_values(1).unique().tolist()
+        self.metrics: List[str] = [metric for metric in sheet_metrics
+                                   if metric not in time_columns and metric not in target_columns.values()]
+        # Target column of metric, only for metrics with target in the sheet
+        self.targets: Dict[str, str] = {metric: target for metric, target in target_columns.items()
+                                        if metric in self.metrics and target in sheet_metrics}
+
+        self.__series: Dict[Tuple[str, str, str], Tuple[np.ndarray, np.ndarray]] = {}
+        self.__offsets: Dict[Tuple[str, str, str], float] = {}
+
+        column_positions = {column: position for position, column in enumerate(df.columns)}
+
+        for step, file in dict.fromkeys((column[0], column[1]) for column in df.columns):
+            time_position = column_positions.get((step, file, 'Time'))
+            if time_position is None:
+                continue
+
+            time = df.iloc[:, time_position].to_numpy(dtype=np.float64)
+            is_time = ~np.isnan(time)
+
+            for metric in self.metrics + list(self.targets.values()):
+                metric_position = column_positions.get((step, file, metric))
+                if metric_position is None:
+                    continue
+
+                values = df.iloc[:, metric_position].to_numpy(dtype=np.float64)
+                indices = np.flatnonzero(is_time & ~np.isnan(values))
+                # The first row of every second, in the order of rows
+                indices = indices[np.sort(np.unique(time[indices], return_index=True)[1])]
+
+                self.__series[(step, file, metric)] = (time[indices], values[indices])
+
+        self.__calculate_offsets()
+
+    def get(self, step: str, file: str, metric: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get time and values of metric of file at step.
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: Time and values, empty if all rows are dropped,
+                None if there is no such column.
+        """
+        return self.__series.get((step, file, metric))
+
+    def get_all_steps(self, file: str, metric: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get time and values of metric of file over all steps, time of every step is shifted by the duration
+        of previous steps.
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: Time and values or None, if no step has data.
+        """
+        times = []
+        values = []
+
+        for step in self.steps:
+            series = self.__series.get((step, file, metric))
+
+            offset = self.__offsets.get((step, file, metric))
+
+            if series is not None and len(series[0]) and offset is not None:
+                times.append(series[0] + offset)
+                values.append(series[1])
+
+        if not times:
+            return None
+
+        return np.concatenate(times), np.concatenate(values)
+
+    def __calculate_offsets(self):
+        for file in self.files:
+            for metric in self.metrics:
+                cumulative_time = 0.0
+
+                for step in self.steps:
+                    series = self.__series.get((step, file, metric))
+
+                    if series is not None and len(series[0]):
+                        self.__offsets[(step, file, metric)] = cumulative_time
+                        # Target is shifted with its metric to stay on the same time
+                        if metric in self.targets:
+                            self.__offsets[(step, file, self.targets[metric])] = cumulative_time
+
+                        cumulative_time += series[0][-1] - series[0][0] + 1
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.config import ReportConfig
+
+
+class RateAnalytics:
+    """
+    Class responsible for stability metrics of per second rates: percentiles, jitter and achievement of target rate.
+
+    Metrics are computed with numpy over whole arrays, seconds without rate are skipped.
+    """
+
+    RATE_COLUMNS = ['Mbps', 'PPS']
+    # Per second target of a stats file is saved in the column of its rate unit
+    TARGET_COLUMNS = {'Mbps': 'Target Mbps', 'PPS': 'Target PPS'}
+
+    @staticmethod
+    def get_metric_names(report_config: ReportConfig) -> List[str]:
+        names = []
+
+        for rate_column in RateAnalytics.RATE_COLUMNS:
+            names.extend(f'P{percentile:g} {rate_column}' for percentile in report_config.percentiles)
+            names.extend([f'Std {rate_column}', f'CV {rate_column}'])
+
+        return names + ['Target Rate', 'Achieved/Target', 'Seconds Below Target']
+
+    @staticmethod
+    def get_metrics(columns: Dict[str, np.ndarray], report_config: ReportConfig) -> Dict[str, float]:
+        """
+        Get stability metrics of per second columns.
+
+        Args:
+            columns (Dict[str, np.ndarray]): Per second columns with rates and optional target.
+            report_config (ReportConfig): Config of report metrics.
+
+        Returns:
+            Dict[str, float]: Values of metrics by names of get_metric_names.
+        """
+        metrics = {}
+
+        for rate_column in RateAnalytics.RATE_COLUMNS:
+            values = RateAnalytics.__get_values(columns, rate_column)
+
+            if len(values):
+                percentiles = np.percentile(values, report_config.percentiles)
+                mean = values.mean()
+                std = values.std(ddof=1) if len(values) > 1 else np.nan
+                cv = std / mean if mean else np.nan
+            else:
+                percentiles = [np.nan] * len(report_config.percentiles)
+                std = cv = np.nan
+
+            for percentile, value in zip(report_config.percentiles, percentiles):
+                metrics[f'P{percentile:g} {rate_column}'] = float(value)
+
+            metrics[f'Std {rate_column}'] = float(std)
+            metrics[f'CV {rate_column}'] = float(cv)
+
+        metrics.update(RateAnalytics.__get_target_metrics(columns, report_config.below_target_percent))
+
+        return metrics
+
+    @staticmethod
+    def get_steady_state_entry(columns: Dict[str, np.ndarray], report_config: ReportConfig) -> Optional[int]:
+        """
+        Find the first entry, from which the rate stays within tolerance of target for the whole window.
+        Without target the rate is compared with median of the second half of the series.
+
+        Returns:
+            Optional[int]: Number of the first steady entry or None, if the rate does not settle.
+        """
+        rate = target = None
+
+        for rate_column, target_column in RateAnalytics.TARGET_COLUMNS.items():
+            if rate_column in columns and target_column in columns:
+                rate = np.asarray(columns[rate_column], dtype=np.float64)
+                target = np.asarray(columns[target_column], dtype=np.float64)
+                break
+
+        if rate is None:
+            rate_column = next((column for column in reversed(RateAnalytics.RATE_COLUMNS) if column in columns), None)
+            if rate_column is None:
+                return None
+
+            rate = np.asarray(columns[rate_column], dtype=np.float64)
+            second_half = rate[len(rate) // 2:]
+            if np.isnan(second_half).all():
+                return None
+
+            target = np.full(len(rate), np.nanmedian(second_half))
+
+        window = report_config.steady_state_window
+        if len(rate) < window:
+            return None
+
+        # Seconds without rate or target are not steady
+        with np.errstate(invalid='ignore'):
+            is_steady = np.abs(rate - target) <= target * report_config.steady_state_tolerance / 100
+
+        unsteady_count = np.concatenate([[0], np.cumsum(~is_steady)])
+        steady_windows = np.flatnonzero(unsteady_count[window:] == unsteady_count[:-window])
+
+        return int(steady_windows[0]) if len(steady_windows) else None
+
+    @staticmethod
+    def __get_target_metrics(columns: Dict[str, np.ndarray], below_target_percent: float) -> Dict[str, float]:
+        """
+        Compare rate with target of the same unit. Seconds without rate or target are skipped.
+        """
+        metrics = {'Target Rate': np.nan, 'Achieved/Target': np.nan, 'Seconds Below Target': np.nan}
+
+        for rate_column, target_column in RateAnalytics.TARGET_COLUMNS.items():
+            if target_column not in columns or rate_column not in columns:
+                continue
+
+            rate = np.asarray(columns[rate_column], dtype=np.float64)
+            target = np.asarray(columns[target_column], dtype=np.float64)
+            is_valid = ~np.isnan(rate) & ~np.isnan(target) & (target > 0)
+
+            if not is_valid.any():
+                continue
+
+            rate = rate[is_valid]
+            target = target[is_valid]
+
+            metrics['Target Rate'] = float(target.mean())
+            # Ratio of sums weights every second by its target, when target is changed during the step
+            metrics['Achieved/Target'] = float(rate.sum() / target.sum())
+            metrics['Seconds Below Target'] = float(np.count_nonzero(rate < target * below_target_percent / 100))
+
+            break
+
+        return metrics
+
+    @staticmethod
+    def __get_values(columns: Dict[str, np.ndarray], column: str) -> np.ndarray:
+        if column not in columns:
+            return np.empty(0)
+
+        values = np.asarray(columns[column], dtype=np.float64)
+
+        return values[~np.isnan(values)]
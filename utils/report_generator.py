@@ -1,12 +1,26 @@
+import json
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from itertools import repeat
+from typing import List, Dict, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 import logging
 import os
 
-from models.config import Config
+from models.config import Config, ReportConfig
+from models.test_types import TestTypes
+from utils.agent_folders import AgentFolders
+from utils.capacity_analyzer import CapacityAnalyzer
+from utils.control_server import ControlServer
+from utils.event_journal import EventJournal
+from utils.parse_cache import ParseCache
+from utils.phase_profiler import PhaseProfiler
+from utils.rate_analytics import RateAnalytics
+from utils.report_writers import ReportWriters
 
 
 class ReportGenerator:
@@ -14,206 +28,504 @@ class ReportGenerator:
     Class responsible for parsing statistics and generating reports.
     """
 
-    def __init__(self, config: Config):
+    # Max age in seconds of the last rate of a file on the summary grid, older rate is counted as 0
+    __WALL_TIME_TOLERANCE = 1.5
+
+    def __init__(self, config: Config, workers: Optional[int] = None, is_cache_enabled: bool = True):
         """
         Initialize the report generator.
 
         Args:
             config (Config): Config of test.
+            workers (Optional[int]): Number of processes to parse stats files, number of CPUs by default.
+            is_cache_enabled (bool): Use parse cache of test folder.
         """
         self.config = config
+        self.workers = workers or os.cpu_count() or 1
+        self.parse_cache = ParseCache(config.load_config.test_folder) if is_cache_enabled else None
 
         self.df_total_stability_combined = None
         self.df_stability_combined = None
         self.df_total_combined = None
         self.df_stage_combined = None
+        self.df_capacity = None
 
-    def generate_report(self):
+    def generate_report(self, last_step: Optional[int] = None, is_write: bool = True):
         """
-        Generate an Excel report from parsed statistics.
+        Generate report from parsed statistics in formats of the config.
+
+        Args:
+            last_step (Optional[int]): Last step of partial report of running test, all steps by default.
+            is_write (bool): Save report files, otherwise only dataframes of the report are set.
         """
-        logging.info('Start generating Excel report.')
+        logging.info('Start generating report.')
+        start_time = time.perf_counter()
 
-        all_data = {}
-        for step in range(1, self.config.load_config.steps + 1):
-            all_data[step] = {}
-            for pcap_config in self.config.pcap_configs:
-                file_name = f"{os.path.basename(pcap_config.file)}.log"
-                stats_file = os.path.join(self.config.load_config.test_folder,
-                                          f"stats__step_{step}__"
-                                          f"file_num_{pcap_config.pcap_id}__"
-                                          f"{file_name}")
-
-                parser = StatsParser(stats_file)
-                df_stage, df_total, df_stability, df_total_stability = parser.parse(self.config.load_config.impact)
-
-                all_data[step][pcap_config.pcap_id] = {
-                    'Stage': df_stage,
-                    'Total': df_total,
-                    'Stability': df_stability,
-                    'Total stability': df_total_stability,
-                    'file_name': file_name.replace('.log', '')
-                }
-
-        if all_data:
-            df_stage_combined = pd.DataFrame()
-            df_total_combined = pd.DataFrame()
-            df_stability_combined = pd.DataFrame()
-            df_total_stability_combined = pd.DataFrame()
-
-            for step, files_data in all_data.items():
-                num_files = len(files_data)
-                stage_summary_list = []
-                stability_summary_list = []
-                total_summary_list = []
-                total_stability_summary_list = []
-
-                step_level = ''
-                for file_id, data in files_data.items():
-                    step_level = f"Step {step}"
-                    file_level = f"File {file_id + 1} - {data['file_name']}"
-
-                    df_stage = data['Stage'].copy()
-                    arrays = [
-                        [step_level] * len(df_stage.columns),
-                        [file_level] * len(df_stage.columns),
-                        df_stage.columns
-                    ]
-                    df_stage.columns = pd.MultiIndex.from_arrays(arrays)
-                    df_stage_combined = pd.concat([df_stage_combined, df_stage], axis=1)
-
-                    if num_files > 1:
-                        stage_summary_list.append(df_stage)
-
-                    df_stability = data['Stability'].copy()
-                    arrays = [
-                        [step_level] * len(df_stability.columns),
-                        [file_level] * len(df_stability.columns),
-                        df_stability.columns
-                    ]
-                    df_stability.columns = pd.MultiIndex.from_arrays(arrays)
-                    df_stability_combined = pd.concat([df_stability_combined, df_stability], axis=1)
-
-                    if num_files > 1:
-                        stability_summary_list.append(df_stability)
-
-                    df_total = data['Total'].copy()
-                    df_total.index = pd.MultiIndex.from_tuples(
-                        [(step_level, file_level)],
-                        names=['Step', 'File']
-                    )
-                    df_total_combined = pd.concat([df_total_combined, df_total])
-
-                    if num_files > 1:
-                        total_summary_list.append(df_total)
-
-                    df_total_stability = data['Total stability'].copy()
-                    df_total_stability.index = pd.MultiIndex.from_tuples(
-                        [(step_level, file_level)],
-                        names=['Step', 'File']
-                    )
-                    df_total_stability_combined = pd.concat([df_total_stability_combined, df_total_stability])
-
-                    if num_files > 1:
-                        total_stability_summary_list.append(df_total_stability)
+        stats_files = self.__get_stats_files(last_step or self.config.load_config.steps)
+        report_signature = self.__get_report_signature(stats_files)
+        report_data = None
 
-                if num_files > 1:
-                    df_stage_summary = self._create_summary_dataframe(stage_summary_list, step_level)
-                    df_stage_combined = pd.concat([df_stage_combined, df_stage_summary], axis=1)
+        if self.parse_cache is not None and stats_files:
+            report_data = self.parse_cache.get_frames('combined', report_signature)
 
-                    df_stability_summary = self._create_summary_dataframe(stability_summary_list, step_level)
-                    df_stability_combined = pd.concat([df_stability_combined, df_stability_summary], axis=1)
+            if report_data is not None:
+                logging.info(f'Report data loaded from cache in {time.perf_counter() - start_time:.3f} sec.')
 
-                    df_total_summary = self._create_total_summary_dataframe(total_summary_list, df_stage_summary,
-                                                                            step_level)
-                    df_total_combined = pd.concat([df_total_combined, df_total_summary])
+        if report_data is None:
+            with PhaseProfiler.phase('Assemble report'):
+                report_data = self.__assemble_report_data(stats_files)
 
-                    df_total_stability_summary = self._create_total_summary_dataframe(total_stability_summary_list,
-                                                                                      df_stability_summary, step_level)
-                    df_total_stability_combined = pd.concat([df_total_stability_combined, df_total_stability_summary])
+            if report_data is not None:
+                logging.info(f'Report data assembled in {time.perf_counter() - start_time:.3f} sec.')
 
-            report_name = os.path.join(self.config.load_config.test_folder, 'report.xlsx')
+                if self.parse_cache is not None:
+                    self.parse_cache.put_frames('combined', report_signature, report_data)
 
-            with pd.ExcelWriter(report_name) as writer:
-                df_stage_combined.to_excel(writer, sheet_name='Stage')
-                df_total_combined.to_excel(writer, sheet_name='Total')
-                df_stability_combined.to_excel(writer, sheet_name='Stability')
-                df_total_stability_combined.to_excel(writer, sheet_name='Total Stability')
+        if report_data is not None:
+            df_stage_combined = report_data['Stage']
+            df_total_combined = report_data['Total']
+            df_stability_combined = report_data['Stability']
+            df_total_stability_combined = report_data['Total Stability']
+
+            sheets = {
+                'Stage': df_stage_combined,
+                'Total': df_total_combined,
+                'Stability': df_stability_combined,
+                'Total Stability': df_total_stability_combined,
+            }
+
+            df_control_events = self._read_control_events()
+            if not df_control_events.empty:
+                sheets['Control Events'] = df_control_events
+
+            df_process_lifecycle = self._read_process_lifecycle(stats_files)
+            if not df_process_lifecycle.empty:
+                sheets['Process Lifecycle'] = df_process_lifecycle
+
+            if self.config.load_config.test_type == TestTypes.MAX_PERF:
+                # Stability period excludes impact of the step start
+                df_capacity_total = df_total_stability_combined if not df_total_stability_combined.empty \
+                    else df_total_combined
+                self.df_capacity = CapacityAnalyzer.analyze(self.config, df_capacity_total)
+
+                if self.df_capacity is not None:
+                    sheets['Capacity'] = self.df_capacity
+
+            if is_write:
+                self.__write_report(sheets)
 
             self.df_stage_combined = df_stage_combined
             self.df_total_combined = df_total_combined
             self.df_stability_combined = df_stability_combined
             self.df_total_stability_combined = df_total_stability_combined
 
-            logging.info('Excel report generated.')
+            logging.info(f'Report generated in {time.perf_counter() - start_time:.3f} sec.')
         else:
             logging.error("No data collected to generate report.")
 
+    def __write_report(self, sheets: Dict[str, pd.DataFrame]):
+        """
+        Save sheets of report in every format of the config. Failed format does not stop others.
+        """
+        for report_format in self.config.run_config.report_formats:
+            start_time = time.perf_counter()
+            writer = ReportWriters.get_writer(report_format, self.config.load_config.test_folder)
+
+            try:
+                with PhaseProfiler.phase(f'Write report {report_format}'):
+                    paths = writer.write(sheets)
+            except Exception as e:
+                logging.error(f'Failed to save report in {report_format} format: {e}')
+                continue
+
+            logging.info(f'Report in {report_format} format saved in {time.perf_counter() - start_time:.3f} sec: '
+                         f'{", ".join(paths)}')
+
+    def __get_stats_files(self, last_step: int) -> List[Tuple[int, str, str]]:
+        """
+        Get existing stats files of the test steps up to last_step.
+
+        Returns:
+            List[Tuple[int, str, str]]: Step, path and name of file level in report of every stats file.
+        """
+        stats_files = []
+        for step in range(1, last_step + 1):
+            for pcap_config in self.config.pcap_configs:
+                file_name = f"{os.path.basename(pcap_config.file)}.log"
+
+                for stats_folder, agent_name in self.__get_stats_folders():
+                    stats_file = os.path.join(stats_folder,
+                                              f"stats__step_{step}__"
+                                              f"file_num_{pcap_config.pcap_id}__"
+                                              f"{file_name}")
+
+                    if not os.path.exists(stats_file):
+                        logging.warning(f'Stats file {stats_file} not found, skipping it')
+                        continue
+
+                    file_level = f"File {pcap_config.pcap_id + 1} - {file_name.replace('.log', '')}"
+                    if agent_name is not None:
+                        file_level += f" @ {agent_name}"
+
+                    stats_files.append((step, stats_file, file_level))
+
+        return stats_files
+
+    def __get_report_signature(self, stats_files: List[Tuple[int, str, str]]) -> Dict:
+        """
+        Get stats files and params, which report data depends on.
+        """
+        return {
+            'impact': self.config.load_config.impact,
+            'report_config': vars(self.config.report_config),
+            'files': [[step, stats_file, file_level, ParseCache.get_file_signature(stats_file)]
+                      for step, stats_file, file_level in stats_files],
+        }
+
+    def __assemble_report_data(self, stats_files: List[Tuple[int, str, str]]) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Parse stats files and assemble combined sheets of report. Sheets of every step are assembled separately,
+        so sheets of steps with valid cache are only merged.
+
+        Returns:
+            Optional[Dict[str, pd.DataFrame]]: Combined sheets by name or None, if there is no data.
+        """
+        files_by_step: Dict[int, List[Tuple[int, str, str]]] = {}
+        for stats_file in stats_files:
+            files_by_step.setdefault(stats_file[0], []).append(stats_file)
+
+        steps_data: Dict[int, Dict[str, pd.DataFrame]] = {}
+        steps_signatures = {step: self.__get_report_signature(files) for step, files in files_by_step.items()}
+
+        if self.parse_cache is not None:
+            for step in files_by_step:
+                step_data = self.parse_cache.get_frames(f'step_{step}', steps_signatures[step])
+
+                if step_data is not None:
+                    steps_data[step] = step_data
+
+        files_to_parse = [stats_file for stats_file in stats_files if stats_file[0] not in steps_data]
+        parsed_stats = self.__read_stats_files([stats_file for _, stats_file, _ in files_to_parse])
+
+        all_data = {}
+        for (step, stats_file, file_level), stats in zip(files_to_parse, parsed_stats):
+            df_stage, df_total, df_stability, df_total_stability = StatsParser.create_dataframes(
+                stats, self.config.load_config.impact, self.config.report_config)
+
+            step_data = all_data.setdefault(step, {})
+            step_data[len(step_data)] = {
+                'Stage': df_stage,
+                'Total': df_total,
+                'Stability': df_stability,
+                'Total stability': df_total_stability,
+                'file_level': file_level
+            }
+
+        for step, files_data in all_data.items():
+            stage_parts = []
+            total_parts = []
+            stability_parts = []
+            total_stability_parts = []
+
+            num_files = len(files_data)
+            stage_summary_list = []
+            stability_summary_list = []
+            total_summary_list = []
+            total_stability_summary_list = []
+
+            step_level = f"Step {step}"
+            for file_id, data in files_data.items():
+                file_level = data['file_level']
+
+                df_stage = self._set_column_levels(data['Stage'], step_level, file_level)
+                stage_parts.append(df_stage)
+
+                df_stability = self._set_column_levels(data['Stability'], step_level, file_level)
+                stability_parts.append(df_stability)
+
+                df_total = self._set_row_levels(data['Total'], step_level, file_level)
+                total_parts.append(df_total)
+
+                df_total_stability = self._set_row_levels(data['Total stability'], step_level, file_level)
+                total_stability_parts.append(df_total_stability)
+
+                if num_files > 1:
+                    stage_summary_list.append(df_stage)
+                    stability_summary_list.append(df_stability)
+                    total_summary_list.append(df_total)
+                    total_stability_summary_list.append(df_total_stability)
+
+            if num_files > 1:
+                df_stage_summary = self._create_summary_dataframe(stage_summary_list, step_level)
+                df_stability_summary = self._create_summary_dataframe(stability_summary_list, step_level)
+
+                # Step skipped right after its start has no entries to sum
+                if not df_stage_summary.empty:
+                    stage_parts.append(df_stage_summary)
+
+                    df_total_summary = self._create_total_summary_dataframe(total_summary_list, df_stage_summary,
+                                                                            step_level, self.config.report_config)
+                    total_parts.append(df_total_summary)
+
+                if not df_stability_summary.empty:
+                    stability_parts.append(df_stability_summary)
+
+                    df_total_stability_summary = self._create_total_summary_dataframe(
+                        total_stability_summary_list, df_stability_summary, step_level, self.config.report_config)
+                    total_stability_parts.append(df_total_stability_summary)
+
+            steps_data[step] = {
+                'Stage': pd.concat(stage_parts, axis=1),
+                'Total': pd.concat(total_parts),
+                'Stability': pd.concat(stability_parts, axis=1),
+                'Total Stability': pd.concat(total_stability_parts),
+            }
+
+            if self.parse_cache is not None:
+                self.parse_cache.put_frames(f'step_{step}', steps_signatures[step], steps_data[step])
+
+        if not steps_data:
+            return None
+
+        steps = sorted(steps_data)
+
+        return {
+            'Stage': pd.concat([steps_data[step]['Stage'] for step in steps], axis=1),
+            'Total': pd.concat([steps_data[step]['Total'] for step in steps]),
+            'Stability': pd.concat([steps_data[step]['Stability'] for step in steps], axis=1),
+            'Total Stability': pd.concat([steps_data[step]['Total Stability'] for step in steps]),
+        }
+
+    def __read_stats_files(self, stats_files: List[str]) -> List['ParsedStats']:
+        """
+        Read stats files in a pool of processes. Processes return typed arrays of files,
+        DataFrames are created in this process. Files with valid parse cache are not read.
+        """
+        start_time = time.perf_counter()
+        parsed_stats: Dict[str, ParsedStats] = {}
+
+        if self.parse_cache is not None:
+            for stats_file in stats_files:
+                cached_stats = self.parse_cache.get_stats(stats_file)
+
+                if cached_stats is not None:
+                    parsed_stats[stats_file] = ParsedStats.from_dict(cached_stats)
+
+        files_to_read = [stats_file for stats_file in stats_files if stats_file not in parsed_stats]
+        workers = min(self.workers, len(files_to_read))
+
+        if workers > 1 and PhaseProfiler.is_enabled():
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                read_results = list(executor.map(read_profiled_stats_file, files_to_read,
+                                                 repeat(PhaseProfiler.get_settings())))
+
+            read_stats = [stats for stats, _ in read_results]
+            for _, phases in read_results:
+                PhaseProfiler.add_phases(phases)
+        elif workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                read_stats = list(executor.map(read_stats_file, files_to_read))
+        else:
+            read_stats = [read_stats_file(stats_file) for stats_file in files_to_read]
+
+        for stats_file, stats in zip(files_to_read, read_stats):
+            parsed_stats[stats_file] = stats
+
+            if self.parse_cache is not None:
+                self.parse_cache.put_stats(stats_file, stats.to_dict())
+
+        logging.info(f'{len(files_to_read)} stats files parsed by {max(workers, 1)} processes, '
+                     f'{len(stats_files) - len(files_to_read)} loaded from cache '
+                     f'in {time.perf_counter() - start_time:.3f} sec.')
+
+        return [parsed_stats[stats_file] for stats_file in stats_files]
+
+    def _read_control_events(self) -> pd.DataFrame:
+        """
+        Read runtime changes of the test, made through control socket.
+        """
+        events_file = os.path.join(self.config.load_config.test_folder, ControlServer.EVENTS_FILE_NAME)
+
+        if not os.path.exists(events_file):
+            return pd.DataFrame()
+
+        with open(events_file, 'r', encoding='utf-8') as f:
+            events = [json.loads(line) for line in f if line.strip()]
+
+        df_events = pd.DataFrame(events)
+        if df_events.empty:
+            return df_events
+
+        df_events['time'] = df_events['time'].map(datetime.fromtimestamp)
+        df_events = df_events.rename(columns={'time': 'Time', 'step': 'Step', 'step_time': 'Step Time',
+                                              'command': 'Command'})
+
+        return df_events
+
     @staticmethod
-    def _create_summary_dataframe(df_list, step_level):
-        time_values = set()
-        for df in df_list:
-            time_cols = [
-                col
-                for col in df.columns
-                if col[2] == 'Time'
-            ]
+    def _read_process_lifecycle(stats_files: List[Tuple[int, str, str]]) -> pd.DataFrame:
+        """
+        Summarize event journals of tcpreplay processes, time lost to startup and restarts per file per step.
+        """
+        rows = []
+        index = []
 
-            if time_cols:
-                time_col = time_cols[0]
-                time_values.update(df[time_col].tolist())
-            else:
-                logging.error(f"DataFrame is missing 'Time' column. Available columns: {df.columns}")
+        for step, stats_file, file_level in stats_files:
+            journal_path = EventJournal.get_path(stats_file)
+
+            if not os.path.exists(journal_path):
                 continue
 
-        time_values = sorted(time_values)
+            rows.append(EventJournal.summarize(EventJournal.read(journal_path)))
+            index.append((f'Step {step}', file_level))
 
-        if not time_values:
+        if not rows:
+            return pd.DataFrame()
+
+        return pd.DataFrame(rows, index=pd.MultiIndex.from_tuples(index, names=['Step', 'File']))
+
+    def __get_stats_folders(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        Get folders with stats files and names of agents, which created them (None for local run).
+        """
+        if not self.config.agent_configs:
+            return [(self.config.load_config.test_folder, None)]
+
+        return [
+            (AgentFolders.get_agent_folder(self.config.load_config.test_folder, agent_config), agent_config.name)
+            for agent_config in self.config.agent_configs
+        ]
+
+    @staticmethod
+    def _set_column_levels(df: pd.DataFrame, step_level: str, file_level: str) -> pd.DataFrame:
+        columns = pd.MultiIndex.from_arrays([
+            [step_level] * len(df.columns),
+            [file_level] * len(df.columns),
+            df.columns
+        ])
+
+        return df.set_axis(columns, axis=1)
+
+    @staticmethod
+    def _set_row_levels(df: pd.DataFrame, step_level: str, file_level: str) -> pd.DataFrame:
+        index = pd.MultiIndex.from_tuples([(step_level, file_level)] * len(df), names=['Step', 'File'])
+
+        return df.set_axis(index, axis=0)
+
+    @staticmethod
+    def _create_summary_dataframe(df_list, step_level):
+        if df_list and all(any(col[2] == 'Wall Time' for col in df.columns) for df in df_list):
+            summary_metrics = ReportGenerator.__sum_by_wall_time(df_list)
+        else:
+            summary_metrics = ReportGenerator.__sum_by_time(df_list)
+
+        if summary_metrics is None:
             logging.error("No 'Time' values available to create the summary DataFrame.")
 
             return pd.DataFrame()
 
-        summary_df = pd.DataFrame({'Time': time_values})
-        summary_df.set_index('Time', inplace=True)
-        metric_cols = ['Packets', 'Bytes', 'Mbps', 'PPS']
-        summary_metrics = pd.DataFrame(index=summary_df.index)
+        summary_metrics = summary_metrics.reindex(columns=sorted(summary_metrics.columns)).astype('float64')
+
+        summary_metrics.reset_index(inplace=True)
+        summary_level = 'Summary'
+        arrays = [
+            [step_level] * len(summary_metrics.columns),
+            [summary_level] * len(summary_metrics.columns),
+            summary_metrics.columns
+        ]
+
+        summary_metrics.columns = pd.MultiIndex.from_arrays(arrays)
+
+        return summary_metrics
+
+    @staticmethod
+    def __sum_by_time(df_list) -> Optional[pd.DataFrame]:
+        """
+        Sum metrics of files aligned by relative Time of stats files. Used for files without wall time.
+        """
+        metric_cols = ['Packets', 'Bytes', 'Mbps', 'PPS', *RateAnalytics.TARGET_COLUMNS.values()]
+        metrics_list = []
 
         for df in df_list:
-            time_col = [
+            time_cols = [
                 col
                 for col in df.columns
                 if col[2] == 'Time'
-            ][0]
-            df_temp = df.set_index(time_col)
-            df_temp.index.name = 'Time'
+            ]
+
+            if not time_cols:
+                logging.error(f"DataFrame is missing 'Time' column. Available columns: {df.columns}")
+                continue
+
             cols = [
                 col
-                for col in df_temp.columns
+                for col in df.columns
                 if col[2] in metric_cols
             ]
-            df_temp = df_temp[cols]
-            df_temp.columns = [col[2] for col in df_temp.columns]
+            df_temp = df[cols].set_axis([col[2] for col in cols], axis=1)
+            df_temp.index = pd.Index(df[time_cols[0]], name='Time')
 
             if df_temp.index.has_duplicates:
                 df_temp = df_temp[~df_temp.index.duplicated(keep='first')]
 
-            df_temp = df_temp.reindex(summary_df.index, fill_value=0)
-            summary_metrics = summary_metrics.add(df_temp, fill_value=0)
+            metrics_list.append(df_temp)
 
-        summary_metrics.reset_index(inplace=True)
-        summary_level = 'Summary'
-        arrays = [
-            [step_level] * len(summary_metrics.columns),
-            [summary_level] * len(summary_metrics.columns),
-            summary_metrics.columns
-        ]
+        if not metrics_list or all(df_temp.empty for df_temp in metrics_list):
+            return None
 
-        summary_metrics.columns = pd.MultiIndex.from_arrays(arrays)
+        # Sum of all files, aligned by Time, missing values of a file are counted as 0
+        return pd.concat(metrics_list).groupby(level='Time', sort=True).sum()
 
-        return summary_metrics
+    @staticmethod
+    def __sum_by_wall_time(df_list) -> Optional[pd.DataFrame]:
+        """
+        Sum metrics of files on a common grid of wall clock seconds. Every grid second takes the last entry of
+        each file written at or before it, so files with different start and restarts are summed at the same moment.
+        Counters of a file keep the last value after its end, rates of a file without recent entry are counted as 0.
+        """
+        files = []
+        for df in df_list:
+            df_file = df.set_axis([col[2] for col in df.columns], axis=1)
+            wall_time = df_file['Wall Time'].to_numpy()
+            is_valid = ~np.isnan(wall_time)
+
+            if is_valid.any():
+                order = np.argsort(wall_time[is_valid], kind='stable')
+                files.append({column: df_file[column].to_numpy()[is_valid][order] for column in df_file.columns})
+
+        if not files:
+            return None
+
+        start = np.ceil(min(file['Wall Time'][0] for file in files))
+        end = np.ceil(max(file['Wall Time'][-1] for file in files))
+        grid = np.arange(start, end + 1)
+
+        rate_columns = [column for column in ['Mbps', 'PPS', *RateAnalytics.TARGET_COLUMNS.values()]
+                        if any(column in file for file in files)]
+        summary = {column: np.zeros(len(grid)) for column in ['Packets', 'Bytes'] + rate_columns}
+
+        for file in files:
+            entries = np.searchsorted(file['Wall Time'], grid, side='right') - 1
+            has_entry = entries >= 0
+            entries = entries[has_entry]
+
+            for column in ['Packets', 'Bytes']:
+                summary[column][has_entry] += file[column][entries]
+
+            is_recent = grid[has_entry] - file['Wall Time'][entries] < ReportGenerator.__WALL_TIME_TOLERANCE
+            recent_entries = entries[is_recent]
+            recent_grid = np.flatnonzero(has_entry)[is_recent]
+
+            for column in rate_columns:
+                if column in file:
+                    summary[column][recent_grid] += np.nan_to_num(file[column][recent_entries])
+
+        summary['Wall Time'] = grid
+
+        return pd.DataFrame(summary, index=pd.Index(np.arange(1, len(grid) + 1), name='Time'))
 
     @staticmethod
-    def _create_total_summary_dataframe(df_list, df_summary, step_level):
+    def _create_total_summary_dataframe(df_list, df_summary, step_level, report_config: ReportConfig):
         summary_data = {}
         tcp_replay_count = sum(df['TCPReplay Start Count'].iloc[0] for df in df_list)
         summary_data['TCPReplay Start Count'] = [tcp_replay_count]
@@ -242,6 +554,18 @@ class ReportGenerator:
         summary_data['Min PPS'] = [df_metrics['PPS'].min()]
         summary_data['Max PPS'] = [df_metrics['PPS'].max()]
 
+        summary_data['Total Restart Gap'] = [sum(df['Total Restart Gap'].iloc[0] for df in df_list)]
+        summary_data['Max Restart Gap'] = [max(df['Max Restart Gap'].iloc[0] for df in df_list)]
+
+        summary_columns = {column: df_metrics[column].to_numpy() for column in df_metrics.columns}
+        rate_metrics = RateAnalytics.get_metrics(summary_columns, report_config)
+        for name, value in rate_metrics.items():
+            summary_data[name] = [value]
+
+        if 'Warm-up Time' in df_list[0].columns:
+            # Summary is steady, when all files are steady
+            summary_data['Warm-up Time'] = [max(df['Warm-up Time'].iloc[0] for df in df_list)]
+
         summary_df = pd.DataFrame(summary_data)
         summary_level = 'Summary'
         summary_df.index = pd.MultiIndex.from_tuples(
@@ -252,11 +576,51 @@ class ReportGenerator:
         return summary_df
 
 
+def read_stats_file(stats_file: str) -> 'ParsedStats':
+    """
+    Read the stats file, function is used as a task of process pool.
+    """
+    with PhaseProfiler.phase(f'Parse {os.path.basename(stats_file)}'):
+        return StatsParser(stats_file).read()
+
+
+def read_profiled_stats_file(stats_file: str, profiler_settings: Dict) -> Tuple['ParsedStats', List[Dict]]:
+    """
+    Read the stats file with profiled parsing, function is used as a task of process pool.
+
+    Returns:
+        Tuple[ParsedStats, List[Dict]]: Parsed stats and phases measured by the pool process.
+    """
+    # Spawned pool process does not inherit the profiler of the main process
+    PhaseProfiler.enable(**profiler_settings)
+
+    return read_stats_file(stats_file), PhaseProfiler.pop_phases()
+
+
 class StatsParser:
     """
     Class for parsing tcpreplay statistics files.
+
+    The file is read in large chunks, lines are dispatched by their prefix and values of all lines of a chunk
+    are converted at once into typed arrays, so memory does not depend on the size of the file.
     """
 
+    READ_CHUNK_SIZE = 4 * 1024 * 1024
+    # Every second of tcpreplay stats is "Actual:" and "Rated:" lines of about 110 bytes
+    __BYTES_PER_ENTRY = 100
+    # "Actual: 10 packets (100 bytes) sent in 1.00 seconds" without "(" is split into 9 fields
+    __ACTUAL_FIELDS = 9
+    # "Rated: 100.0 Bps, 0.00 Mbps, 10.00 pps" is split into 7 fields
+    __RATED_FIELDS = 7
+    # "Wall time: 1700000000.000 seconds" is split into 4 fields
+    __WALL_TIME_FIELDS = 4
+    __ACTUAL_PATTERN = re.compile(r'Actual: (\d+) packets \((\d+) bytes\) sent in ([\d.+?]+) seconds')
+    __RATED_PATTERN = re.compile(r'Rated: [\d.+?]+ Bps, ([\d.+?]+) Mbps, ([\d.+?]+) pps')
+    __TEST_COMPLETE_PATTERN = re.compile(r'Test complete: (.+?)\.\d+')
+    __RESTART_GAP_PATTERN = re.compile(r'Restart gap: ([\d.]+) seconds')
+    __WALL_TIME_PATTERN = re.compile(r'Wall time: ([\d.]+) seconds')
+    __TARGET_RATE_PATTERN = re.compile(r'Target rate: ([\d.]+) (pps|Mbps)')
+
     def __init__(self, stats_file):
         """
         Initialize the parser.
@@ -265,8 +629,10 @@ class StatsParser:
             stats_file (str): Path to the stats file.
         """
         self.stats_file = stats_file
+        # Wall time of the last line of a chunk belongs to the first "Actual:" line of the next chunk
+        self.__pending_wall_time: Optional[float] = None
 
-    def parse(self, impact_time):
+    def parse(self, impact_time, report_config: ReportConfig):
         """
         Parse the stats file and return DataFrames.
 
@@ -277,149 +643,446 @@ class StatsParser:
             - df_stability: DataFrame for stability period.
             - df_total_stability: Summary DataFrame for stability period.
         """
-        with open(self.stats_file, 'r') as stat_file:
-            lines = stat_file.readlines()
-
-        stage_start_timestamp = int(lines[0])
-        stage_end_timestamp = int(lines[-1])
-
-        test_start_count = 0
-        total_packets = 0
-        total_bytes = 0
-        total_time = 0.0
-
-        mbps_list = []
-        pps_list = []
-
-        data_entries: List[Dict] = []
-        last_packets = 0
-        last_bytes = 0
-        last_time = 0
-        end_time = None
-        first_time = True
-
-        for i, line in enumerate(lines[1:-1]):
-            if line.startswith('Test start:'):
-                test_start_count += 1
-
-            elif line.startswith('Test complete:'):
-                end_time_match = re.match(r'Test complete: (.+?)\.\d+', line)
-
-                if end_time_match:
-                    datetime_str = end_time_match.group(1)
-                    end_time = int(datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S").timestamp())
-
-            elif line.startswith('Actual:'):
-                actual_match = re.match(r'Actual: (\d+) packets \((\d+) bytes\) sent in ([\d.+?]+) seconds', line)
-                if actual_match:
-                    packets = int(actual_match.group(1))
-                    bytes_sent = int(actual_match.group(2))
-                    time_sent = round(float(actual_match.group(3)))
-
-                    if packets - total_packets == packets - last_packets or first_time:
-                        total_packets = packets
-                        total_bytes = bytes_sent
-                        total_time = time_sent
-                    else:
-                        total_packets = packets + last_packets
-                        total_bytes = bytes_sent + last_bytes
-                        total_time = time_sent + last_time
-
-                    first_time = False
-
-                    data_entries.append({
-                        'Packets': total_packets,
-                        'Bytes': total_bytes,
-                        'Time': total_time
-                    })
-
-                    last_packets = packets
-                    last_bytes = bytes_sent
-                    last_time = time_sent
-
-            elif line.startswith('Rated:'):
-                rated_match = re.match(r'Rated: [\d.+?]+ Bps, ([\d.+?]+) Mbps, ([\d.+?]+) pps', line)
-                if rated_match:
-                    mbps = float(rated_match.group(1))
-                    pps = float(rated_match.group(2))
-
-                    mbps_list.append(mbps)
-                    pps_list.append(pps)
-
-                    if data_entries:
-                        data_entries[-1].update({
-                            'Mbps': mbps,
-                            'PPS': pps
-                        })
-
-        df_stage = pd.DataFrame(data_entries)
-
-        df_total = pd.DataFrame(
-            [
-                {
-                    'Total Packets': total_packets,
-                    'Total Bytes': total_bytes,
-                    'Total Time': total_time,
-                    'Average Mbps': sum(mbps_list) / len(mbps_list) if mbps_list else 0,
-                    'Min Mbps': min(mbps_list) if mbps_list else 0,
-                    'Max Mbps': max(mbps_list) if mbps_list else 0,
-                    'Average PPS': sum(pps_list) / len(pps_list) if pps_list else 0,
-                    'Min PPS': min(pps_list) if pps_list else 0,
-                    'Max PPS': max(pps_list) if pps_list else 0,
-                    'TCPReplay Start Count': test_start_count
-                }
-            ]
-        )
+        return self.create_dataframes(self.read(), impact_time, report_config)
 
-        if end_time and stage_end_timestamp - end_time < 5:
-            stage_end_timestamp = end_time
+    @classmethod
+    def create_dataframes(cls, stats: 'ParsedStats', impact_time, report_config: ReportConfig):
+        """
+        Create DataFrames of the parsed stats file, see parse.
+        """
+        stage_columns = stats.get_columns()
+        df_stage = pd.DataFrame(stage_columns)
 
-        stage_duration = stage_end_timestamp - stage_start_timestamp
-        offset = impact_time - (stage_duration - total_time)
+        if stats.rates_count:
+            mbps_stats = (stats.mbps_sum / stats.rates_count, stats.mbps_min, stats.mbps_max)
+            pps_stats = (stats.pps_sum / stats.rates_count, stats.pps_min, stats.pps_max)
+        else:
+            mbps_stats = pps_stats = (0, 0, 0)
 
-        df_stability = df_stage[df_stage['Time'] >= offset].reset_index(drop=True)
-        df_offset = df_stage[df_stage['Time'] < offset].reset_index(drop=True)
+        stage_metrics = RateAnalytics.get_metrics(stage_columns, report_config)
+        stability_metrics = {}
+        steady_state_entry = None
 
-        if not df_offset.empty:
-            last_packets = df_offset['Packets'].iloc[-1]
-            last_bytes = df_offset['Bytes'].iloc[-1]
+        if report_config.steady_state:
+            steady_state_entry = RateAnalytics.get_steady_state_entry(stage_columns, report_config)
+            warm_up_time = stage_columns['Time'][steady_state_entry] - 1 if steady_state_entry is not None else np.nan
+            stage_metrics['Warm-up Time'] = stability_metrics['Warm-up Time'] = warm_up_time
+
+        df_total = cls.__create_total_dataframe(stats.total_packets, stats.total_bytes, stats.total_time,
+                                                 mbps_stats, pps_stats, stats, stats.restart_gaps, stage_metrics)
+
+        if steady_state_entry is not None:
+            # Stability period starts after detected warm-up instead of fixed impact
+            is_stability = np.arange(stats.size) >= steady_state_entry
+        else:
+            stage_end_timestamp = stats.stage_end_timestamp
+            if stats.end_time and stage_end_timestamp - stats.end_time < 5:
+                stage_end_timestamp = stats.end_time
+
+            stage_duration = stage_end_timestamp - stats.stage_start_timestamp
+            offset = impact_time - (stage_duration - stats.total_time)
+
+            is_stability = stage_columns['Time'] >= offset
+
+        offset_entries = np.flatnonzero(~is_stability)
+
+        if len(offset_entries):
+            last_packets = stage_columns['Packets'][offset_entries[-1]]
+            last_bytes = stage_columns['Bytes'][offset_entries[-1]]
         else:
             last_packets = 0
             last_bytes = 0
 
-        df_stability['Packets'] = df_stability['Packets'] - last_packets
-        df_stability['Bytes'] = df_stability['Bytes'] - last_bytes
-        df_stability['Time'] = df_stability['Time'] - df_stability['Time'].iloc[0] + 1
+        stability_columns = {column: values[is_stability] for column, values in stage_columns.items()}
+        stability_columns['Packets'] = stability_columns['Packets'] - last_packets
+        stability_columns['Bytes'] = stability_columns['Bytes'] - last_bytes
 
-        if not df_stability.empty:
-            total_packets_stability = df_stability['Packets'].iloc[-1]
-            total_bytes_stability = df_stability['Bytes'].iloc[-1]
-            total_time_stability = df_stability['Time'].iloc[-1]
+        if len(stability_columns['Time']):
+            stability_columns['Time'] = stability_columns['Time'] - stability_columns['Time'][0] + 1
+
+        df_stability = pd.DataFrame(stability_columns)
 
-            if 'Mbps' in df_stability.columns:
-                mbps_list_stability = df_stability['Mbps']
-                pps_list_stability = df_stability['PPS']
+        if not df_stability.empty:
+            if 'Mbps' in stability_columns:
+                mbps_stats = cls.__get_rate_stats(stability_columns['Mbps'])
+                pps_stats = cls.__get_rate_stats(stability_columns['PPS'])
             else:
-                mbps_list_stability = []
-                pps_list_stability = []
-
-            df_total_stability = pd.DataFrame(
-                [
-                    {
-                        'Total Packets': total_packets_stability,
-                        'Total Bytes': total_bytes_stability,
-                        'Total Time': total_time_stability,
-                        'Average Mbps': mbps_list_stability.mean() if len(mbps_list_stability) > 0 else 0,
-                        'Min Mbps': mbps_list_stability.min() if len(mbps_list_stability) > 0 else 0,
-                        'Max Mbps': mbps_list_stability.max() if len(mbps_list_stability) > 0 else 0,
-                        'Average PPS': pps_list_stability.mean() if len(pps_list_stability) > 0 else 0,
-                        'Min PPS': pps_list_stability.min() if len(pps_list_stability) > 0 else 0,
-                        'Max PPS': pps_list_stability.max() if len(pps_list_stability) > 0 else 0,
-                        'TCPReplay Start Count': test_start_count
-                    }
-                ]
+                mbps_stats = pps_stats = (0, 0, 0)
+
+            # Gaps of restarts before the stability period are not counted, gap after the last entry belongs to it
+            gap_entries = np.minimum(np.array(stats.restart_gap_entries, dtype=np.int64), stats.size - 1)
+            stability_gaps = np.array(stats.restart_gaps, dtype=np.float64)[is_stability[gap_entries]].tolist()
+
+            df_total_stability = cls.__create_total_dataframe(
+                stability_columns['Packets'][-1], stability_columns['Bytes'][-1], stability_columns['Time'][-1],
+                mbps_stats, pps_stats, stats, stability_gaps,
+                {**RateAnalytics.get_metrics(stability_columns, report_config), **stability_metrics}
             )
         else:
             df_total_stability = pd.DataFrame()
 
         return df_stage, df_total, df_stability, df_total_stability
+
+    @staticmethod
+    def __get_rate_stats(values: np.ndarray) -> Tuple[float, float, float]:
+        """
+        Get average, min and max of rates, seconds without "Rated:" line are skipped.
+        """
+        values = values[~np.isnan(values)]
+
+        if not len(values):
+            return np.nan, np.nan, np.nan
+
+        return values.mean(), values.min(), values.max()
+
+    @staticmethod
+    def __create_total_dataframe(total_packets, total_bytes, total_time, mbps_stats: Tuple[float, float, float],
+                                 pps_stats: Tuple[float, float, float], stats: 'ParsedStats',
+                                 restart_gaps: List[float], rate_metrics: Dict[str, float]) -> pd.DataFrame:
+        return pd.DataFrame({
+            'Total Packets': [total_packets],
+            'Total Bytes': [total_bytes],
+            'Total Time': [total_time],
+            'Average Mbps': [mbps_stats[0]],
+            'Min Mbps': [mbps_stats[1]],
+            'Max Mbps': [mbps_stats[2]],
+            'Average PPS': [pps_stats[0]],
+            'Min PPS': [pps_stats[1]],
+            'Max PPS': [pps_stats[2]],
+            'TCPReplay Start Count': [stats.test_start_count],
+            'Total Restart Gap': [sum(restart_gaps)],
+            'Max Restart Gap': [max(restart_gaps) if restart_gaps else 0],
+            **{name: [value] for name, value in rate_metrics.items()}
+        })
+
+    def read(self) -> 'ParsedStats':
+        """
+        Read the stats file chunk by chunk.
+        The first line of the file is start timestamp of the stage, the last line is its end timestamp.
+        """
+        stats = ParsedStats(os.path.getsize(self.stats_file) // self.__BYTES_PER_ENTRY + 1)
+
+        with open(self.stats_file, 'r') as stat_file:
+            stats.stage_start_timestamp = int(stat_file.readline())
+            last_line = ''
+            rest = ''
+
+            while True:
+                chunk = stat_file.read(self.READ_CHUNK_SIZE)
+
+                if not chunk:
+                    break
+
+                lines = (rest + chunk).split('\n')
+                # Last line of the chunk may be incomplete, it is parsed with the next chunk
+                rest = lines.pop()
+
+                if lines:
+                    self.__parse_lines(stats, lines)
+                    last_line = lines[-1]
+
+        # Last line of the file is written without new line
+        stats.stage_end_timestamp = int(rest if rest.strip() else last_line)
+        stats.trim()
+
+        return stats
+
+    def __parse_lines(self, stats: 'ParsedStats', lines: List[str]):
+        actual_lines = []
+        rated_lines = []
+        rated_entries = []
+        wall_time_lines = []
+        wall_time_entries = []
+        target_rates = []
+        target_entries = []
+        restart_gap_entries = []
+
+        for line in lines:
+            prefix = line[:2]
+
+            if prefix == 'Ac':
+                if line.startswith('Actual:'):
+                    actual_lines.append(line)
+
+            elif prefix == 'Ra':
+                if line.startswith('Rated:'):
+                    rated_lines.append(line)
+                    # Rate belongs to the last "Actual:" line before it
+                    rated_entries.append(len(actual_lines) - 1)
+
+            elif prefix == 'Te':
+                if line.startswith('Test start:'):
+                    stats.test_start_count += 1
+
+                elif line.startswith('Test complete:'):
+                    match = self.__TEST_COMPLETE_PATTERN.match(line)
+
+                    if match:
+                        stats.end_time = int(datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp())
+
+            elif prefix == 'Re':
+                match = self.__RESTART_GAP_PATTERN.match(line)
+
+                if match:
+                    stats.restart_gaps.append(float(match.group(1)))
+                    # Gap is written before the first "Actual:" line of the restarted process
+                    restart_gap_entries.append(len(actual_lines))
+
+            elif prefix == 'Wa':
+                if line.startswith('Wall time:'):
+                    wall_time_lines.append(line)
+                    # Wall time belongs to the next "Actual:" line
+                    wall_time_entries.append(len(actual_lines))
+
+            elif prefix == 'Ta':
+                match = self.__TARGET_RATE_PATTERN.match(line)
+
+                if match:
+                    # Target is set for the next "Actual:" line and all after it
+                    target_rates.append(float(match.group(1)))
+                    target_entries.append(len(actual_lines))
+                    stats.target_unit = 'PPS' if match.group(2) == 'pps' else 'Mbps'
+
+        actual_values, is_actual_valid = self.__split_values(
+            actual_lines, self.__ACTUAL_FIELDS, {1: np.int64, 3: np.int64, 7: np.float64}, self.__ACTUAL_PATTERN)
+        rated_values, is_rated_valid = self.__split_values(
+            rated_lines, self.__RATED_FIELDS, {3: np.float64, 5: np.float64}, self.__RATED_PATTERN)
+
+        (wall_times,), is_wall_time_valid = self.__split_values(
+            wall_time_lines, self.__WALL_TIME_FIELDS, {2: np.float64}, self.__WALL_TIME_PATTERN)
+
+        rated_entries = np.array(rated_entries, dtype=np.int64)
+        wall_time_entries = np.array(wall_time_entries, dtype=np.int64)
+        target_entries = np.array(target_entries, dtype=np.int64)
+        restart_gap_entries = np.array(restart_gap_entries, dtype=np.int64)
+
+        if is_wall_time_valid is not None:
+            wall_time_entries = wall_time_entries[is_wall_time_valid]
+
+        if self.__pending_wall_time is not None:
+            wall_times = np.concatenate([[self.__pending_wall_time], wall_times])
+            wall_time_entries = np.concatenate([[0], wall_time_entries])
+            self.__pending_wall_time = None
+
+        is_next_chunk = wall_time_entries == len(actual_lines)
+
+        if is_next_chunk.any():
+            self.__pending_wall_time = wall_times[is_next_chunk][-1]
+            wall_times = wall_times[~is_next_chunk]
+            wall_time_entries = wall_time_entries[~is_next_chunk]
+
+        if is_actual_valid is not None:
+            # Rate after not parsed "Actual:" line belongs to the previous parsed one
+            parsed_count = np.concatenate([[0], np.cumsum(is_actual_valid)])
+            rated_entries = parsed_count[rated_entries + 1] - 1
+
+            # Wall time of not parsed "Actual:" line is dropped
+            is_entry_valid = is_actual_valid[wall_time_entries]
+            wall_times = wall_times[is_entry_valid]
+            wall_time_entries = parsed_count[wall_time_entries[is_entry_valid]]
+
+            target_entries = parsed_count[target_entries]
+            restart_gap_entries = parsed_count[restart_gap_entries]
+
+        if is_rated_valid is not None:
+            rated_entries = rated_entries[is_rated_valid]
+
+        # Rate before the first "Actual:" line of the lines belongs to the last entry of previous lines
+        rated_entries += stats.size
+        wall_time_entries += stats.size
+        stats.target_entries.extend((target_entries + stats.size).tolist())
+        stats.target_rates.extend(target_rates)
+        stats.restart_gap_entries.extend((restart_gap_entries + stats.size).tolist())
+
+        packets, bytes_sent, time_sent = actual_values
+        stats.add_entries(packets, bytes_sent, np.rint(time_sent).astype(np.int64))
+
+        mbps, pps = rated_values
+        stats.add_rates(rated_entries, mbps, pps)
+        stats.add_wall_times(wall_time_entries, wall_times)
+
+    @staticmethod
+    def __split_values(lines: List[str], fields_count: int, value_fields: Dict[int, type],
+                       pattern: re.Pattern) -> Tuple[List[np.ndarray], Optional[np.ndarray]]:
+        """
+        Convert values of lines of the same type into typed arrays.
+        All lines are split at once, lines are matched one by one only if some of them have unexpected format.
+
+        Returns:
+            Tuple[List[np.ndarray], Optional[np.ndarray]]: Arrays of values and mask of parsed lines,
+            the mask is None, if all lines are parsed.
+        """
+        fields = ' '.join(lines).replace('(', ' ').split()
+        last_fields = fields[fields_count - 1::fields_count]
+        is_same_format = len(fields) == fields_count * len(lines) and len(set(last_fields)) <= 1
+
+        if is_same_format:
+            try:
+                return [np.array(fields[field::fields_count], dtype=dtype)
+                        for field, dtype in value_fields.items()], None
+            except ValueError:
+                pass
+
+        matches = [pattern.match(line) for line in lines]
+        is_valid = np.array([match is not None for match in matches], dtype=bool)
+        groups = [match.groups() for match in matches if match is not None]
+
+        return [np.array([group[i] for group in groups], dtype=dtype)
+                for i, dtype in enumerate(value_fields.values())], is_valid
+
+
+class ParsedStats:
+    """
+    Statistics of a stats file. Values of every second are kept in preallocated typed arrays, which grow when needed.
+    """
+
+    def __init__(self, capacity: int):
+        self.stage_start_timestamp: int = 0
+        self.stage_end_timestamp: int = 0
+        self.end_time: Optional[int] = None
+        self.test_start_count: int = 0
+        self.restart_gaps: List[float] = []
+        # Entry of the first second after every restart gap
+        self.restart_gap_entries: List[int] = []
+
+        self.rates_count: int = 0
+        self.mbps_sum: float = 0.0
+        self.mbps_min: float = 0.0
+        self.mbps_max: float = 0.0
+        self.pps_sum: float = 0.0
+        self.pps_min: float = 0.0
+        self.pps_max: float = 0.0
+        self.has_rates: bool = False
+        self.has_wall_time: bool = False
+        # Target rate is set from the entry to the next target entry
+        self.target_unit: Optional[str] = None
+        self.target_entries: List[int] = []
+        self.target_rates: List[float] = []
+
+        self.size: int = 0
+        self.packets = np.empty(capacity, dtype=np.int64)
+        self.bytes = np.empty(capacity, dtype=np.int64)
+        self.time = np.empty(capacity, dtype=np.int64)
+        self.mbps = np.full(capacity, np.nan, dtype=np.float64)
+        self.pps = np.full(capacity, np.nan, dtype=np.float64)
+        self.wall_time = np.full(capacity, np.nan, dtype=np.float64)
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> 'ParsedStats':
+        stats = cls(0)
+        vars(stats).update(values)
+
+        return stats
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    @property
+    def total_packets(self) -> int:
+        return int(self.packets[self.size - 1]) if self.size else 0
+
+    @property
+    def total_bytes(self) -> int:
+        return int(self.bytes[self.size - 1]) if self.size else 0
+
+    @property
+    def total_time(self) -> float:
+        return int(self.time[self.size - 1]) if self.size else 0.0
+
+    def trim(self):
+        """
+        Drop unused capacity of arrays, so they are copied to other process without it.
+        """
+        self.packets = self.packets[:self.size].copy()
+        self.bytes = self.bytes[:self.size].copy()
+        self.time = self.time[:self.size].copy()
+        self.mbps = self.mbps[:self.size].copy()
+        self.pps = self.pps[:self.size].copy()
+        self.wall_time = self.wall_time[:self.size].copy()
+
+    def get_columns(self) -> Dict[str, np.ndarray]:
+        columns = {
+            'Packets': self.packets[:self.size],
+            'Bytes': self.bytes[:self.size],
+            'Time': self.time[:self.size],
+        }
+
+        # Rates are present only if any "Rated:" line belongs to an entry
+        if self.has_rates:
+            columns['Mbps'] = self.mbps[:self.size]
+            columns['PPS'] = self.pps[:self.size]
+
+        # Files of old versions have no "Wall time:" and "Target rate:" lines
+        if self.has_wall_time:
+            columns['Wall Time'] = self.wall_time[:self.size]
+
+        if self.target_rates:
+            columns[f'Target {self.target_unit}'] = self.get_target()
+
+        return columns
+
+    def get_target(self) -> np.ndarray:
+        """
+        Get target rate of every entry, NaN before the first "Target rate:" line.
+        """
+        targets = np.searchsorted(self.target_entries, np.arange(self.size), side='right') - 1
+        target = np.array(self.target_rates + [np.nan], dtype=np.float64)
+
+        # Index -1 takes NaN from the end
+        return target[targets]
+
+    def add_entries(self, packets: np.ndarray, bytes_sent: np.ndarray, time_sent: np.ndarray):
+        new_size = self.size + len(packets)
+
+        while new_size > len(self.packets):
+            self.__grow()
+
+        self.packets[self.size:new_size] = packets
+        self.bytes[self.size:new_size] = bytes_sent
+        self.time[self.size:new_size] = time_sent
+        self.size = new_size
+
+    def add_rates(self, entries: np.ndarray, mbps: np.ndarray, pps: np.ndarray):
+        """
+        Add values of "Rated:" lines. All of them are counted in totals,
+        values with negative entry number are before the first entry and are not set to any entry.
+        """
+        if not len(mbps):
+            return
+
+        if self.rates_count:
+            self.mbps_min = min(self.mbps_min, mbps.min())
+            self.mbps_max = max(self.mbps_max, mbps.max())
+            self.pps_min = min(self.pps_min, pps.min())
+            self.pps_max = max(self.pps_max, pps.max())
+        else:
+            self.mbps_min, self.mbps_max = mbps.min(), mbps.max()
+            self.pps_min, self.pps_max = pps.min(), pps.max()
+
+        self.rates_count += len(mbps)
+        # Sequential sum gives the same total regardless of chunk boundaries
+        self.mbps_sum = sum(mbps.tolist(), self.mbps_sum)
+        self.pps_sum = sum(pps.tolist(), self.pps_sum)
+
+        is_entry = entries >= 0
+        if is_entry.any():
+            self.mbps[entries[is_entry]] = mbps[is_entry]
+            self.pps[entries[is_entry]] = pps[is_entry]
+            self.has_rates = True
+
+    def add_wall_times(self, entries: np.ndarray, wall_times: np.ndarray):
+        """
+        Set epoch time, when "Actual:" line of the entry was written by runner.
+        """
+        if len(wall_times):
+            self.wall_time[entries] = wall_times
+            self.has_wall_time = True
+
+    def __grow(self):
+        capacity = len(self.packets) * 2
+        self.packets = np.concatenate([self.packets, np.empty(capacity - len(self.packets), dtype=np.int64)])
+        self.bytes = np.concatenate([self.bytes, np.empty(capacity - len(self.bytes), dtype=np.int64)])
+        self.time = np.concatenate([self.time, np.empty(capacity - len(self.time), dtype=np.int64)])
+        self.mbps = np.concatenate([self.mbps, np.full(capacity - len(self.mbps), np.nan)])
+        self.pps = np.concatenate([self.pps, np.full(capacity - len(self.pps), np.nan)])
+        self.wall_time = np.concatenate([self.wall_time, np.full(capacity - len(self.wall_time), np.nan)])
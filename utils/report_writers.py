@@ -0,0 +1,292 @@
+import datetime
+import html
+import math
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.report_formats import ReportFormats
+
+
+class ReportWriter(ABC):
+    """
+    Base class of report writers. Every writer saves sheets of report into files of the test folder.
+
+    Sheets are "Stage", "Total", "Stability", "Total Stability" and optional "Control Events", "Process Lifecycle"
+    and "Capacity".
+    "Stage" and "Stability" are wide sheets with (Step, File, metric) columns.
+    """
+
+    REPORT_NAME = 'report'
+    WIDE_SHEETS = ['Stage', 'Stability']
+    NO_INDEX_SHEETS = ['Control Events']
+
+    def __init__(self, test_folder: str):
+        """
+        Initialize the writer.
+
+        Args:
+            test_folder (str): Folder of test to save report files.
+        """
+        self.test_folder = test_folder
+
+    @abstractmethod
+    def write(self, sheets: Dict[str, pd.DataFrame]) -> List[str]:
+        """
+        Save sheets of report.
+
+        Returns:
+            List[str]: Paths of saved files.
+        """
+        pass
+
+    def _get_path(self, suffix: str) -> str:
+        return os.path.join(self.test_folder, f'{self.REPORT_NAME}{suffix}')
+
+    @staticmethod
+    def _get_file_suffix(sheet_name: str) -> str:
+        return '__' + sheet_name.lower().replace(' ', '_')
+
+    @staticmethod
+    def _to_long_format(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert wide sheet with (Step, File, metric) columns into rows of (Step, File, Time, metrics...).
+        Rows after the end of a file are dropped.
+        """
+        parts = []
+
+        for step_level, file_level in dict.fromkeys((column[0], column[1]) for column in df.columns):
+            df_file = df[(step_level, file_level)].dropna(how='all')
+            df_file.columns = list(df_file.columns)
+            df_file.insert(0, 'Step', step_level)
+            df_file.insert(1, 'File', file_level)
+            parts.append(df_file)
+
+        if not parts:
+            return pd.DataFrame(columns=['Step', 'File', 'Time'])
+
+        return pd.concat(parts, ignore_index=True)
+
+    @classmethod
+    def _get_long_sheets(cls, sheets: Dict[str, pd.DataFrame]) -> Iterator[Tuple[str, pd.DataFrame]]:
+        for sheet_name, df in sheets.items():
+            if sheet_name in cls.WIDE_SHEETS:
+                yield sheet_name, cls._to_long_format(df)
+            elif sheet_name in cls.NO_INDEX_SHEETS:
+                yield sheet_name, df
+            else:
+                yield sheet_name, df.reset_index()
+
+
+class ExcelReportWriter(ReportWriter):
+    """
+    Writer of xlsx report with openpyxl. Whole workbook is kept in memory.
+    Sheets over Excel limits are split into several sheets.
+    """
+
+    MAX_ROWS = 1048576
+    MAX_COLUMNS = 16384
+    MAX_SHEET_NAME_LENGTH = 31
+
+    def write(self, sheets: Dict[str, pd.DataFrame]) -> List[str]:
+        path = self._get_path('.xlsx')
+
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            for sheet_name, df in sheets.items():
+                is_index = sheet_name not in self.NO_INDEX_SHEETS
+
+                for part_name, df_part in self._split_sheet(sheet_name, df, is_index):
+                    df_part.to_excel(writer, sheet_name=part_name, index=is_index)
+
+        return [path]
+
+    @classmethod
+    def _split_sheet(cls, sheet_name: str, df: pd.DataFrame, is_index: bool) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Split sheet by rows and columns to fit Excel limits, index is repeated in every part.
+        """
+        index_columns = df.index.nlevels if is_index else 0
+        # Header rows and row with names of index under MultiIndex header
+        header_rows = df.columns.nlevels + (1 if df.columns.nlevels > 1 else 0)
+
+        max_columns = cls.MAX_COLUMNS - index_columns
+        max_rows = cls.MAX_ROWS - header_rows
+
+        column_parts = max(1, math.ceil(len(df.columns) / max_columns))
+        row_parts = max(1, math.ceil(len(df) / max_rows))
+
+        if column_parts == 1 and row_parts == 1:
+            yield sheet_name, df
+            return
+
+        part_number = 1
+        for column_part in range(column_parts):
+            for row_part in range(row_parts):
+                df_part = df.iloc[row_part * max_rows:(row_part + 1) * max_rows,
+                                  column_part * max_columns:(column_part + 1) * max_columns]
+                suffix = f' ({part_number})'
+
+                yield sheet_name[:cls.MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix, df_part
+                part_number += 1
+
+
+class StreamingExcelReportWriter(ExcelReportWriter):
+    """
+    Writer of xlsx report with xlsxwriter in constant memory mode. Rows are flushed to the file one by one,
+    so memory does not depend on size of sheets. Requires optional xlsxwriter package.
+    """
+
+    def write(self, sheets: Dict[str, pd.DataFrame]) -> List[str]:
+        import xlsxwriter
+
+        path = self._get_path('.xlsx')
+
+        with xlsxwriter.Workbook(path, {'constant_memory': True}) as workbook:
+            header_format = workbook.add_format({'bold': True})
+
+            for sheet_name, df in sheets.items():
+                is_index = sheet_name not in self.NO_INDEX_SHEETS
+
+                for part_name, df_part in self._split_sheet(sheet_name, df, is_index):
+                    self.__write_sheet(workbook.add_worksheet(part_name), df_part, is_index, header_format)
+
+        return [path]
+
+    def __write_sheet(self, worksheet, df: pd.DataFrame, is_index: bool, header_format):
+        index_columns = df.index.nlevels if is_index else 0
+        row = 0
+
+        is_multi_header = df.columns.nlevels > 1
+
+        # Layout of header is the same as in pandas: names of column levels are in the last index column,
+        # names of index are in the header row or in a separate row under MultiIndex header
+        for level in range(df.columns.nlevels):
+            labels = [str(label) for label in df.columns.get_level_values(level)]
+
+            if level < df.columns.nlevels - 1:
+                # Repeated labels of upper levels are left empty like merged cells of pandas
+                labels = [label if i == 0 or label != labels[i - 1] else None for i, label in enumerate(labels)]
+
+            if not is_multi_header:
+                header = list(df.index.names) if is_index else []
+            else:
+                header = [None] * index_columns
+                if index_columns:
+                    header[-1] = df.columns.names[level]
+
+            worksheet.write_row(row, 0, header + labels, header_format)
+            row += 1
+
+        if is_index and is_multi_header:
+            worksheet.write_row(row, 0, list(df.index.names), header_format)
+            row += 1
+
+        # Columns keep their dtype, only values of the written row are converted into Python objects
+        columns = [df.index.get_level_values(level) for level in range(index_columns)]
+        columns.extend(df.iloc[:, i].to_numpy() for i in range(len(df.columns)))
+
+        for i in range(len(df)):
+            worksheet.write_row(row, 0, [self.__to_cell(column[i]) for column in columns])
+            row += 1
+
+    @staticmethod
+    def __to_cell(value):
+        """
+        Convert value into type of xlsxwriter, NaN and NaT are written as empty cell.
+        """
+        if isinstance(value, np.datetime64):
+            value = pd.Timestamp(value)
+        elif isinstance(value, np.generic):
+            value = value.item()
+
+        if value is None or value is pd.NaT or value is pd.NA or (isinstance(value, float) and math.isnan(value)):
+            return None
+
+        if isinstance(value, (pd.Timestamp, datetime.datetime)):
+            return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+        return value
+
+
+class CsvReportWriter(ReportWriter):
+    """
+    Writer of report as CSV files in long format, one file per sheet.
+    """
+
+    def write(self, sheets: Dict[str, pd.DataFrame]) -> List[str]:
+        paths = []
+
+        for sheet_name, df in self._get_long_sheets(sheets):
+            path = self._get_path(f'{self._get_file_suffix(sheet_name)}.csv')
+            df.to_csv(path, index=False)
+            paths.append(path)
+
+        return paths
+
+
+class ParquetReportWriter(ReportWriter):
+    """
+    Writer of report as Parquet files in long format, one file per sheet. Requires optional pyarrow package.
+    """
+
+    def write(self, sheets: Dict[str, pd.DataFrame]) -> List[str]:
+        paths = []
+
+        for sheet_name, df in self._get_long_sheets(sheets):
+            path = self._get_path(f'{self._get_file_suffix(sheet_name)}.parquet')
+            df.to_parquet(path, index=False)
+            paths.append(path)
+
+        return paths
+
+
+class HtmlReportWriter(ReportWriter):
+    """
+    Writer of single self-contained HTML summary with total sheets and control events.
+    Per second sheets are not included.
+    """
+
+    __STYLE = '''
+        body { font-family: sans-serif; margin: 20px; }
+        table { border-collapse: collapse; margin-bottom: 30px; font-size: 13px; }
+        th, td { border: 1px solid #ccc; padding: 4px 8px; text-align: right; }
+        th { background: #f0f0f0; }
+    '''
+
+    def write(self, sheets: Dict[str, pd.DataFrame]) -> List[str]:
+        path = self._get_path('.html')
+        test_name = os.path.basename(os.path.normpath(self.test_folder))
+        body = [f'<h1>{html.escape(test_name)}</h1>',
+                f'<p>Generated at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>']
+
+        for sheet_name, df in sheets.items():
+            if sheet_name in self.WIDE_SHEETS:
+                continue
+
+            body.append(f'<h2>{html.escape(sheet_name)}</h2>')
+            body.append(df.to_html(index=sheet_name not in self.NO_INDEX_SHEETS, float_format=lambda x: f'{x:.2f}',
+                                   na_rep=''))
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+                    f'<title>{html.escape(test_name)}</title>\n<style>{self.__STYLE}</style>\n</head>\n<body>\n'
+                    + '\n'.join(body) + '\n</body>\n</html>\n')
+
+        return [path]
+
+
+class ReportWriters:
+    WRITERS = {
+        ReportFormats.XLSX: ExcelReportWriter,
+        ReportFormats.XLSX_STREAM: StreamingExcelReportWriter,
+        ReportFormats.CSV: CsvReportWriter,
+        ReportFormats.PARQUET: ParquetReportWriter,
+        ReportFormats.HTML: HtmlReportWriter,
+    }
+
+    @staticmethod
+    def get_writer(report_format: str, test_folder: str) -> ReportWriter:
+        return ReportWriters.WRITERS[report_format](test_folder)
@@ -0,0 +1,258 @@
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import socket
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.config import Config
+
+
+class ResultsStore:
+    """
+    Class responsible for SQLite store of results of all runs: Total and Total Stability rows of every finished test
+    with its type, tag, ID, config hash and host info. Rows are kept in long format (one row per metric), so new
+    metrics of report do not change the schema.
+    """
+
+    SHEETS = ['Total', 'Total Stability']
+
+    __SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            test_folder TEXT NOT NULL UNIQUE,
+            test_type TEXT NOT NULL,
+            test_tag TEXT NOT NULL,
+            test_id INTEGER NOT NULL,
+            started_at TEXT NOT NULL,
+            saved_at TEXT NOT NULL,
+            config_hash TEXT NOT NULL,
+            hostname TEXT NOT NULL,
+            host_info TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS runs_tag ON runs (test_tag);
+        CREATE INDEX IF NOT EXISTS runs_type ON runs (test_type);
+        CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+
+        CREATE TABLE IF NOT EXISTS results (
+            run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+            sheet TEXT NOT NULL,
+            step TEXT NOT NULL,
+            step_number INTEGER NOT NULL,
+            file TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            value REAL
+        );
+        CREATE INDEX IF NOT EXISTS results_run ON results (run_id, sheet);
+        CREATE INDEX IF NOT EXISTS results_metric ON results (sheet, metric, file, step_number);
+    '''
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the store, database and its tables are created if not exist.
+
+        Args:
+            db_path (str): Path to SQLite database file.
+        """
+        self.db_path = db_path
+
+        db_folder = os.path.dirname(db_path)
+        if db_folder:
+            os.makedirs(db_folder, exist_ok=True)
+
+        with contextlib.closing(self.__connect()) as connection, connection:
+            connection.executescript(self.__SCHEMA)
+
+    def save_run(self, config: Config, df_total: pd.DataFrame, df_total_stability: pd.DataFrame) -> int:
+        """
+        Save results of the run. Results of the same test folder saved before are replaced,
+        so regenerated report with -f updates the run.
+
+        Returns:
+            int: ID of the run in the store.
+        """
+        load_config = config.load_config
+        test_folder = os.path.abspath(load_config.test_folder)
+
+        results = []
+        for sheet, df in zip(self.SHEETS, [df_total, df_total_stability]):
+            results.extend(self.__get_result_rows(sheet, df))
+
+        with contextlib.closing(self.__connect()) as connection, connection:
+            connection.execute('DELETE FROM runs WHERE test_folder = ?', (test_folder,))
+            cursor = connection.execute(
+                'INSERT INTO runs (test_folder, test_type, test_tag, test_id, started_at, saved_at, config_hash, '
+                'hostname, host_info) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (test_folder, load_config.test_type, load_config.test_tag, load_config.test_id,
+                 self.__get_started_at(test_folder), datetime.datetime.now().isoformat(timespec='seconds'),
+                 config.config_hash, socket.gethostname(), json.dumps(self.__get_host_info(config))))
+            run_id = cursor.lastrowid
+
+            connection.executemany(
+                'INSERT INTO results (run_id, sheet, step, step_number, file, metric, value) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, *row) for row in results])
+
+        logging.info(f'Results of the run are saved into {self.db_path} as run {run_id}')
+
+        return run_id
+
+    def get_runs(self, test_type: Optional[str] = None, test_tag: Optional[str] = None,
+                 limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Get runs ordered by start time, the latest last.
+        """
+        where, params = self.__get_runs_filter(test_type, test_tag)
+        query = f'SELECT run_id, test_type, test_tag, test_id, started_at, config_hash, hostname, test_folder ' \
+                f'FROM runs {where} ORDER BY started_at DESC, run_id DESC'
+
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        with contextlib.closing(self.__connect()) as connection, connection:
+            df_runs = pd.read_sql_query(query, connection, params=params)
+
+        return df_runs.iloc[::-1].set_index('run_id')
+
+    def get_run_id(self, run: str) -> int:
+        """
+        Get ID of the run by its ID or test folder.
+        """
+        with contextlib.closing(self.__connect()) as connection, connection:
+            if run.isdigit():
+                row = connection.execute('SELECT run_id FROM runs WHERE run_id = ?', (int(run),)).fetchone()
+            else:
+                row = connection.execute('SELECT run_id FROM runs WHERE test_folder = ?',
+                                         (os.path.abspath(run),)).fetchone()
+
+        if row is None:
+            raise ValueError(f'Run "{run}" is not found in {self.db_path}')
+
+        return row[0]
+
+    def diff_runs(self, base_run_id: int, run_id: int, sheet: str, metrics: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Compare metrics of two runs by step and file.
+
+        Returns:
+            pd.DataFrame: Base and new value, difference and difference in percent of every metric.
+        """
+        query = 'SELECT run_id, step, step_number, file, metric, value FROM results ' \
+                'WHERE run_id IN (?, ?) AND sheet = ?'
+        params: List = [base_run_id, run_id, sheet]
+        query, params = self.__add_metrics_filter(query, params, metrics)
+
+        with contextlib.closing(self.__connect()) as connection, connection:
+            df = pd.read_sql_query(query, connection, params=params)
+
+        df_diff = df.set_index(['step_number', 'step', 'file', 'metric', 'run_id'])['value'].unstack('run_id')
+        df_diff = df_diff.sort_index().reindex(columns=[base_run_id, run_id])
+        df_diff.columns = ['Base', 'New']
+
+        df_diff['Diff'] = df_diff['New'] - df_diff['Base']
+        df_diff['Diff %'] = np.where(df_diff['Base'] != 0, df_diff['Diff'] / df_diff['Base'].abs() * 100, np.nan)
+
+        return df_diff.droplevel('step_number').rename_axis(['Step', 'File', 'Metric'])
+
+    def get_trend(self, metric: str, sheet: str, file: str = 'Summary', step: Optional[str] = None,
+                  test_type: Optional[str] = None, test_tag: Optional[str] = None,
+                  limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Get the metric of runs ordered by start time, steps are columns.
+        """
+        runs_where, params = self.__get_runs_filter(test_type, test_tag, 'r.')
+        query = f'SELECT r.run_id, r.started_at, r.test_tag, r.test_id, res.step, res.step_number, res.value ' \
+                f'FROM results res JOIN runs r ON r.run_id = res.run_id ' \
+                f'{runs_where} {"AND" if runs_where else "WHERE"} res.sheet = ? AND res.metric = ? AND res.file = ?'
+        params.extend([sheet, metric, file])
+
+        if step is not None:
+            query += ' AND res.step = ?'
+            params.append(step)
+
+        with contextlib.closing(self.__connect()) as connection, connection:
+            df = pd.read_sql_query(query, connection, params=params)
+
+        df_trend = df.pivot_table(index=['started_at', 'run_id', 'test_tag', 'test_id'],
+                                  columns=['step_number', 'step'], values='value', aggfunc='first')
+
+        if not df_trend.empty:
+            df_trend.columns = df_trend.columns.droplevel('step_number')
+
+        if limit is not None:
+            df_trend = df_trend.iloc[-limit:]
+
+        return df_trend
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        Open connection to the store. Context of the connection only commits or rolls back the transaction,
+        so callers close it by contextlib.closing.
+        """
+        connection = sqlite3.connect(self.db_path)
+        connection.execute('PRAGMA foreign_keys = ON')
+
+        return connection
+
+    @staticmethod
+    def __get_result_rows(sheet: str, df: pd.DataFrame) -> List[tuple]:
+        if df is None or df.empty:
+            return []
+
+        df_long = df.select_dtypes(include=['number', 'bool']).astype('float64').stack(future_stack=True)
+        rows = []
+
+        for (step, file, metric), value in df_long.items():
+            rows.append((sheet, step, int(step.split()[-1]), file, metric, None if np.isnan(value) else float(value)))
+
+        return rows
+
+    @staticmethod
+    def __get_runs_filter(test_type: Optional[str], test_tag: Optional[str], prefix: str = '') -> tuple:
+        conditions = []
+        params = []
+
+        if test_type is not None:
+            conditions.append(f'{prefix}test_type = ?')
+            params.append(test_type)
+
+        if test_tag is not None:
+            conditions.append(f'{prefix}test_tag = ?')
+            params.append(test_tag)
+
+        return ('WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+    @staticmethod
+    def __add_metrics_filter(query: str, params: List, metrics: Optional[List[str]]) -> tuple:
+        if metrics:
+            query += f' AND metric IN ({", ".join("?" * len(metrics))})'
+            params = params + list(metrics)
+
+        return query, params
+
+    @staticmethod
+    def __get_started_at(test_folder: str) -> str:
+        # Name of test folder ends with start time of the test
+        try:
+            started_at = datetime.datetime.strptime(os.path.basename(test_folder)[-19:], '%Y-%m-%d_%H-%M-%S')
+        except ValueError:
+            started_at = datetime.datetime.fromtimestamp(os.path.getmtime(test_folder))
+
+        return started_at.isoformat(timespec='seconds')
+
+    @staticmethod
+    def __get_host_info(config: Config) -> Dict:
+        return {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'interfaces': sorted({pcap_config.interface for pcap_config in config.pcap_configs}),
+            'agents': [agent_config.name for agent_config in config.agent_configs],
+        }
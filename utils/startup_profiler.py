@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+
+class StartupProfiler:
+    """
+    Class responsible for measuring cold start of run command. Modules of run command are imported by a fresh
+    interpreter, so time and memory are not hidden by modules already imported by the current process.
+    """
+
+    # Modules imported before the test is started by run command
+    RUN_MODULES = ['main', 'models.config', 'utils.tcpreplay_runner']
+    # Modules needed only for report and graphs, they must not be imported by the process running the test
+    HEAVY_MODULES = ['dpkt', 'matplotlib', 'numpy', 'pandas', 'plotly', 'pyarrow']
+
+    __PROBE = '''
+import importlib
+import json
+import resource
+import sys
+import time
+
+start_time = time.perf_counter()
+for module in sys.argv[1].split(','):
+    importlib.import_module(module)
+
+print(json.dumps({
+    'import_time': time.perf_counter() - start_time,
+    # KB on Linux
+    'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': sorted({name.split('.')[0] for name in sys.modules}),
+}))
+'''
+
+    @staticmethod
+    def profile(max_startup_time: float, max_rss: float) -> bool:
+        """
+        Measure cold start of run command and compare it with the budget.
+
+        Args:
+            max_startup_time (float): Budget of interpreter start and imports in seconds.
+            max_rss (float): Budget of peak RSS after imports in MB.
+
+        Returns:
+            bool: True if the run command fits the budget and imports no heavy module.
+        """
+        root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        start_time = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', StartupProfiler.__PROBE, ','.join(StartupProfiler.RUN_MODULES)],
+                                cwd=root_folder, capture_output=True, text=True)
+        startup_time = time.perf_counter() - start_time
+
+        if result.returncode != 0:
+            logging.error(f'Failed to import modules of run command: {result.stderr.strip()}')
+            return False
+
+        probe = json.loads(result.stdout)
+        heavy_modules = [module for module in StartupProfiler.HEAVY_MODULES if module in probe['modules']]
+
+        logging.info(f'Cold start of run command: {startup_time:.3f} sec. (budget {max_startup_time:.3f} sec.), '
+                     f'imports {probe["import_time"]:.3f} sec., peak RSS {probe["max_rss"]:.1f} MB '
+                     f'(budget {max_rss:.1f} MB), {len(probe["modules"])} top level modules.')
+
+        is_passed = True
+
+        if startup_time > max_startup_time:
+            logging.error(f'Cold start time {startup_time:.3f} sec. is over the budget {max_startup_time:.3f} sec.')
+            is_passed = False
+
+        if probe['max_rss'] > max_rss:
+            logging.error(f'Peak RSS {probe["max_rss"]:.1f} MB is over the budget {max_rss:.1f} MB.')
+            is_passed = False
+
+        if heavy_modules:
+            logging.error(f'Run command imports heavy modules: {", ".join(heavy_modules)}')
+            is_passed = False
+
+        return is_passed
@@ -0,0 +1,84 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from models.config import Config
+from utils.logger import Logger
+
+
+def init_report_process(process_queue: multiprocessing.Queue):
+    Logger.init_child_logger(process_queue)
+
+
+def generate_partial_report(config: Config, last_step: int):
+    """
+    Generate report of finished steps, function is used as a task of process pool.
+    pandas is imported by the report process only, not by the process running the test.
+    """
+    from utils.report_generator import ReportGenerator
+
+    ReportGenerator(config=config, workers=1).generate_report(last_step)
+
+
+class StepReporter:
+    """
+    Class responsible for refreshing report in background process after every finished step of the test.
+
+    Parsed stats files and sheets of every step are saved into parse cache of the test folder,
+    so final report only merges ready parts.
+    """
+
+    def __init__(self, config: Config):
+        """
+        Initialize the reporter.
+
+        Args:
+            config (Config): Config of test.
+        """
+        self.config = config
+
+        self.__lock = threading.Lock()
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__pending_report: Optional[Future] = None
+
+    def add_step(self, step_number: int):
+        """
+        Start refreshing of report with the finished step. Not started refresh of previous step is cancelled,
+        because the new one includes it.
+        """
+        with self.__lock:
+            if self.__executor is None:
+                # Separate process does not take GIL from threads reading output of tcpreplay
+                self.__executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                                                      initializer=init_report_process,
+                                                      initargs=(Logger.get_process_queue(),))
+
+            if self.__pending_report is not None:
+                self.__pending_report.cancel()
+
+            self.__pending_report = self.__executor.submit(generate_partial_report, self.config, step_number)
+            self.__pending_report.add_done_callback(
+                lambda future: self.__on_report_done(future, step_number))
+
+    def stop(self):
+        """
+        Wait for running refresh of report. Not started refresh is cancelled, final report is generated after the test.
+        """
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def __on_report_done(future: Future, step_number: int):
+        if future.cancelled():
+            return
+
+        exception = future.exception()
+        if exception is not None:
+            logging.warning(f'Failed to refresh report after step {step_number}: {exception}')
+        else:
+            logging.info(f'Report is refreshed after step {step_number}')
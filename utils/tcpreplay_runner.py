@@ -1,12 +1,22 @@
+import datetime
+import json
 import os
+import re
 import subprocess
 import threading
 import time
 import logging
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
 from models.config import Config, MaxPerfLoadConfig, StabilityLoadConfig, SpikeLoadConfig, CustomLoadConfig, \
-    PcapConfig, RunConfig, TcpReplayArgsConfig, BashScriptConfig
+    PcapConfig, RunConfig, TcpReplayArgsConfig
+from utils.agent_controller import AgentsController
+from utils.control_server import ControlServer, StepControl
+from utils.event_journal import EventJournal
+from utils.hook_executor import HookExecutor
+from utils.metrics_exporter import MetricsExporter
+from utils.phase_profiler import PhaseProfiler
+from utils.step_reporter import StepReporter
 
 
 class TcpreplayRunner:
@@ -22,6 +32,26 @@ class TcpreplayRunner:
             config (Config): Configuration dictionary.
         """
         self.config: Config = config
+        self.hook_executor: HookExecutor = HookExecutor(config.bash_scripts_config.bash_scripts_list,
+                                                        config.load_config.test_folder)
+        self.agents_controller: Optional[AgentsController] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self.control_server: Optional[ControlServer] = None
+        self.step_reporter: Optional[StepReporter] = None
+
+        if config.agent_configs:
+            self.agents_controller = AgentsController(config.agent_configs, config.run_config,
+                                                      config.tcpreplay_args, config.load_config.test_folder)
+
+        if config.metrics_config.is_enabled:
+            self.metrics_exporter = MetricsExporter(config.metrics_config, config.load_config.is_pps)
+
+        if config.run_config.control_socket is not None:
+            self.control_server = ControlServer(config.run_config.control_socket, config.load_config.test_folder,
+                                                is_agents_mode=bool(config.agent_configs))
+
+        if config.run_config.incremental_report:
+            self.step_reporter = StepReporter(config)
 
     def run(self):
         """
@@ -29,19 +59,66 @@ class TcpreplayRunner:
         """
         logging.info('Starting test run.')
 
-        if isinstance(self.config.load_config, MaxPerfLoadConfig):
-            self.run_max_perf_test()
-        elif isinstance(self.config.load_config, StabilityLoadConfig):
-            self.run_stability_test()
-        elif isinstance(self.config.load_config, SpikeLoadConfig):
-            self.run_spike_test()
-        elif isinstance(self.config.load_config, CustomLoadConfig):
-            raise ValueError("Custom test type is not implemented yet.")
-        else:
-            raise ValueError("Unknown test type.")
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+
+        if self.control_server is not None:
+            self.control_server.start()
+
+        try:
+            if isinstance(self.config.load_config, MaxPerfLoadConfig):
+                self.run_max_perf_test()
+            elif isinstance(self.config.load_config, StabilityLoadConfig):
+                self.run_stability_test()
+            elif isinstance(self.config.load_config, SpikeLoadConfig):
+                self.run_spike_test()
+            elif isinstance(self.config.load_config, CustomLoadConfig):
+                raise ValueError("Custom test type is not implemented yet.")
+            else:
+                raise ValueError("Unknown test type.")
+        finally:
+            if self.metrics_exporter is not None:
+                self.metrics_exporter.stop()
+
+            if self.control_server is not None:
+                self.control_server.stop()
+
+            if self.step_reporter is not None:
+                self.step_reporter.stop()
 
         logging.info('Test run completed.')
 
+    def run_step(self, step_thread: 'StepThread'):
+        """
+        Run the test step on this host or on agents, if they are configured.
+        """
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.set_step(step_thread.step_number, step_thread.step_duration + step_thread.impact)
+
+        # Processes of agents do not use step control of this host, control server rejects changes of their steps
+        if self.control_server is not None and self.agents_controller is None:
+            self.control_server.set_step_control(step_thread.step_control)
+
+        try:
+            with PhaseProfiler.phase(f'Step {step_thread.step_number}'):
+                if self.agents_controller is not None:
+                    self.agents_controller.run_step(step_thread)
+                else:
+                    step_thread.start()
+                    step_thread.join()
+        finally:
+            if self.control_server is not None:
+                self.control_server.set_step_control(None)
+
+        if self.step_reporter is not None:
+            self.step_reporter.add_step(step_thread.step_number)
+
+    def is_aborted(self) -> bool:
+        """
+        Check if the test is aborted through control socket.
+        """
+        return self.control_server is not None and self.control_server.is_aborted
+
     def run_max_perf_test(self):
         """
         Run the max_perf test type.
@@ -49,10 +126,13 @@ class TcpreplayRunner:
         load_params: MaxPerfLoadConfig = self.config.load_config
 
         for step_number in range(1, load_params.steps + 1):
+            if self.is_aborted():
+                logging.warning('Test is aborted, skipping remaining steps')
+                break
+
             logging.info(f"Starting step {step_number}")
 
-            if self.config.bash_scripts_config.bash_scripts_list:
-                self.run_additional_scripts(True)
+            self.hook_executor.run_hooks(True, step_number)
 
             current_load_percent = load_params.start_speed_percent + load_params.increment_percent * (step_number - 1)
 
@@ -66,40 +146,21 @@ class TcpreplayRunner:
                 is_pps=load_params.is_pps,
                 step_duration=load_params.step_duration,
                 impact=load_params.impact,
-                test_folder=self.config.load_config.test_folder
+                test_folder=self.config.load_config.test_folder,
+                metrics_exporter=self.metrics_exporter
             )
 
-            step_thread.start()
-            step_thread.join()
+            self.hook_executor.start_background_hooks(step_number)
+            try:
+                self.run_step(step_thread)
+            finally:
+                # Hooks of failed or aborted step must not keep running
+                self.hook_executor.stop_background_hooks()
 
-            if self.config.bash_scripts_config.bash_scripts_list:
-                self.run_additional_scripts(False)
+            self.hook_executor.run_hooks(False, step_number)
 
             logging.info(f"Ending step {step_number}")
 
-    @staticmethod
-    def run_script(bash_script: BashScriptConfig):
-        if bash_script.only_once and bash_script.run_count > 0:
-            return
-
-        logging.info(f'Run script: {bash_script.script}')
-        bash_script.run_count += 1
-        with subprocess.Popen(bash_script.script, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE,
-                              text=True) as process:
-            lines = ''
-            for line in process.stdout:
-                lines += line
-
-        logging.info(f'Script output:\n{lines}')
-
-    def run_additional_scripts(self, is_before: bool):
-        for bash_script in self.config.bash_scripts_config.bash_scripts_list:
-            if bash_script.is_before_stage and is_before:
-                self.run_script(bash_script)
-            elif not bash_script.is_before_stage and not is_before:
-                self.run_script(bash_script)
-
     def run_stability_test(self):
         """
         Run the stability test type.
@@ -107,8 +168,7 @@ class TcpreplayRunner:
         load_params: StabilityLoadConfig = self.config.load_config
 
         logging.info("Starting stability test")
-        if self.config.bash_scripts_config.bash_scripts_list:
-            self.run_additional_scripts(True)
+        self.hook_executor.run_hooks(True, 1)
 
         step_thread = StepThread(
             step_number=1,
@@ -120,14 +180,18 @@ class TcpreplayRunner:
             is_pps=load_params.is_pps,
             step_duration=load_params.step_duration,
             impact=load_params.impact,
-            test_folder=self.config.load_config.test_folder
+            test_folder=self.config.load_config.test_folder,
+            metrics_exporter=self.metrics_exporter
         )
 
-        step_thread.start()
-        step_thread.join()
+        self.hook_executor.start_background_hooks(1)
+        try:
+            self.run_step(step_thread)
+        finally:
+            # Hooks of failed or aborted step must not keep running
+            self.hook_executor.stop_background_hooks()
 
-        if self.config.bash_scripts_config.bash_scripts_list:
-            self.run_additional_scripts(False)
+        self.hook_executor.run_hooks(False, 1)
 
         logging.info("Ending stability test")
 
@@ -138,6 +202,10 @@ class TcpreplayRunner:
         load_params: SpikeLoadConfig = self.config.load_config
 
         for step in range(1, load_params.steps + 1):
+            if self.is_aborted():
+                logging.warning('Test is aborted, skipping remaining steps')
+                break
+
             # Stability period
             logging.info(f"Starting stability period for step {step}")
 
@@ -151,14 +219,18 @@ class TcpreplayRunner:
                 is_pps=load_params.is_pps,
                 step_duration=load_params.stability_speed_duration,
                 impact=load_params.impact,
-                test_folder=self.config.load_config.test_folder
+                test_folder=self.config.load_config.test_folder,
+                metrics_exporter=self.metrics_exporter
             )
 
-            step_thread.start()
-            step_thread.join()
+            self.run_step(step_thread)
 
             logging.info(f"Ending stability period for step {step}")
 
+            if self.is_aborted():
+                logging.warning('Test is aborted, skipping remaining steps')
+                break
+
             # Spike period
             logging.info(f"Starting spike period for step {step}")
 
@@ -176,11 +248,11 @@ class TcpreplayRunner:
                 is_pps=load_params.is_pps,
                 step_duration=load_params.spike_duration,
                 impact=load_params.impact,
-                test_folder=self.config.load_config.test_folder
+                test_folder=self.config.load_config.test_folder,
+                metrics_exporter=self.metrics_exporter
             )
 
-            step_thread.start()
-            step_thread.join()
+            self.run_step(step_thread)
 
             logging.info(f"Ending spike period for step {step}")
 
@@ -193,7 +265,9 @@ class StepThread(threading.Thread):
     def __init__(self, step_number: int, pcap_configs: List[PcapConfig], run_config: RunConfig,
                  tcpreplay_args: TcpReplayArgsConfig, current_load_percent: float, base_speed: float, is_pps: bool,
                  step_duration: int, impact: int, test_folder: str,
-                 spike_load_percent: Optional[float] = None, pcap_for_spike: Optional[List[PcapConfig]] = None):
+                 spike_load_percent: Optional[float] = None, pcap_for_spike: Optional[List[PcapConfig]] = None,
+                 start_barrier: Optional[threading.Barrier] = None,
+                 metrics_exporter: Optional[MetricsExporter] = None):
         super().__init__()
         self.step_number = step_number
         self.pcap_configs = pcap_configs
@@ -208,15 +282,23 @@ class StepThread(threading.Thread):
 
         self.spike_load_percent = spike_load_percent
         self.pcap_for_spike = pcap_for_spike
+        self.start_barrier = start_barrier
+        self.metrics_exporter = metrics_exporter
+        self.step_control = StepControl(step_number)
 
     def run(self):
         """
         Run the test step.
         """
+        start_barrier = self.start_barrier
+        if start_barrier is None and self.run_config.start_barrier:
+            start_barrier = threading.Barrier(len(self.pcap_configs))
+
         threads = []
         for pcap_config in self.pcap_configs:
             # Determine if this pcap should use spike load percent
-            if self.pcap_for_spike and pcap_config.file in self.pcap_for_spike and self.spike_load_percent is not None:
+            if (self.pcap_for_spike and self.spike_load_percent is not None
+                    and any(spike_config.file == pcap_config.file for spike_config in self.pcap_for_spike)):
                 load_percent = self.spike_load_percent
             else:
                 load_percent = self.current_load_percent
@@ -231,7 +313,10 @@ class StepThread(threading.Thread):
                 is_pps=self.is_pps,
                 step_duration=self.step_duration,
                 impact=self.impact,
-                test_folder=self.test_folder
+                test_folder=self.test_folder,
+                start_barrier=start_barrier,
+                metrics_exporter=self.metrics_exporter,
+                step_control=self.step_control
             )
 
             runner.start()
@@ -240,6 +325,38 @@ class StepThread(threading.Thread):
         for t in threads:
             t.join()
 
+        self.__write_start_report(threads)
+
+    def __write_start_report(self, threads: List['TcpreplayThread']):
+        """
+        Save launch and first packet timestamps of every tcpreplay process of the step.
+        """
+        processes = []
+        for thread in threads:
+            process_runner = thread.process_runner
+            processes.append({
+                'file_num': thread.pcap_config.pcap_id,
+                'file': thread.pcap_config.file,
+                'launch_time': process_runner.launch_time if process_runner else None,
+                'release_time': process_runner.release_time if process_runner else None,
+                'first_packet_time': process_runner.first_packet_time if process_runner else None,
+            })
+
+        first_packet_times = [process['first_packet_time'] for process in processes
+                              if process['first_packet_time'] is not None]
+        skew = max(first_packet_times) - min(first_packet_times) if first_packet_times else None
+
+        if skew is not None:
+            if len(processes) > 1 and skew > self.run_config.start_max_skew:
+                logging.warning(f'Start skew of step {self.step_number} is {skew:.3f} sec, '
+                                f'more than {self.run_config.start_max_skew} sec')
+            else:
+                logging.info(f'Start skew of step {self.step_number} is {skew:.3f} sec')
+
+        start_file = os.path.join(self.test_folder, f'start__step_{self.step_number}.json')
+        with open(start_file, 'w', encoding='utf-8') as f:
+            json.dump({'step': self.step_number, 'skew': skew, 'processes': processes}, f, indent=2)
+
 
 class TcpreplayThread(threading.Thread):
     """
@@ -248,7 +365,9 @@ class TcpreplayThread(threading.Thread):
 
     def __init__(self, step_number: int, pcap_config: PcapConfig, run_config: RunConfig,
                  tcpreplay_args: TcpReplayArgsConfig, load_percent: float, base_speed: float, is_pps: bool,
-                 step_duration: int, impact: int, test_folder: str):
+                 step_duration: int, impact: int, test_folder: str,
+                 start_barrier: Optional[threading.Barrier] = None,
+                 metrics_exporter: Optional[MetricsExporter] = None, step_control: Optional[StepControl] = None):
         super().__init__()
         self.step_number = step_number
         self.pcap_config = pcap_config
@@ -262,6 +381,11 @@ class TcpreplayThread(threading.Thread):
         self.loop_count = pcap_config.loop_count
         self.is_percent_loop_calculate = pcap_config.is_percent_loop_calculate
         self.test_folder = test_folder
+        self.start_barrier = start_barrier
+        self.metrics_exporter = metrics_exporter
+        self.step_control = step_control
+
+        self.process_runner: Optional[TcpreplayProcessRunner] = None
 
     def run(self):
         """
@@ -295,7 +419,7 @@ class TcpreplayThread(threading.Thread):
                                       f"{os.path.basename(pcap_file)}.log")
         duration = self.step_duration + self.impact
 
-        runner = TcpreplayProcessRunner(
+        self.process_runner = TcpreplayProcessRunner(
             pcap_file=pcap_file,
             interface=interface,
             speed=speed,
@@ -311,10 +435,16 @@ class TcpreplayThread(threading.Thread):
             speed_threshold=self.run_config.speed_threshold,
             preload_in_ram=self.pcap_config.preload_in_ram,
             is_sudo=self.run_config.is_sudo,
-            sudo_password=self.run_config.sudo_password
+            sudo_password=self.run_config.sudo_password,
+            start_barrier=self.start_barrier,
+            start_barrier_timeout=self.run_config.start_barrier_timeout,
+            hot_spare=self.run_config.hot_spare,
+            pcap_id=self.pcap_config.pcap_id,
+            metrics_exporter=self.metrics_exporter,
+            step_control=self.step_control
         )
 
-        runner.run()
+        self.process_runner.run()
 
 
 class TcpreplayProcessRunner:
@@ -322,10 +452,20 @@ class TcpreplayProcessRunner:
     Class for managing the tcpreplay process.
     """
 
+    # Duration is read from stdin at release, so a spare started long before it runs only the rest of the step
+    __HELD_START_SCRIPT = 'read -r duration && command="$1" && shift && exec "$command" --duration="$duration" "$@"'
+    __PAGE_CACHE_CHUNK_SIZE = 1024 * 1024
+    # Interval of checking rate requests and end of the step, independent of output of tcpreplay
+    __CONTROL_POLL_INTERVAL = 0.5
+    __TEST_START_PATTERN = re.compile(r'Test start: (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+)')
+
     def __init__(self, pcap_file: str, interface: str, speed: float, is_pps: bool, unique_ip_loops: Optional[int],
                  tcpreplay_args: TcpReplayArgsConfig, stats_file: str, stats_err_file: str, netmap_mode: bool,
                  duration: int, speed_check: bool, speed_check_interval: int, speed_threshold: float,
-                 preload_in_ram: bool, is_sudo: bool, sudo_password: Optional[str]):
+                 preload_in_ram: bool, is_sudo: bool, sudo_password: Optional[str],
+                 start_barrier: Optional[threading.Barrier] = None, start_barrier_timeout: int = 60,
+                 hot_spare: bool = False, pcap_id: int = 0, metrics_exporter: Optional[MetricsExporter] = None,
+                 step_control: Optional[StepControl] = None):
         """
         Initialize the process runner with necessary parameters.
         """
@@ -345,11 +485,280 @@ class TcpreplayProcessRunner:
         self.preload_in_ram = preload_in_ram
         self.is_sudo = is_sudo
         self.sudo_password = sudo_password
+        self.start_barrier = start_barrier
+        self.start_barrier_timeout = start_barrier_timeout
+        self.hot_spare = hot_spare
+        self.pcap_id = pcap_id
+        self.metrics_exporter = metrics_exporter
+        self.step_control = step_control
+
+        self.__journal = EventJournal(EventJournal.get_path(stats_file))
+        self.__spare: Optional[subprocess.Popen] = None
+        self.__spare_lock = threading.Lock()
+        self.__spare_thread: Optional[threading.Thread] = None
+
+        self.launch_time: Optional[float] = None
+        self.release_time: Optional[float] = None
+        self.first_packet_time: Optional[float] = None
 
     def run(self):
         """
         Run the tcpreplay process with monitoring and restarting if necessary.
         """
+        try:
+            cmd = self.__build_command(self.duration)
+
+            if self.preload_in_ram:
+                self.__warm_page_cache()
+        except Exception:
+            if self.start_barrier is not None:
+                self.start_barrier.abort()
+
+            raise
+
+        log_str = 'PPS' if self.is_pps else 'MBPS'
+        logging.info(f"Executing command for {self.pcap_file}:\n{' '.join(cmd)}")
+
+        is_held_start = self.start_barrier is not None
+        start_time = None
+        last_check_time = None
+        unstable = False
+        time_log_sec = 0
+        restart_time = None
+        is_rate_changed = False
+
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.set_target(self.pcap_id, self.pcap_file, self.speed)
+
+        if self.step_control is not None:
+            self.step_control.set_speed(self.pcap_id, self.speed)
+
+        process = self.__spawn(cmd, is_held_start)
+
+        with open(self.stats_file, 'a') as stat_file:
+            while True:
+                next_process = None
+
+                with process:
+                    if is_held_start:
+                        self.__wait_start_barrier()
+                        self.__release(process, self.duration)
+                        is_held_start = False
+
+                    if start_time is None:
+                        self.release_time = time.time()
+                        start_time = int(self.release_time)
+                        last_check_time = start_time
+
+                    is_preload_done = False
+                    is_first_stats = False
+
+                    stat_file.write(f'{start_time}\n')
+                    stat_file.write(f'Target rate: {self.speed:.2f} {"pps" if self.is_pps else "Mbps"}\n')
+                    stat_file.flush()
+
+                    stderr_thread = threading.Thread(target=self.__read_stderr, args=(process, self.stats_err_file))
+                    stderr_thread.start()
+
+                    if self.hot_spare:
+                        self.__prepare_spare_in_background(cmd)
+
+                    control_state = {}
+                    stop_control_watch = threading.Event()
+                    control_thread = threading.Thread(target=self.__watch_control,
+                                                      args=(process, start_time, control_state, stop_control_watch),
+                                                      daemon=True)
+                    control_thread.start()
+
+                    for line in process.stdout:
+                        if restart_time is not None:
+                            restart_gap = time.time() - restart_time
+                            restart_time = None
+                            logging.info(f'Restart gap of tcpreplay for {self.pcap_file} is {restart_gap:.3f} sec')
+                            stat_file.write(f'Restart gap: {restart_gap:.3f} seconds\n')
+                            self.__journal.add(EventJournal.RESTART_GAP, process.pid, gap=round(restart_gap, 6))
+
+                        if not is_preload_done and line.startswith('Test start:'):
+                            is_preload_done = True
+                            self.__journal.add(EventJournal.PRELOAD_DONE, process.pid, preload=self.preload_in_ram)
+
+                        if line.startswith('Actual:'):
+                            if not is_first_stats:
+                                is_first_stats = True
+                                self.__journal.add(EventJournal.FIRST_STATS, process.pid)
+
+                            # Wall clock of the line aligns files with different start and restarts in report
+                            stat_file.write(f'Wall time: {time.time():.3f} seconds\n')
+
+                        stat_file.write(line)
+                        stat_file.flush()
+
+                        if self.first_packet_time is None:
+                            self.first_packet_time = self.__get_first_packet_time(line)
+
+                        rated = self.__parse_rated(line)
+                        if rated is not None and self.metrics_exporter is not None:
+                            self.metrics_exporter.update_rate(self.pcap_id, self.pcap_file, *rated)
+
+                        if self.speed_check:
+                            current_time = int(time.time())
+                            elapsed_time = current_time - start_time
+
+                            if line.__contains__('Actual:'):
+                                time_log_sec = int(float(line.split()[-2]))
+
+                                if time_log_sec < elapsed_time + (5 if self.netmap_mode else 3):
+                                    continue
+                            elif rated is not None:
+                                if time_log_sec < elapsed_time:
+                                    continue
+
+                                mbps, pps = rated
+                                speed = pps if self.is_pps else mbps
+                            else:
+                                continue
+
+                            if self.__calculate_threshold(current_time, last_check_time, speed):
+                                last_check_time = current_time
+                                logging.warning(f'Detected abnormal {log_str} rate, restarting tcpreplay')
+                                self.__journal.add(EventJournal.RATE_ANOMALY, process.pid, measured=speed,
+                                                   target=self.speed, unit='pps' if self.is_pps else 'Mbps')
+
+                                restart_time = time.time()
+                                self.__kill(process, EventJournal.KILL_RATE_ANOMALY)
+
+                                if self.metrics_exporter is not None:
+                                    self.metrics_exporter.add_restart(self.pcap_id, self.pcap_file)
+
+                                if self.hot_spare:
+                                    next_process = self.__take_spare()
+                                    if next_process is not None:
+                                        self.__release(next_process, self.__get_restart_duration(start_time))
+
+                                unstable = True
+                                break
+
+                            last_check_time = current_time
+
+                stop_control_watch.set()
+                control_thread.join()
+                stderr_thread.join()
+                self.__journal.add(EventJournal.EXIT, process.pid, code=process.returncode)
+
+                new_speed = control_state.get('new_speed')
+                if new_speed is not None:
+                    logging.warning(f'Changed {log_str} rate for {self.pcap_file} from {self.speed} '
+                                    f'to {new_speed}, restarting tcpreplay')
+                    self.__set_speed(new_speed)
+
+                    restart_time = control_state['kill_time']
+                    is_rate_changed = True
+                    unstable = True
+                remaining_time = self.__get_remaining_time(start_time)
+
+                if not unstable:
+                    self.__discard_spare()
+
+                    if process.returncode == 0 and remaining_time >= 1:
+                        logging.info(f'Step is extended, relaunching tcpreplay for {self.pcap_file} '
+                                     f'for {int(remaining_time)} sec')
+                        cmd = self.__build_command(int(remaining_time))
+                        process = self.__spawn(cmd, False)
+                        continue
+
+                    stat_file.write(str(int(time.time())))
+                    stat_file.flush()
+
+                    break  # Exit if tcpreplay finished normally
+                else:
+                    unstable = False  # Reset unstable flag and restart tcpreplay
+
+                    if is_rate_changed:
+                        is_rate_changed = False
+                        self.__discard_spare()
+
+                        # Rate is changed while the process is restarted after abnormal rate
+                        if next_process is not None:
+                            self.__kill(next_process, EventJournal.KILL_RATE_CHANGE)
+                            next_process.communicate()
+
+                        cmd = self.__build_command(max(1, int(remaining_time)))
+                        next_process = self.__spawn(cmd, False)
+                    elif next_process is None:
+                        time.sleep(1)  # Delay before restarting
+                        cmd = self.__build_command(self.__get_restart_duration(start_time))
+                        next_process = self.__spawn(cmd, False)
+
+                    process = next_process
+
+    def __watch_control(self, process: subprocess.Popen, start_time: int, control_state: Dict,
+                        stop_event: threading.Event):
+        """
+        Kill the process on requested change of rate or at the end of the step. Control is polled on a timer,
+        because tcpreplay may print no lines for a long time, e.g. with a low rate or a loop delay.
+        """
+        while not stop_event.wait(self.__CONTROL_POLL_INTERVAL):
+            if process.poll() is not None:
+                return
+
+            new_speed = self.step_control.pop_rate_request(self.pcap_id) if self.step_control else None
+            if new_speed is not None:
+                control_state['new_speed'] = new_speed
+                control_state['kill_time'] = time.time()
+                self.__kill(process, EventJournal.KILL_RATE_CHANGE)
+
+                return
+
+            if self.__is_time_over(start_time):
+                self.__kill(process, EventJournal.KILL_TIME_OVER)
+
+                return
+
+    def __set_speed(self, speed: float):
+        self.speed = speed
+
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.set_target(self.pcap_id, self.pcap_file, speed)
+
+        if self.step_control is not None:
+            self.step_control.set_speed(self.pcap_id, speed)
+
+    def __is_time_over(self, start_time: int) -> bool:
+        """
+        Check if the process must be stopped. Planned end of the step has 5 seconds of grace time,
+        shortened or stopped step is finished exactly at its deadline.
+        """
+        planned_end_time = start_time + self.duration
+
+        if self.step_control is None:
+            return time.time() >= planned_end_time + 5
+
+        deadline = self.step_control.get_deadline(planned_end_time)
+        if deadline < planned_end_time:
+            return time.time() >= deadline
+
+        return time.time() >= deadline + 5
+
+    def __get_remaining_time(self, start_time: int) -> float:
+        if self.step_control is None:
+            return 0.0
+
+        return self.step_control.get_deadline(start_time + self.duration) - time.time()
+
+    def __get_restart_duration(self, start_time: int) -> int:
+        """
+        Get duration of a process restarted during the step, it runs only until the end of the step.
+        """
+        planned_end_time = start_time + self.duration
+        if self.step_control is not None:
+            planned_end_time = self.step_control.get_deadline(planned_end_time)
+
+        return max(1, int(planned_end_time - time.time()))
+
+    def __build_command(self, duration: int) -> List[str]:
+        """
+        Build tcpreplay command line.
+        """
         cmd = []
         if self.is_sudo:
             cmd = ['sudo', '-k', '-S']
@@ -359,7 +768,7 @@ class TcpreplayProcessRunner:
             '-i', self.interface,
             '--stats=1',
             '--loop=0',
-            f'--duration={self.duration}',
+            f'--duration={duration}',
         ])
 
         if self.preload_in_ram:
@@ -373,10 +782,8 @@ class TcpreplayProcessRunner:
 
         if self.is_pps:
             cmd.append(f'--pps={self.speed}')
-            log_str = 'PPS'
         else:
             cmd.append(f'--mbps={self.speed}')
-            log_str = 'MBPS'
 
         if self.netmap_mode:
             cmd.extend(['--netmap', '--nm-delay=2'])
@@ -393,97 +800,151 @@ class TcpreplayProcessRunner:
 
         cmd.append(self.pcap_file)
 
-        logging.info(f"Executing command for {self.pcap_file}:\n{' '.join(cmd)}")
+        return cmd
 
-        start_time = int(time.time())
-        start_time_str = str(start_time) + '\n'
-        last_check_time = start_time
-        unstable = False
-        time_log_sec = 0
+    def __spawn(self, cmd: List[str], is_held_start: bool) -> subprocess.Popen:
+        """
+        Start tcpreplay process. Held process passes sudo and exec of shell, then waits for the duration on stdin
+        before exec of tcpreplay.
+        """
+        if is_held_start:
+            tcpreplay_index = cmd.index('tcpreplay')
+            tcpreplay_cmd = [arg for arg in cmd[tcpreplay_index:] if not arg.startswith('--duration=')]
+            cmd = cmd[:tcpreplay_index] + ['sh', '-c', self.__HELD_START_SCRIPT, 'sh'] + tcpreplay_cmd
 
-        with open(self.stats_file, 'a') as stat_file:
-            while True:
-                with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                      text=True) as process:
-                    if self.is_sudo:
-                        process.stdin.write(self.sudo_password + '\n')
-                        process.stdin.flush()
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True)
 
-                    stat_file.write(start_time_str)
-                    stat_file.flush()
+        # Start report keeps launch of the first process, restarts and spares are in the event journal
+        if self.launch_time is None:
+            self.launch_time = time.time()
 
-                    stderr_thread = threading.Thread(target=self.__read_stderr, args=(process, self.stats_err_file))
-                    stderr_thread.start()
+        self.__journal.add(EventJournal.SPAWN, process.pid, is_held=is_held_start)
+        if not is_held_start:
+            # Popen returns after exec of the command
+            self.__journal.add(EventJournal.EXEC, process.pid)
 
-                    for line in process.stdout:
-                        stat_file.write(line)
-                        stat_file.flush()
+        if self.is_sudo:
+            process.stdin.write(self.sudo_password + '\n')
+            process.stdin.flush()
 
-                        if self.speed_check:
-                            current_time = int(time.time())
-                            elapsed_time = current_time - start_time
+        return process
 
-                            if line.__contains__('Actual:'):
-                                time_log_sec = int(float(line.split()[-2]))
+    def __release(self, process: subprocess.Popen, duration: int):
+        """
+        Let held process exec tcpreplay for the duration.
+        """
+        process.stdin.write(f'{int(duration)}\n')
+        process.stdin.flush()
 
-                                if time_log_sec < elapsed_time + (5 if self.netmap_mode else 3):
-                                    continue
-                            elif line.__contains__('Rated:'):
-                                if time_log_sec < elapsed_time:
-                                    continue
+        self.__journal.add(EventJournal.EXEC, process.pid)
 
-                                parts = line.split(", ")
-                                if self.is_pps:
-                                    speed = float(parts[1].split(' ')[0])
-                                else:
-                                    speed = float(parts[2].split(' ')[0])
-                            else:
-                                continue
+    def __prepare_spare_in_background(self, cmd: List[str]):
+        """
+        Spawn held spare process in background thread, if there is no spare yet.
+        """
+        with self.__spare_lock:
+            if self.__spare is not None or (self.__spare_thread is not None and self.__spare_thread.is_alive()):
+                return
+
+            self.__spare_thread = threading.Thread(target=self.__prepare_spare, args=(cmd,), daemon=True)
+            self.__spare_thread.start()
+
+    def __prepare_spare(self, cmd: List[str]):
+        try:
+            spare = self.__spawn(cmd, True)
+        except Exception as e:
+            logging.error(f'Failed to prepare hot spare tcpreplay for {self.pcap_file}: {e}')
+            return
 
-                            if self.__calculate_threshold(current_time, last_check_time, speed):
-                                last_check_time = current_time
-                                logging.warning(f'Detected abnormal {log_str} rate, restarting tcpreplay')
+        with self.__spare_lock:
+            self.__spare = spare
 
-                                if self.is_sudo:
-                                    subproc = subprocess.Popen(['sudo', 'kill', str(process.pid)],
-                                                               stdin=subprocess.PIPE,
-                                                               stdout=subprocess.PIPE,
-                                                               stderr=subprocess.PIPE,
-                                                               text=True)
-                                    subproc.stdin.write(self.sudo_password + '\n')
-                                    subproc.stdin.flush()
-                                else:
-                                    process.terminate()
+    def __take_spare(self) -> Optional[subprocess.Popen]:
+        """
+        Get ready spare process. Returns None, if spare is not ready or already exited.
+        """
+        with self.__spare_lock:
+            spare, self.__spare = self.__spare, None
 
-                                unstable = True
-                                break
+        if spare is not None and spare.poll() is not None:
+            logging.warning(f'Hot spare tcpreplay for {self.pcap_file} exited with code {spare.returncode}')
+            spare.communicate()
+            return None
 
-                            last_check_time = current_time
+        if spare is None:
+            logging.warning(f'Hot spare tcpreplay for {self.pcap_file} is not ready, starting new process')
 
-                        if int(time.time()) - start_time >= self.duration + 5 and process.poll() is None:
-                            if self.is_sudo:
-                                subproc = subprocess.Popen(['sudo', 'kill', str(process.pid)],
-                                                           stdin=subprocess.PIPE,
-                                                           stdout=subprocess.PIPE,
-                                                           stderr=subprocess.PIPE,
-                                                           text=True)
-                                subproc.stdin.write(self.sudo_password + '\n')
-                                subproc.stdin.flush()
-                            else:
-                                process.terminate()
+        return spare
 
-                            break
+    def __discard_spare(self):
+        """
+        Stop not used spare process. Closing of stdin makes held shell exit without exec of tcpreplay.
+        """
+        if self.__spare_thread is not None:
+            self.__spare_thread.join()
 
-                stderr_thread.join()
+        with self.__spare_lock:
+            spare, self.__spare = self.__spare, None
 
-                if not unstable:
-                    stat_file.write(str(int(time.time())))
-                    stat_file.flush()
+        if spare is not None:
+            spare.communicate()
 
-                    break  # Exit if tcpreplay finished normally
-                else:
-                    unstable = False  # Reset unstable flag and restart tcpreplay
-                    time.sleep(1)  # Delay before restarting
+    def __wait_start_barrier(self):
+        try:
+            self.start_barrier.wait(self.start_barrier_timeout)
+        except threading.BrokenBarrierError:
+            logging.warning(f'Start barrier is broken, starting tcpreplay for {self.pcap_file} without sync')
+
+    def __warm_page_cache(self):
+        """
+        Read pcap file once, so preload of tcpreplay reads it from page cache.
+        """
+        with open(self.pcap_file, 'rb') as f:
+            while f.read(self.__PAGE_CACHE_CHUNK_SIZE):
+                pass
+
+    def __kill(self, process: subprocess.Popen, reason: str):
+        self.__journal.add(EventJournal.KILL, process.pid, reason=reason)
+
+        if self.is_sudo:
+            subproc = subprocess.Popen(['sudo', 'kill', str(process.pid)],
+                                       stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       text=True)
+            subproc.stdin.write(self.sudo_password + '\n')
+            subproc.stdin.flush()
+        else:
+            process.terminate()
+
+    @staticmethod
+    def __get_first_packet_time(line: str) -> Optional[float]:
+        """
+        Get timestamp of first sent packet from "Test start:" line of tcpreplay.
+        """
+        if not line.startswith('Test start:'):
+            return None
+
+        match = TcpreplayProcessRunner.__TEST_START_PATTERN.match(line)
+        if match:
+            return datetime.datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S.%f').timestamp()
+
+        return time.time()
+
+    @staticmethod
+    def __parse_rated(line: str) -> Optional[Tuple[float, float]]:
+        """
+        Get Mbps and PPS from "Rated:" line of tcpreplay, e.g. "Rated: 1059781.0 Bps, 8.47 Mbps, 1355.82 pps".
+        """
+        if not line.startswith('Rated:'):
+            return None
+
+        parts = line.split(', ')
+        try:
+            return float(parts[1].split(' ')[0]), float(parts[2].split(' ')[0])
+        except (IndexError, ValueError):
+            return None
 
     def __calculate_threshold(self, current_time, last_check_time, speed):
         check_time = current_time - last_check_time
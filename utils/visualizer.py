@@ -1,167 +1,242 @@
 import os
+from typing import List, Optional, Union
+
+import numpy as np
 import pandas as pd
 import logging
-import plotly.graph_objs as go
+
+from utils.dashboard_writer import DashboardWriter
+from utils.downsampler import Downsampler
+from utils.phase_profiler import PhaseProfiler
+from utils.png_renderer import PngFigure, PngRenderer, PngTrace
+from utils.prepared_series import PreparedSeries
+from utils.rate_analytics import RateAnalytics
 
 
 class Visualizer:
+    # Columns of x axis, not plotted as metrics
+    TIME_COLUMNS = ['Time', 'Wall Time']
+
     @classmethod
-    def visualize(cls, df_stage_combined: pd.DataFrame, df_stability_combined: pd.DataFrame, folder_name: str):
+    def visualize(cls, df_stage_combined: pd.DataFrame, df_stability_combined: pd.DataFrame, folder_name: str,
+                  df_capacity: Optional[pd.DataFrame] = None, is_html: bool = False, is_dashboard: bool = False,
+                  workers: Optional[int] = None, max_points: Optional[int] = None):
+        """
+        Save graphs of test as PNG files, rendered together by several processes.
+
+        Args:
+            is_html (bool): Also save interactive HTML graphs.
+            is_dashboard (bool): Also save single-file interactive dashboard of all graphs.
+            workers (Optional[int]): Number of processes to render PNG graphs, number of CPUs by default.
+            max_points (Optional[int]): Max number of points of every trace, longer traces are downsampled by LTTB.
+                Traces are not downsampled by default.
+        """
         logging.info('Start generating visualizations.')
+        png_figures = []
+        # HTML graphs besides the dashboard share plotly.js saved once into their folder instead of embedding it
+        plotly_js = 'directory' if is_dashboard else True
+
         if not df_stage_combined.empty:
-            cls.plot_performance(df_stage_combined, os.path.join(folder_name, 'graphs', 'Stage'), 'Stage')
+            png_figures.extend(cls.plot_performance(df_stage_combined, os.path.join(folder_name, 'graphs', 'Stage'),
+                                                    'Stage', is_html, max_points, plotly_js))
         else:
             logging.warning("Stage DataFrame is empty. Skipping visualization for Stage.")
 
         if not df_stability_combined.empty:
-            cls.plot_performance(df_stability_combined, os.path.join(folder_name, 'graphs', 'Stability'), 'Stability')
+            png_figures.extend(cls.plot_performance(df_stability_combined,
+                                                    os.path.join(folder_name, 'graphs', 'Stability'), 'Stability',
+                                                    is_html, max_points, plotly_js))
         else:
             logging.warning("Stability DataFrame is empty. Skipping visualization for Stability.")
 
+        if df_capacity is not None and not df_capacity.empty:
+            png_figures.append(cls.plot_capacity(df_capacity, os.path.join(folder_name, 'graphs'), is_html,
+                                                 plotly_js))
+
+        if is_dashboard:
+            with PhaseProfiler.phase('Export dashboard'):
+                DashboardWriter.write({'Stage': df_stage_combined, 'Stability': df_stability_combined},
+                                      os.path.join(folder_name, 'graphs'),
+                                      os.path.basename(os.path.normpath(folder_name)), cls.TIME_COLUMNS, max_points)
+
+        with PhaseProfiler.phase('Export PNG graphs'):
+            PngRenderer.render(png_figures, workers)
+
         logging.info('Visualizations generated.')
 
     @classmethod
-    def plot_performance(cls, df: pd.DataFrame, folder_name: str, df_name: str):
-        metrics = df.columns.get_level_values(2).unique().tolist()
-        steps = df.columns.get_level_values(0).unique()
-        files = df.columns.get_level_values(1).unique()
+    def plot_performance(cls, df: pd.DataFrame, folder_name: str, df_name: str, is_html: bool = False,
+                         max_points: Optional[int] = None,
+                         plotly_js: Union[bool, str] = True) -> List[PngFigure]:
+        """
+        Save HTML graphs of every metric of every step and over all steps, if is_html is set.
+        Target rate of a file is drawn as a dashed line on graph of its metric.
+
+        Args:
+            plotly_js (Union[bool, str]): include_plotlyjs of HTML graphs, True embeds plotly.js into every file.
+
+        Returns:
+            List[PngFigure]: PNG graphs to render.
+        """
+        png_figures = []
+        series = PreparedSeries(df, cls.TIME_COLUMNS, RateAnalytics.TARGET_COLUMNS)
 
         os.makedirs(folder_name, exist_ok=True)
 
-        for step in steps:
-            for metric in metrics:
-                if metric == 'Time':
-                    continue
-
-                for file in files:
-                    if (step, file, 'Time') in df.columns and (step, file, metric) in df.columns:
-                        time = df[(step, file, 'Time')].copy()
-                        data = df[(step, file, metric)].copy()
+        for step in series.steps:
+            for metric in series.metrics:
+                filename_png = f'{step}_{df_name}_{metric}.png'
+                filepath_png = os.path.join(folder_name, filename_png)
 
-                        df_combined = pd.DataFrame({'Time': time, metric: data})
+                png_traces = []
 
-                        df_combined.dropna(inplace=True)
-                        df_combined.drop_duplicates(subset='Time', inplace=True)
-                        df_combined.reset_index(drop=True, inplace=True)
+                for file in series.files:
+                    file_series = series.get(step, file, metric)
 
-                    else:
+                    if file_series is None:
                         logging.warning(f"Time or metric '{metric}' column not found for {file} at {step}.")
+                    elif not len(file_series[0]):
+                        logging.warning(f"Data is empty after cleaning for {file} at {step}.")
+                    else:
+                        png_traces.append(cls.__get_trace(file, *file_series, max_points))
 
-                filename_png = f'{step}_{df_name}_{metric}.png'
-                filepath_png = os.path.join(folder_name, filename_png)
+                    if metric in series.targets:
+                        target_series = series.get(step, file, series.targets[metric])
 
-                fig = go.Figure()
-
-                for file in files:
-                    if (step, file, 'Time') in df.columns and (step, file, metric) in df.columns:
-                        time = df[(step, file, 'Time')].copy()
-                        data = df[(step, file, metric)].copy()
-
-                        df_combined = pd.DataFrame({'Time': time, metric: data})
-
-                        df_combined.dropna(inplace=True)
-                        df_combined.drop_duplicates(subset='Time', inplace=True)
-                        df_combined.reset_index(drop=True, inplace=True)
-
-                        if not df_combined.empty:
-                            fig.add_trace(go.Scatter(
-                                x=df_combined['Time'],
-                                y=df_combined[metric],
-                                mode='lines',
-                                name=file,
-                                line=dict(width=2)
-                            ))
-                        else:
-                            logging.warning(f"Data is empty after cleaning for {file} at {step}.")
-                    else:
-                        logging.warning(f"Time or metric '{metric}' column not found for {file} at {step}.")
+                        if target_series is not None and len(target_series[0]):
+                            png_traces.append(cls.__get_target_trace(file, *target_series, max_points))
 
-                fig.update_layout(
-                    title=f'{metric} at {step} ({df_name})',
-                    xaxis_title='Time',
-                    yaxis_title=metric,
-                    legend_title='Files',
-                    template='plotly_dark',
-                    hovermode='x unified'
-                )
+                png_figure = PngFigure(filepath_png, f'{metric} at {step} ({df_name})', 'Time', metric, png_traces,
+                                       'Files')
+                png_figures.append(png_figure)
 
-                filename_html = f'{step}_{df_name}_{metric}.html'
-                filepath_html = os.path.join(folder_name, filename_html)
+                if is_html:
+                    filename_html = f'{step}_{df_name}_{metric}.html'
+                    filepath_html = os.path.join(folder_name, filename_html)
 
-                fig.write_html(filepath_html)
-                fig.write_image(filepath_png, width=1920, height=1080)
+                    cls.__write_html(png_figure, filepath_html, plotly_js)
 
-        for metric in metrics:
-            if metric == 'Time':
-                continue
+        for metric in series.metrics:
+            filename_png = f'All_Steps_{df_name}_{metric}.png'
+            filepath_png = os.path.join(folder_name, filename_png)
 
-            all_time = {}
-            all_data = {}
+            png_traces = []
 
-            for file in files:
-                all_time[file] = []
-                all_data[file] = []
-                cumulative_time = 0
+            for file in series.files:
+                file_series = series.get_all_steps(file, metric)
 
-                for step in steps:
-                    if (step, file, 'Time') in df.columns and (step, file, metric) in df.columns:
-                        time = df[(step, file, 'Time')].copy()
-                        data = df[(step, file, metric)].copy()
+                if file_series is not None:
+                    png_traces.append(cls.__get_trace(file, *file_series, max_points))
+                else:
+                    logging.warning(f"No data to plot for {file} for metric {metric} in All Steps.")
 
-                        df_combined = pd.DataFrame({'Time': time, metric: data})
+                if metric in series.targets:
+                    target_series = series.get_all_steps(file, series.targets[metric])
 
-                        df_combined.dropna(inplace=True)
-                        df_combined.drop_duplicates(subset='Time', inplace=True)
-                        df_combined.reset_index(drop=True, inplace=True)
+                    if target_series is not None:
+                        png_traces.append(cls.__get_target_trace(file, *target_series, max_points))
 
-                        if not df_combined.empty:
-                            time_duration = df_combined['Time'].iloc[-1] - df_combined['Time'].iloc[0] + 1
+            png_figure = PngFigure(filepath_png, f'{metric} over all steps ({df_name})', 'Time', metric, png_traces,
+                                   'Files')
+            png_figures.append(png_figure)
 
-                            df_combined['Time'] += cumulative_time
+            if is_html:
+                filename_html = f'All_Steps_{df_name}_{metric}.html'
+                filepath_html = os.path.join(folder_name, filename_html)
 
-                            cumulative_time += time_duration
+                cls.__write_html(png_figure, filepath_html, plotly_js)
 
-                            all_time[file].append(df_combined['Time'])
-                            all_data[file].append(df_combined[metric])
-                        else:
-                            logging.warning(f"Data is empty after cleaning for {file} at {step}.")
-                    else:
-                        logging.warning(f"Time or metric '{metric}' column not found for {file} at {step}.")
+        return png_figures
 
-            filename_png = f'All_Steps_{df_name}_{metric}.png'
-            filepath_png = os.path.join(folder_name, filename_png)
+    @staticmethod
+    def __get_trace(file: str, time: np.ndarray, data: np.ndarray, max_points: Optional[int]) -> PngTrace:
+        return PngTrace(file, *Downsampler.downsample(time, data, max_points))
+
+    @staticmethod
+    def __get_target_trace(file: str, time: np.ndarray, data: np.ndarray, max_points: Optional[int]) -> PngTrace:
+        return PngTrace(f'{file} target', *Downsampler.downsample(time, data, max_points), width=1, dash='dash')
 
+    @staticmethod
+    def __write_html(png_figure: PngFigure, filepath_html: str, plotly_js: Union[bool, str]):
+        """
+        Save interactive HTML graph with the same traces as PNG graph.
+        """
+        import plotly.graph_objs as go
+
+        with PhaseProfiler.phase(f'Export {os.path.basename(filepath_html)}'):
             fig = go.Figure()
 
-            for file in files:
-                if all_time[file] and all_data[file]:
-                    concatenated_time = pd.concat(all_time[file]).reset_index(drop=True)
-                    concatenated_data = pd.concat(all_data[file]).reset_index(drop=True)
-
-                    if len(concatenated_time) == len(concatenated_data):
-                        fig.add_trace(go.Scatter(
-                            x=concatenated_time,
-                            y=concatenated_data,
-                            mode='lines',
-                            name=file,
-                            line=dict(width=2)
-                        ))
-                    else:
-                        logging.warning(f"Final data and time length mismatch for {file} in All Steps.")
-                else:
-                    logging.warning(f"No data to plot for {file} for metric {metric} in All Steps.")
+            for trace in png_figure.traces:
+                fig.add_trace(go.Scatter(
+                    x=trace.x,
+                    y=trace.y,
+                    mode=trace.mode,
+                    name=trace.name,
+                    line=dict(width=trace.width, dash=trace.dash)
+                ))
 
             fig.update_layout(
-                title=f'{metric} over all steps ({df_name})',
-                xaxis_title='Time',
-                yaxis_title=metric,
-                legend_title='Files',
+                title=png_figure.title,
+                xaxis_title=png_figure.x_title,
+                yaxis_title=png_figure.y_title,
+                legend_title=png_figure.legend_title,
                 template='plotly_dark',
                 hovermode='x unified'
             )
 
-            filename_html = f'All_Steps_{df_name}_{metric}.html'
-            filepath_html = os.path.join(folder_name, filename_html)
+            fig.write_html(filepath_html, include_plotlyjs=plotly_js)
+
+    @classmethod
+    def plot_capacity(cls, df_capacity: pd.DataFrame, folder_name: str, is_html: bool = False,
+                      plotly_js: Union[bool, str] = True) -> PngFigure:
+        """
+        Plot delivered rate of steps by target rate with fitted line, saturation knee and max accepted step.
+
+        Returns:
+            PngFigure: PNG graph to render.
+        """
+        os.makedirs(folder_name, exist_ok=True)
+
+        target = df_capacity['Target Rate']
+        png_traces = [
+            PngTrace('Target', target, target, width=1, dash='dash'),
+            PngTrace('Delivered', target, df_capacity['Delivered Rate'], mode='lines+markers'),
+            PngTrace('Fit', target, df_capacity['Fitted Rate'], width=1, dash='dot'),
+        ]
+        marked = []
+
+        for column, name, symbol in [('Is Knee', 'Knee', 'x'), ('Is Max Accepted', 'Max accepted', 'star')]:
+            df_marked = df_capacity[df_capacity[column]]
+
+            if not df_marked.empty:
+                png_traces.append(PngTrace(name, df_marked['Target Rate'], df_marked['Delivered Rate'],
+                                           mode='markers', symbol=symbol, size=14))
+                marked.append((df_marked, name, symbol))
+
+        if is_html:
+            import plotly.graph_objs as go
+
+            fig = go.Figure()
+
+            fig.add_trace(go.Scatter(x=target, y=target, mode='lines', name='Target', line=dict(width=1, dash='dash')))
+            fig.add_trace(go.Scatter(x=target, y=df_capacity['Delivered Rate'], mode='lines+markers',
+                                     name='Delivered', text=df_capacity.index, line=dict(width=2)))
+            fig.add_trace(go.Scatter(x=target, y=df_capacity['Fitted Rate'], mode='lines', name='Fit',
+                                     line=dict(width=1, dash='dot')))
+
+            for df_marked, name, symbol in marked:
+                fig.add_trace(go.Scatter(x=df_marked['Target Rate'], y=df_marked['Delivered Rate'], mode='markers',
+                                         name=name, text=df_marked.index, marker=dict(size=14, symbol=symbol)))
+
+            fig.update_layout(
+                title='Capacity',
+                xaxis_title='Target rate',
+                yaxis_title='Delivered rate',
+                template='plotly_dark',
+            )
+
+            with PhaseProfiler.phase('Export Capacity.html'):
+                fig.write_html(os.path.join(folder_name, 'Capacity.html'), include_plotlyjs=plotly_js)
 
-            fig.write_html(filepath_html)
-            fig.write_image(filepath_png, width=1920, height=1080)
+        return PngFigure(os.path.join(folder_name, 'Capacity.png'), 'Capacity', 'Target rate', 'Delivered rate',
+                         png_traces)